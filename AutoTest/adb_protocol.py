@@ -0,0 +1,442 @@
+"""
+ADB主机协议客户端
+直接通过本地adb server的socket(默认127.0.0.1:5037)发送host:transport、exec:、shell:请求,
+每条设备命令省去一次adb客户端进程的fork/exec
+
+同时提供一个以本地目录模拟设备的假adb server, 便于在没有手机的情况下测试:
+  python adb_protocol.py fake-server <数据目录> [--port 5038]
+数据目录相当于App的私有目录, 即包含files/autotest/*.json
+"""
+
+import os
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from metrics import record
+from transport import READ_CHUNK_SIZE, read_bounded
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5037
+
+# 追加在exec:命令之后, 用于从输出末尾取回退出码
+RETURNCODE_MARKER = "__AUTOTEST_RC__"
+
+
+class AdbProtocolError(Exception):
+    """adb server返回FAIL或响应格式错误"""
+
+
+class ConnectionClosed(AdbProtocolError):
+    """adb server提前关闭了连接"""
+
+
+def server_port():
+    """
+    adb server端口: 环境变量ANDROID_ADB_SERVER_PORT, 未设置时为DEFAULT_PORT
+    每次调用时读取环境变量, 导入模块之后再设置(如测试中指向假adb server)同样生效
+    """
+    return int(os.environ.get('ANDROID_ADB_SERVER_PORT', DEFAULT_PORT))
+
+
+def encode_request(service):
+    """按adb协议编码请求: 4位十六进制长度 + 内容"""
+    payload = service.encode('utf-8')
+    return f"{len(payload):04x}".encode('ascii') + payload
+
+
+def _recv_exactly(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionClosed("adb server提前关闭了连接")
+        data += chunk
+    return data
+
+
+def _recv_all(sock, max_bytes=None, timeout=None):
+    """
+    读取到连接关闭
+    :param timeout: 整个读取过程的超时时间(秒), 超时抛出socket.timeout; 为None时只有连接池的单次recv超时
+    """
+    if timeout is None:
+        return read_bounded(lambda: sock.recv(READ_CHUNK_SIZE), max_bytes)
+    deadline = time.monotonic() + timeout
+
+    def read_chunk():
+        # 每次recv只等待剩余的时间, 持续缓慢输出的命令同样在截止时间后结束
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout(f"{timeout}秒内未读取完输出")
+        sock.settimeout(remaining)
+        return sock.recv(READ_CHUNK_SIZE)
+    return read_bounded(read_chunk, max_bytes)
+
+
+def _read_status(sock):
+    """读取OKAY/FAIL状态, FAIL时抛出带错误信息的异常"""
+    status = _recv_exactly(sock, 4)
+    if status == b'OKAY':
+        return
+    if status == b'FAIL':
+        length = int(_recv_exactly(sock, 4), 16)
+        raise AdbProtocolError(_recv_exactly(sock, length).decode('utf-8', 'replace'))
+    raise AdbProtocolError(f"无法识别的响应: {status!r}")
+
+
+def wrap_exec_command(command):
+    """在exec:命令之后追加输出退出码的标记行"""
+    return f"{command}; printf '\\n{RETURNCODE_MARKER} %d\\n' $?"
+
+
+def split_returncode(output):
+    """
+    从exec:输出末尾取回退出码
+    :return: (退出码, 去掉标记行后的输出字节)
+    """
+    marker = f"\n{RETURNCODE_MARKER} ".encode('ascii')
+    index = output.rfind(marker)
+    if index < 0:
+        raise AdbProtocolError("exec输出中缺少退出码标记, 连接可能被中断")
+    return int(output[index + len(marker):].strip()), output[:index]
+
+
+def _read_length_prefixed(sock):
+    length = int(_recv_exactly(sock, 4), 16)
+    return _recv_exactly(sock, length)
+
+
+class SocketPool:
+    """
+    预先建立的adb server连接池
+
+    adb server在一个服务请求结束后会关闭连接, 因此连接不能归还复用;
+    连接池在后台线程中提前建立空闲连接, 把connect的开销移出请求路径。
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=None, size=4, timeout=10):
+        self.address = (host, port or server_port())
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._refill = threading.Event()
+        self._closed = False
+        if size > 0:
+            threading.Thread(target=self._refill_loop, daemon=True).start()
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _refill_loop(self):
+        while not self._closed:
+            self._refill.wait()
+            self._refill.clear()
+            while not self._closed:
+                with self._lock:
+                    if len(self._idle) >= self.size:
+                        break
+                try:
+                    sock = self._connect()
+                except OSError:
+                    break
+                with self._lock:
+                    self._idle.append(sock)
+
+    def acquire(self):
+        """取出一个已建立的连接, 池为空时当场建立"""
+        with self._lock:
+            sock = self._idle.pop() if self._idle else None
+        self._refill.set()
+        return sock if sock is not None else self._connect()
+
+    def connect_fresh(self):
+        """绕过连接池直接建立新连接"""
+        return self._connect()
+
+    def close(self):
+        self._closed = True
+        self._refill.set()
+        with self._lock:
+            for sock in self._idle:
+                sock.close()
+            self._idle.clear()
+
+
+class AdbSocketClient:
+    """
+    adb主机协议客户端
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=None, pool_size=4, timeout=10):
+        """
+        :param host: adb server地址
+        :param port: adb server端口, 默认为创建时的server_port()
+        :param pool_size: 预建立连接的数量, 为0时不预建立
+        :param timeout: socket超时时间(秒)
+        """
+        self.pool = SocketPool(host, port, pool_size, timeout)
+
+    def _open(self, service):
+        """发送一个请求并确认OKAY, 连接失效时用新连接重试一次"""
+        sock = self.pool.acquire()
+        try:
+            sock.sendall(encode_request(service))
+            _read_status(sock)
+            return sock
+        except (OSError, ConnectionClosed):
+            sock.close()
+        except Exception:
+            sock.close()
+            raise
+        record('retries', 1)
+        sock = self.pool.connect_fresh()
+        try:
+            sock.sendall(encode_request(service))
+            _read_status(sock)
+            return sock
+        except Exception:
+            sock.close()
+            raise
+
+    def host_request(self, service):
+        """
+        发送host:类请求并返回带长度前缀的响应内容
+        :param service: 如"host:version", "host:devices"
+        """
+        sock = self._open(service)
+        try:
+            return _read_length_prefixed(sock)
+        finally:
+            sock.close()
+
+    def server_version(self):
+        """返回adb server的协议版本号"""
+        return int(self.host_request("host:version"), 16)
+
+    def devices(self):
+        """
+        列出adb server上的设备
+        :return: [(序列号, 状态), ...]
+        """
+        output = self.host_request("host:devices").decode('utf-8')
+        devices = []
+        for line in output.splitlines():
+            parts = line.split()
+            if len(parts) >= 2:
+                devices.append((parts[0], parts[1]))
+        return devices
+
+    def _open_device_service(self, service, serial=None):
+        """切换到指定设备的传输通道后再请求设备端服务"""
+        transport = f"host:transport:{serial}" if serial else "host:transport-any"
+        sock = self._open(transport)
+        try:
+            sock.sendall(encode_request(service))
+            _read_status(sock)
+            return sock
+        except Exception:
+            sock.close()
+            raise
+
+    def exec_out(self, command, serial=None, max_bytes=None, timeout=None):
+        """
+        通过exec:服务执行命令, 输出为原始字节(与adb exec-out相同)
+        :param command: 设备端shell命令字符串
+        :param serial: 设备序列号
+        :param max_bytes: 输出上限(字节), 默认MAX_OUTPUT_BYTES
+        :param timeout: 读取输出的超时时间(秒)
+        :return: (退出码, 标准输出字节)
+        :raises socket.timeout: 超时
+        """
+        sock = self._open_device_service(f"exec:{wrap_exec_command(command)}", serial)
+        try:
+            output = _recv_all(sock, max_bytes, timeout)
+        finally:
+            sock.close()
+        return split_returncode(output)
+
+    def exec_in(self, command, data, serial=None, max_bytes=None, timeout=None):
+        """
+        通过exec:服务执行命令并把data写入其标准输入(与adb exec-in相同), 写完后关闭发送方向
+        :param timeout: 读取输出的超时时间(秒)
+        :return: (退出码, 标准输出字节)
+        :raises socket.timeout: 超时
+        """
+        sock = self._open_device_service(f"exec:{wrap_exec_command(command)}", serial)
+        try:
+            sock.sendall(data)
+            sock.shutdown(socket.SHUT_WR)
+            output = _recv_all(sock, max_bytes, timeout)
+        finally:
+            sock.close()
+        return split_returncode(output)
+
+    def shell(self, command, serial=None):
+        """
+        通过shell:服务执行命令
+        :return: 标准输出字节(v1 shell协议不回传退出码)
+        """
+        sock = self._open_device_service(f"shell:{command}", serial)
+        try:
+            return _recv_all(sock)
+        finally:
+            sock.close()
+
+    def close(self):
+        self.pool.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_socket_client():
+    """返回进程内共享的AdbSocketClient, 端口在首次调用时按server_port()确定"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AdbSocketClient()
+        return _client
+
+
+# ==================== 假adb server ====================
+
+# 在假设备上代替run-as和pm的脚本
+_RUN_AS_SHIM = '#!/bin/sh\nshift\nexec "$@"\n'
+_PM_SHIM = '#!/bin/sh\n[ "$1" = "list" ] && echo "package:$3"\n'
+
+
+class _FakeAdbHandler(socketserver.BaseRequestHandler):
+
+    def _read_request(self):
+        length = int(_recv_exactly(self.request, 4), 16)
+        return _recv_exactly(self.request, length).decode('utf-8')
+
+    def _okay(self, payload=None):
+        self.request.sendall(b'OKAY')
+        if payload is not None:
+            data = payload.encode('utf-8')
+            self.request.sendall(f"{len(data):04x}".encode('ascii') + data)
+
+    def _fail(self, message):
+        data = message.encode('utf-8')
+        self.request.sendall(b'FAIL' + f"{len(data):04x}".encode('ascii') + data)
+
+    def handle(self):
+        server = self.server
+        try:
+            service = self._read_request()
+            if service == 'host:version':
+                self._okay(f"{41:04x}")
+                return
+            if service in ('host:devices', 'host:devices-l'):
+                self._okay(f"{server.serial}\tdevice\n")
+                return
+            if service not in ('host:transport-any', f"host:transport:{server.serial}"):
+                self._fail(f"device '{service.rsplit(':', 1)[-1]}' not found")
+                return
+            self._okay()
+
+            service = self._read_request()
+            kind, _, command = service.partition(':')
+            if kind not in ('exec', 'shell'):
+                self._fail(f"unsupported service: {kind}")
+                return
+            self._okay()
+            process = subprocess.Popen(['sh', '-c', command],
+                                       cwd=server.root,
+                                       env=server.env,
+                                       stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.DEVNULL)
+            # 客户端发送的数据转为命令的标准输入(exec-in), 客户端关闭发送方向时关闭标准输入
+            threading.Thread(target=self._pump_stdin, args=(process.stdin,), daemon=True).start()
+            output = process.stdout.read()
+            process.wait()
+            self.request.sendall(output)
+        except (AdbProtocolError, OSError):
+            pass
+
+    def _pump_stdin(self, stdin):
+        try:
+            while True:
+                data = self.request.recv(65536)
+                if not data:
+                    break
+                stdin.write(data)
+            stdin.close()
+        except (OSError, ValueError):
+            pass
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    """
+    以本地目录模拟单台设备的adb server
+
+    exec:/shell:命令在数据目录下用本地sh执行, run-as和pm由临时脚本代替,
+    因此设备端命令(包括快照拉取的sh -c脚本)无需修改即可运行。
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, root, host=DEFAULT_HOST, port=0, serial="fake-0001"):
+        """
+        :param root: 模拟的App私有目录, 其下为files/autotest/
+        :param port: 监听端口, 为0时自动分配
+        :param serial: 假设备的序列号
+        """
+        super().__init__((host, port), _FakeAdbHandler)
+        self.root = os.path.abspath(root)
+        self.serial = serial
+        self._shim_dir = tempfile.mkdtemp(prefix="fake_adb_")
+        for name, content in (('run-as', _RUN_AS_SHIM), ('pm', _PM_SHIM)):
+            path = os.path.join(self._shim_dir, name)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.chmod(path, 0o755)
+        self.env = dict(os.environ, PATH=self._shim_dir + os.pathsep + os.environ.get('PATH', ''))
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        """在后台线程中开始服务, 返回自身便于链式调用"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def server_close(self):
+        super().server_close()
+        shutil.rmtree(self._shim_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != 'fake-server':
+        print("用法: python adb_protocol.py fake-server <数据目录> [--port 5038]")
+        sys.exit(1)
+
+    port = 5038
+    if '--port' in sys.argv:
+        port = int(sys.argv[sys.argv.index('--port') + 1])
+
+    server = FakeAdbServer(sys.argv[2], port=port)
+    print(f"✓ 假adb server已启动: {DEFAULT_HOST}:{server.port}, 设备 {server.serial}")
+    print(f"  数据目录: {server.root}")
+    print(f"  使用方法: ANDROID_ADB_SERVER_PORT={server.port} AUTOTEST_ADB_BACKEND=socket "
+          f"python run_all_tests.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
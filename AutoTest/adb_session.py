@@ -0,0 +1,212 @@
+"""
+常驻adb shell会话
+每台设备维持一个长期存在的`adb shell`进程, 命令通过stdin写入, 输出以哨兵标记行分隔,
+重复的`run-as ... cat`只需一次管道写入, 无需每次都创建adb进程并重新握手
+"""
+
+import atexit
+import queue
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+
+from metrics import record
+from snapshot_cache import resolve_serial
+from transport import MAX_OUTPUT_BYTES, OutputTooLarge
+
+# 单条命令默认超时时间(秒)
+DEFAULT_TIMEOUT = 10
+
+# 每个会话保留的延迟样本数
+LATENCY_SAMPLES = 1000
+
+
+class SessionError(Exception):
+    """会话异常退出"""
+
+
+class SessionTimeout(SessionError):
+    """命令在超时时间内没有结束"""
+
+
+class AdbShellSession:
+    """
+    单台设备上的常驻shell会话
+
+    命令在同一个设备端shell中顺序执行, 每条命令后追加一行
+    "<哨兵> <退出码>", 读取到哨兵行即表示该命令的输出结束。
+    会话进程退出时自动重连并重试一次。
+    """
+
+    def __init__(self, serial=None, timeout=DEFAULT_TIMEOUT):
+        """
+        :param serial: 设备序列号, 为None时由adb自行选择设备
+        :param timeout: 单条命令的默认超时时间(秒)
+        """
+        self.serial = serial
+        self.timeout = timeout
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.last_latency = None
+        self.commands = 0
+        self.reconnects = 0
+        self._process = None
+        self._chunks = None
+        self._buffer = b''
+        self._token = uuid.uuid4().hex
+        self._lock = threading.Lock()
+
+    def _start(self):
+        """启动adb shell进程和后台读取线程"""
+        command = ['adb', '-s', self.serial, 'shell'] if self.serial else ['adb', 'shell']
+        self._process = subprocess.Popen(command,
+                                         stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL)
+        self._chunks = queue.Queue()
+        self._buffer = b''
+        reader = threading.Thread(target=self._read_loop,
+                                  args=(self._process.stdout, self._chunks),
+                                  daemon=True)
+        reader.start()
+
+    @staticmethod
+    def _read_loop(stream, chunks):
+        """后台线程: 把stdout上的数据块放入队列, None表示会话已结束"""
+        try:
+            while True:
+                chunk = stream.read1(65536)
+                if not chunk:
+                    break
+                chunks.put(chunk)
+        except (OSError, ValueError):
+            pass
+        chunks.put(None)
+
+    def is_alive(self):
+        return self._process is not None and self._process.poll() is None
+
+    def close(self):
+        """结束会话进程"""
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        self._process = None
+
+    def _execute(self, command, timeout, max_bytes):
+        """在当前会话中执行一条命令, 返回(退出码, 输出字节)"""
+        if not self.is_alive():
+            self._start()
+        self.commands += 1
+        sentinel = f"__AUTOTEST_{self._token}_{self.commands}__".encode('ascii')
+        marker = b'\n' + sentinel + b' '
+        script = f"{command}\nprintf '\\n%s %d\\n' {sentinel.decode('ascii')} $?\n"
+        self._process.stdin.write(script.encode('utf-8'))
+        self._process.stdin.flush()
+
+        deadline = time.monotonic() + timeout
+        while True:
+            index = self._buffer.find(marker)
+            if index >= 0:
+                end = self._buffer.find(b'\n', index + len(marker))
+                if end >= 0:
+                    output = self._buffer[:index]
+                    returncode = int(self._buffer[index + len(marker):end])
+                    self._buffer = self._buffer[end + 1:]
+                    return returncode, output
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # 输出状态未知, 丢弃该会话, 下次调用时重建
+                self.close()
+                raise SessionTimeout(f"命令超时: {command}")
+            try:
+                chunk = self._chunks.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if chunk is None:
+                self.close()
+                raise SessionError("adb shell会话已断开")
+            self._buffer += chunk
+            if max_bytes and len(self._buffer) > max_bytes + len(marker) + 16:
+                # 剩余输出无法再与下一条命令区分, 丢弃该会话
+                self.close()
+                raise OutputTooLarge(f"输出超过{max_bytes}字节")
+
+    def run(self, command, timeout=None, max_bytes=None):
+        """
+        执行一条设备端shell命令, 会话断开时自动重连并重试一次
+        :param command: shell命令字符串
+        :param timeout: 超时时间(秒), 默认使用会话的timeout
+        :param max_bytes: 输出上限(字节), 默认MAX_OUTPUT_BYTES
+        :return: (退出码, 输出字节)
+        """
+        timeout = timeout or self.timeout
+        max_bytes = max_bytes or MAX_OUTPUT_BYTES
+        with self._lock:
+            start = time.perf_counter()
+            try:
+                result = self._execute(command, timeout, max_bytes)
+            except SessionTimeout:
+                raise
+            except (SessionError, OSError):
+                self.close()
+                self.reconnects += 1
+                record('retries', 1)
+                result = self._execute(command, timeout, max_bytes)
+            self.last_latency = time.perf_counter() - start
+            self.latencies.append(self.last_latency)
+            return result
+
+    def stats(self):
+        """返回会话的命令数、重连次数和延迟统计(毫秒)"""
+        samples = list(self.latencies)
+        return {
+            "serial": resolve_serial(self.serial),
+            "commands": self.commands,
+            "reconnects": self.reconnects,
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 2) if samples else 0,
+            "max_ms": round(max(samples) * 1000, 2) if samples else 0,
+            "last_ms": round(self.last_latency * 1000, 2) if self.last_latency else 0
+        }
+
+
+# 会话池: 设备键 -> AdbShellSession
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(serial=None):
+    """
+    获取指定设备的常驻会话, 不存在时创建
+    :param serial: 设备序列号
+    """
+    key = resolve_serial(serial)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = AdbShellSession(serial)
+            _sessions[key] = session
+        return session
+
+
+def session_stats():
+    """返回所有会话的统计信息"""
+    with _sessions_lock:
+        return [session.stats() for session in _sessions.values()]
+
+
+@atexit.register
+def close_all_sessions():
+    """关闭会话池中的全部会话"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
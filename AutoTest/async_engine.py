@@ -0,0 +1,403 @@
+"""
+音乐App自动化测试 - asyncio验证引擎
+设备读取以协程方式执行(asyncio子进程或直接连接adb server的socket), 每台设备一个信号量限制同时执行的命令数,
+一个事件循环即可同时等待大量设备、大量任务的验证结果; 协程被取消时对应的adb进程或连接随之结束
+
+快照模式下先异步拉取快照, 再在协程内对快照执行task_XX验证函数(纯计算, 不阻塞);
+逐个文件读取模式下注册表任务在协程内异步读取状态文件并执行编译好的判断条件, 不在注册表中的验证函数
+放到线程池中执行, 同样受设备信号量限制
+
+用法:
+  python async_engine.py                                   # 对默认设备运行全部测试用例
+  python async_engine.py --devices=emulator-5554,emulator-5556
+  python async_engine.py --live                            # 关闭快照模式
+"""
+
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import weakref
+from datetime import datetime
+
+from metrics import collect_timings, new_timings, record, rounded, summarize, timed
+from snapshot_cache import MISSING_FILE, SnapshotCache, resolve_serial
+from transport import (AUTOTEST_DIR, AUTOTEST_FILES, READ_CHUNK_SIZE, MAX_OUTPUT_BYTES,
+                       AdbTransport, OutputTooLarge, adb_command, apply_transport_options,
+                       batch_read_command, device_shell, get_adb_backend,
+                       get_transport, gunzip_output, list_devices, parse_marked_output,
+                       run_as_command, use_transport)
+from task_registry import get_task, is_supported
+from verification_functions import (check_task_data, decode_snapshot, decode_state_file,
+                                    get_active_cache, get_active_snapshot, lookup_cache,
+                                    task_function, use_cache, use_pre_state, use_snapshot)
+from run_all_tests import TEST_CASES, run_single_test, save_test_report
+
+# 每台设备同时执行的设备命令数上限
+DEFAULT_DEVICE_CONCURRENCY = 4
+
+
+async def _read_stream(reader, max_bytes=None):
+    """按块读取asyncio流直到结束, 超过上限时抛出OutputTooLarge"""
+    limit = max_bytes or MAX_OUTPUT_BYTES
+    buffer = bytearray()
+    while True:
+        chunk = await reader.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return bytes(buffer)
+        if len(buffer) + len(chunk) > limit:
+            raise OutputTooLarge(f"输出超过{limit}字节")
+        buffer += chunk
+
+
+async def _exec_out_subprocess(command, serial, max_bytes):
+    """通过asyncio子进程执行adb exec-out, 协程被取消或出错时结束adb进程"""
+    # 在独立进程组中启动, 结束时连同adb派生的子进程一起结束, 否则残留进程会占住管道
+    process = await asyncio.create_subprocess_exec(*adb_command(serial), 'exec-out', command,
+                                                   stdout=subprocess.PIPE,
+                                                   stderr=subprocess.DEVNULL,
+                                                   start_new_session=hasattr(os, 'killpg'))
+    try:
+        output = await _read_stream(process.stdout, max_bytes)
+        return await process.wait(), output
+    finally:
+        if process.returncode is None:
+            if hasattr(os, 'killpg'):
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            else:
+                process.kill()
+            await process.wait()
+
+
+async def _send_service(reader, writer, service):
+    """按adb协议发送一个请求并确认OKAY"""
+    from adb_protocol import AdbProtocolError, ConnectionClosed, encode_request
+    writer.write(encode_request(service))
+    await writer.drain()
+    try:
+        status = await reader.readexactly(4)
+        if status == b'OKAY':
+            return
+        if status == b'FAIL':
+            length = int(await reader.readexactly(4), 16)
+            message = await reader.readexactly(length)
+            raise AdbProtocolError(message.decode('utf-8', 'replace'))
+    except asyncio.IncompleteReadError:
+        raise ConnectionClosed("adb server提前关闭了连接")
+    raise AdbProtocolError(f"无法识别的响应: {status!r}")
+
+
+async def _exec_out_socket(command, serial, max_bytes):
+    """直接连接adb server, 通过exec:服务执行命令"""
+    from adb_protocol import DEFAULT_HOST, server_port, split_returncode, wrap_exec_command
+    reader, writer = await asyncio.open_connection(DEFAULT_HOST, server_port())
+    try:
+        await _send_service(reader, writer,
+                            f"host:transport:{serial}" if serial else "host:transport-any")
+        await _send_service(reader, writer, f"exec:{wrap_exec_command(command)}")
+        return split_returncode(await _read_stream(reader, max_bytes))
+    finally:
+        writer.close()
+
+
+class AsyncEngine:
+    """
+    asyncio验证引擎
+
+    同一台设备上的设备命令共用一个信号量, 不同设备之间互不限制。
+    信号量按事件循环分别创建, 同一个引擎可以在多次asyncio.run之间复用。
+    """
+
+    def __init__(self, device_concurrency=DEFAULT_DEVICE_CONCURRENCY, timeout=10):
+        """
+        :param device_concurrency: 每台设备同时执行的设备命令数上限
+        :param timeout: 单条设备命令的默认超时时间(秒)
+        """
+        self.device_concurrency = device_concurrency
+        self.timeout = timeout
+        self._semaphores = weakref.WeakKeyDictionary()  # 事件循环 -> {设备键: Semaphore}
+        self.snapshot_timings = {}  # 设备键 -> 最近一次run_tests拉取快照的计时
+
+    def semaphore(self, key):
+        """
+        返回指定设备在当前事件循环中的信号量
+        :param key: 设备键(Transport.key)
+        """
+        loop = asyncio.get_running_loop()
+        semaphores = self._semaphores.setdefault(loop, {})
+        if key not in semaphores:
+            semaphores[key] = asyncio.Semaphore(self.device_concurrency)
+        return semaphores[key]
+
+    async def shell(self, command, serial=None, timeout=None, max_bytes=None):
+        """
+        异步执行一条设备端shell命令
+        :param command: 设备端shell命令字符串
+        :param serial: 设备序列号
+        :param timeout: 超时时间(秒), 默认使用引擎的timeout
+        :param max_bytes: 输出上限(字节), 默认MAX_OUTPUT_BYTES
+        :return: (退出码, 标准输出字节)
+        """
+        timeout = timeout or self.timeout
+        async with self.semaphore(resolve_serial(serial)):
+            backend = get_adb_backend()
+            if backend == 'session':
+                # 常驻会话本身是串行的, 放到线程中等待
+                return await asyncio.to_thread(device_shell, command, serial, timeout, max_bytes)
+            if backend == 'socket':
+                execute = _exec_out_socket(command, serial, max_bytes)
+            else:
+                execute = _exec_out_subprocess(command, serial, max_bytes)
+            try:
+                return await asyncio.wait_for(execute, timeout)
+            except asyncio.TimeoutError:
+                raise subprocess.TimeoutExpired(command, timeout)
+
+    async def read_files(self, names, transport=None):
+        """
+        异步读取多个状态文件
+        :param transport: 数据源, 默认为当前生效的Transport
+        :return: {文件名: 文件内容字节或None}
+        """
+        transport = transport or get_transport()
+        if not isinstance(transport, AdbTransport):
+            async with self.semaphore(transport.key):
+                return await asyncio.to_thread(transport.read_files, names)
+        returncode, output = await self.shell(batch_read_command(names), transport.serial,
+                                              timeout=max(self.timeout, 30))
+        if returncode != 0:
+            raise IOError(f"批量读取失败, 退出码: {returncode}")
+        return parse_marked_output(gunzip_output(output), names)
+
+    async def read_file(self, name, transport=None):
+        """
+        异步读取一个状态文件
+        :return: 文件内容字节, 文件不存在时返回None
+        """
+        transport = transport or get_transport()
+        if not isinstance(transport, AdbTransport):
+            async with self.semaphore(transport.key):
+                return await asyncio.to_thread(transport.read_file, name)
+        returncode, output = await self.shell(run_as_command(f"cat {AUTOTEST_DIR}/{name}"),
+                                              transport.serial)
+        return output if returncode == 0 else None
+
+    async def read_json(self, file_path, serial=None):
+        """
+        read_json_from_device的异步版本, 同样优先使用当前上下文中的快照和快照缓存
+        :param file_path: 设备上的文件路径(相对于app私有目录)
+        :param serial: 设备序列号, 未设置Transport时用于选择设备
+        :return: JSON数据或None
+        """
+        name = os.path.basename(file_path)
+        snapshot = get_active_snapshot()
+        if snapshot is not None and file_path.startswith('autotest/'):
+            if name in snapshot:
+                data = snapshot[name]
+                if data is None:
+                    print(f"读取文件失败: {file_path}, 错误: 快照中不存在该文件")
+                return data
+
+        transport = get_transport(serial)
+        cache = get_active_cache()
+        version = None
+        if cache is not None:
+            # 版本查询(stat_files)是同步调用, 放到线程中执行
+            data, version = await asyncio.to_thread(lookup_cache, cache, transport, name)
+            if data is MISSING_FILE:
+                print(f"读取文件失败: {file_path}, 错误: {transport.describe()}中不存在该文件")
+                return None
+            if data is not None:
+                return data
+
+        try:
+            with timed('transport_ms'):
+                content = await self.read_file(name, transport)
+            if content is None:
+                if cache is not None:
+                    cache.put(transport.key, name, MISSING_FILE, MISSING_FILE)
+                raise FileNotFoundError(f"{transport.describe()}中不存在该文件")
+            record('bytes', len(content))
+            with timed('decode_ms'):
+                data = decode_state_file(content)
+            if cache is not None:
+                cache.put(transport.key, name, data, version)
+            return data
+        except Exception as e:
+            print(f"读取文件失败: {file_path}, 错误: {e}")
+            return None
+
+    async def check_task(self, task_id, *args, **kwargs):
+        """
+        verification_functions.check_task的异步版本: 异步读取任务的状态文件, 判断逻辑(包括change条件)
+        与同步验证共用check_task_data
+        :param task_id: 任务编号
+        :param args: 任务参数
+        :return: 是否通过, 文件不存在或格式错误时返回False
+        """
+        data = await self.read_json('autotest/' + get_task(task_id)['file'])
+        return check_task_data(task_id, data, *args, **kwargs)
+
+    async def pull_snapshot(self, files=None, transport=None):
+        """
+        pull_autotest_snapshot的异步版本
+        :return: {文件名: JSON数据或None}, 读取失败时返回None
+        """
+        files = files or AUTOTEST_FILES
+        try:
+            with timed('transport_ms'):
+                contents = await self.read_files(files, transport)
+        except Exception as e:
+            print(f"拉取快照失败, 错误: {e}")
+            return None
+        record('bytes', sum(len(content) for content in contents.values() if content))
+        with timed('decode_ms'):
+            return decode_snapshot(contents, files)
+
+    async def run_check(self, task_id, task_name, func, args, difficulty,
+                        snapshot=None, cache=None, pre_state=None):
+        """
+        异步运行单个测试用例
+        :param snapshot: 已拉取的快照, 提供时直接在协程内对快照执行判断
+        :param cache: SnapshotCache实例, 逐个文件读取时使用
+        :param pre_state: 任务开始前的状态, 指定时同时检查任务的change条件
+        :return: 与run_all_tests相同的结果字典
+        """
+        timings = new_timings()
+        if snapshot is not None:
+            with use_snapshot(snapshot):
+                outcome = run_single_test(task_id, task_name, func, args, difficulty, cache,
+                                          timings, pre_state)
+        elif is_supported(task_id) and func is task_function(task_id):
+            # 注册表任务: 在协程内异步读取, 设备命令由shell/read_file受信号量限制, 不占用线程
+            try:
+                with use_cache(cache), collect_timings(timings), use_pre_state(pre_state):
+                    result = await self.check_task(task_id, *args)
+                outcome = (task_id, task_name, result, None, difficulty)
+            except Exception as e:
+                outcome = (task_id, task_name, False, str(e), difficulty)
+        else:
+            # 不在注册表中的验证函数内部是同步读取, 放到线程中执行(to_thread会带上当前的Transport上下文)
+            async with self.semaphore(get_transport().key):
+                outcome = await asyncio.to_thread(run_single_test, task_id, task_name,
+                                                  func, args, difficulty, cache, timings,
+                                                  pre_state)
+        _, _, result, error_msg, _ = outcome
+        return {
+            "task_id": task_id,
+            "task_name": task_name,
+            "result": result,
+            "error": error_msg,
+            "difficulty": difficulty,
+            "timings": rounded(timings)
+        }
+
+    async def run_tests(self, test_cases=None, serial=None, snapshot_mode=True, pre_state=None):
+        """
+        run_all_tests测试循环的异步版本, 所有测试用例并发执行
+        :param test_cases: TEST_CASES格式的测试用例, 默认为全部
+        :param serial: 设备序列号, 提供时在该设备的AdbTransport上运行
+        :param snapshot_mode: 为True时先异步拉取一次快照, 所有验证函数共用
+        :param pre_state: 任务开始前的状态, 指定时同时检查任务的change条件
+        :return: 结果字典列表, 顺序与test_cases相同
+        """
+        test_cases = TEST_CASES if test_cases is None else test_cases
+        transport = AdbTransport(serial) if serial else get_transport()
+        with use_transport(transport):
+            cache = SnapshotCache()
+            run_timings = new_timings()
+            self.snapshot_timings[transport.key] = run_timings
+            with collect_timings(run_timings):
+                snapshot = await self.pull_snapshot(transport=transport) if snapshot_mode else None
+            if snapshot_mode and snapshot is None:
+                print("快照拉取失败, 回退为逐个文件读取")
+            return list(await asyncio.gather(*(
+                self.run_check(*case, snapshot=snapshot, cache=cache, pre_state=pre_state)
+                for case in test_cases
+            )))
+
+    async def run_devices(self, serials, test_cases=None, snapshot_mode=True):
+        """
+        在多台设备上并发运行测试用例
+        :return: {序列号: 结果字典列表}
+        """
+        results = await asyncio.gather(*(
+            self.run_tests(test_cases, serial, snapshot_mode) for serial in serials
+        ))
+        return dict(zip(serials, results))
+
+
+# 模块级默认引擎
+_default_engine = AsyncEngine()
+
+
+async def async_read_json_from_device(file_path, serial=None):
+    """read_json_from_device的异步版本, 使用默认引擎"""
+    return await _default_engine.read_json(file_path, serial)
+
+
+async def async_run_all_tests(serials=None, test_cases=None, snapshot_mode=True):
+    """
+    异步运行测试用例, 使用默认引擎
+    :param serials: 设备序列号列表, 为None时使用当前Transport
+    :return: 结果字典列表, 多台设备时每条结果带serial字段
+    """
+    if not serials:
+        return await _default_engine.run_tests(test_cases, snapshot_mode=snapshot_mode)
+    results = []
+    for serial, device_results in (await _default_engine.run_devices(
+            serials, test_cases, snapshot_mode)).items():
+        for result in device_results:
+            result["serial"] = serial
+            results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    apply_transport_options(sys.argv[1:])
+    snapshot_mode = '--live' not in sys.argv
+    serials = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--devices='):
+            serials = [s for s in arg.split('=', 1)[1].split(',') if s]
+        elif arg == '--all-devices':
+            serials = [serial for serial, state in list_devices() if state == 'device']
+
+    print("=" * 70)
+    print("音乐App自动化测试 - asyncio验证引擎")
+    print("=" * 70)
+    print(f"开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"设备: {', '.join(serials) if serials else get_transport().describe()}")
+    print("=" * 70)
+
+    results = asyncio.run(async_run_all_tests(serials, snapshot_mode=snapshot_mode))
+    for r in results:
+        status = "✗ 错误" if r["error"] else ("✓ 通过" if r["result"] else "✗ 失败")
+        prefix = f"[{r['serial']}] " if "serial" in r else ""
+        print(f"{prefix}[任务{r['task_id']:02d}] {r['task_name']}... {status}")
+
+    errors = sum(1 for r in results if r["error"])
+    passed = sum(1 for r in results if r["result"] and not r["error"])
+    failed = len(results) - passed - errors
+    print("=" * 70)
+    print(f"总计: {len(results)} 个测试, 通过 {passed}, 失败 {failed}, 错误 {errors}")
+    snapshot_timings = new_timings()
+    for run_timings in _default_engine.snapshot_timings.values():
+        for name, value in run_timings.items():
+            snapshot_timings[name] += value
+    timing = summarize(results, snapshot_timings)
+    print(f"设备耗时: {timing['device_ms']:.1f}ms (读取 {timing['bytes_read']} 字节, "
+          f"重试 {timing['retries']} 次)")
+    print("=" * 70)
+    save_test_report(results, passed, failed, errors, extra={"timing": timing})
+
+    if errors > 0:
+        sys.exit(2)
+    elif failed > 0:
+        sys.exit(1)
+    else:
+        sys.exit(0)
@@ -0,0 +1,200 @@
+"""
+音乐App自动化测试 - 基线状态写入
+每个episode开始前把files/autotest重置为指定的基线状态: 基线由assets/autotest中的模板派生(如"播放中"、
+"已暂停"、"歌单中有2首歌"), 打包成一个tar, 通过一次adb exec-in推送并在run-as下解包, 不需要确认提示,
+也不逐个文件执行rm/写入
+
+用法:
+  python baseline_seed.py list                       # 列出可用的基线
+  python baseline_seed.py playing                    # 写入"播放中"基线(任务5的前置状态)
+  python baseline_seed.py empty --force-stop         # 清空状态文件, 写入前先结束App进程
+  python baseline_seed.py paused --serial=emulator-5554
+  python baseline_seed.py playlist --output=playlist.tar   # 只生成tar文件, 不推送
+  python baseline_seed.py template --transport=dir:<目录>   # 写入本地快照目录
+"""
+
+import copy
+import io
+import json
+import os
+import shlex
+import sys
+import tarfile
+import time
+
+from generate_fixtures import ASSETS_DIR, write_value
+from transport import (APP_PACKAGE, AUTOTEST_DIR, AUTOTEST_FILES, AdbTransport,
+                       DirectoryTransport, apply_transport_options, device_exec_in, get_transport)
+
+TEMPLATE_DIR = os.path.join(ASSETS_DIR, 'autotest')
+# 解包成功后设备端输出的标记
+SEED_OK_MARKER = "@@AUTOTEST_SEED_OK@@"
+
+
+def _set_playing(playing):
+    def apply(files):
+        files['playback_state.json']['isPlaying'] = playing
+    return apply
+
+
+def _playlist_with_songs(files):
+    # 任务21(删除歌单中的第一首歌)的默认参数为("user_playlist_001", 1): 歌单中有2首歌, 删除后还剩1首
+    playlist = files['user_playlists.json']['playlists'][0]
+    playlist['playlistId'] = 'user_playlist_001'
+    playlist['songIds'] = ['song_001', 'song_002']
+    playlist['songCount'] = 2
+
+
+def _empty(files):
+    files.clear()
+
+
+# 基线名称 -> (说明, 在模板上所做的修改)
+BASELINES = {
+    "template": ("assets/autotest中的模板, 不做修改", None),
+    "empty": ("没有状态文件, App下次启动时按模板重新创建", _empty),
+    "playing": ("模板 + 当前歌曲正在播放(任务5的前置状态)", _set_playing(True)),
+    "paused": ("模板 + 当前歌曲已暂停(任务4的前置状态)", _set_playing(False)),
+    "playlist": ("模板 + 歌单user_playlist_001中有2首歌(任务21的前置状态)", _playlist_with_songs),
+}
+
+
+def load_templates():
+    """读取assets/autotest中的全部模板, 返回{文件名: JSON数据}"""
+    templates = {}
+    for name in AUTOTEST_FILES:
+        with open(os.path.join(TEMPLATE_DIR, name), encoding='utf-8') as f:
+            templates[name] = json.load(f)
+    return templates
+
+
+def build_baseline(name):
+    """
+    生成基线的状态文件内容
+    :param name: BASELINES中的基线名称
+    :return: {文件名: 文件内容字节}, 格式与AutoTestHelper写出的Gson格式相同
+    :raises KeyError: 基线不存在
+    """
+    _, apply = BASELINES[name]
+    files = copy.deepcopy(load_templates())
+    if apply:
+        apply(files)
+    contents = {}
+    for file_name, document in files.items():
+        parts = []
+        write_value(parts.append, document)
+        contents[file_name] = ''.join(parts).encode('utf-8')
+    return contents
+
+
+def pack_baseline(contents):
+    """
+    把状态文件打包为tar(不压缩, 设备端的toybox tar即可解包)
+    :param contents: {文件名: 文件内容字节}
+    :return: tar字节
+    """
+    buffer = io.BytesIO()
+    now = time.time()
+    with tarfile.open(fileobj=buffer, mode='w', format=tarfile.USTAR_FORMAT) as tar:
+        for name, content in contents.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.mtime = now
+            info.mode = 0o600
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def seed_command(force_stop=False):
+    """
+    构造设备端命令: (可选)结束App进程, 清空autotest目录后从标准输入解包tar
+    am force-stop需要shell身份, 放在run-as之前执行
+    """
+    unpack = (f"rm -rf {AUTOTEST_DIR} && mkdir -p {AUTOTEST_DIR} && "
+              f"tar -xf - -C {AUTOTEST_DIR} && echo {SEED_OK_MARKER}")
+    command = f"run-as {APP_PACKAGE} sh -c {shlex.quote(unpack)}"
+    if force_stop:
+        command = f"am force-stop {APP_PACKAGE}; {command}"
+    return command
+
+
+def seed_device(archive, serial=None, force_stop=False):
+    """
+    一次exec-in把tar推送到设备并解包到files/autotest
+    :param archive: pack_baseline返回的tar字节
+    :return: 是否成功
+    """
+    _, output = device_exec_in(seed_command(force_stop), archive, serial)
+    return SEED_OK_MARKER.encode('ascii') in output
+
+
+def seed_directory(root, contents):
+    """把基线写入本地快照目录: 删除全部状态文件后写入基线中的文件"""
+    transport = DirectoryTransport(root)
+    os.makedirs(transport.root, exist_ok=True)
+    transport.remove_files(AUTOTEST_FILES)
+    for name, content in contents.items():
+        with open(os.path.join(transport.root, name), 'wb') as f:
+            f.write(content)
+    return True
+
+
+def seed(name, transport=None, force_stop=False):
+    """
+    把当前数据源重置为指定基线
+    :param name: 基线名称
+    :param transport: 数据源, 默认为当前生效的Transport; 支持adb和本地目录
+    :param force_stop: 写入前结束App进程, 避免App用内存中的状态覆盖刚写入的文件(仅adb)
+    :return: 是否成功
+    """
+    transport = transport or get_transport()
+    contents = build_baseline(name)
+    if isinstance(transport, DirectoryTransport):
+        return seed_directory(transport.root, contents)
+    if isinstance(transport, AdbTransport):
+        return seed_device(pack_baseline(contents), transport.serial, force_stop)
+    raise ValueError(f"不支持写入该数据源: {transport.describe()}")
+
+
+if __name__ == "__main__":
+    # --serial=<序列号>: 指定设备; --transport=dir:<目录>: 写入本地快照目录
+    # --force-stop: 写入前结束App进程; --output=<文件>: 只生成tar文件
+    apply_transport_options(sys.argv[1:])
+    serial = None
+    output = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--serial='):
+            serial = arg.split('=', 1)[1]
+        elif arg.startswith('--output='):
+            output = arg.split('=', 1)[1]
+    argv = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    name = argv[0] if argv else None
+
+    if name == "list":
+        for baseline, (description, _) in BASELINES.items():
+            print(f"  {baseline:<10} {description}")
+        sys.exit(0)
+    if name not in BASELINES:
+        print(f"用法: python baseline_seed.py <{'|'.join(BASELINES)}|list> "
+              "[--force-stop] [--serial=<序列号>] [--transport=<spec>] [--output=<tar文件>]")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    if output:
+        contents = build_baseline(name)
+        with open(output, 'wb') as f:
+            f.write(pack_baseline(contents))
+        print(f"✓ 基线'{name}'已打包到 {output} ({len(contents)} 个文件)")
+        sys.exit(0)
+
+    transport = AdbTransport(serial) if serial else get_transport()
+    try:
+        ok = seed(name, transport, '--force-stop' in sys.argv)
+    except Exception as e:
+        print(f"✗ 写入基线'{name}'时出错: {e}")
+        sys.exit(1)
+    if not ok:
+        print(f"✗ 写入基线'{name}'失败: {transport.describe()}")
+        sys.exit(1)
+    print(f"✓ 已写入基线'{name}' → {transport.describe()} "
+          f"({(time.perf_counter() - start) * 1000:.0f}ms)")
@@ -0,0 +1,323 @@
+"""
+音乐App自动化测试 - 离线批量评估
+对归档的episode快照目录(每个episode结束后复制的files/autotest)批量执行任务验证, 不需要连接设备。
+每个episode按读取计划只读取一次所需的状态文件, 在该快照上运行task_XX验证函数;
+episode分批交给进程池并行评估, 结果按episode顺序边评估边写入CSV或JSONL文件
+
+任务清单(--manifest)为JSON数组或JSONL文件, 每项指定要在哪些episode上验证哪个任务:
+  {"episode": "ep_00017", "task_id": 8, "args": ["song_003"]}
+  {"episode": "ep_1*", "task_id": 13, "params": {"search_query": "烟雨"}}
+  {"task_id": 1}
+episode为目录名或路径, 可以使用通配符, 省略时对所有episode生效; args/params按task_registry.TASKS中
+任务的params绑定, 省略时使用注册表中的默认参数
+
+episode也可以从快照归档(snapshot_archive)中直接读取, 不解包到磁盘, 此时通配符匹配归档中的episode名称
+
+用法:
+  python batch_evaluate.py "episodes/*" --manifest=manifest.json --output=scores.csv
+  python batch_evaluate.py "episodes/*" --tasks=1-10 --output=scores.jsonl --workers=8
+  python batch_evaluate.py --archive=archive/ "ep_1*" --manifest=manifest.json
+"""
+
+import csv
+import fnmatch
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from planner import build_plan
+from results_store import new_run_id
+from run_single_test import parse_task_numbers
+from snapshot_archive import ArchiveTransport, open_archive
+from task_registry import TASKS_BY_ID, is_supported
+from transport import DirectoryTransport
+from verification_functions import decode_state_file, task_function, use_snapshot
+
+# 每个进程一次评估的episode数
+BATCH_SIZE = 64
+
+CSV_FIELDS = ["episode", "task_id", "task_name", "difficulty", "args", "params", "result", "error"]
+
+
+def load_manifest(path):
+    """
+    读取任务清单
+    :param path: JSON数组或JSONL文件
+    :return: [{"episode": 模式或None, "task_id": 编号, "args": [...], "params": {...}}]
+    :raises ValueError: 清单格式错误或任务不存在
+    """
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    stripped = text.lstrip()
+    if stripped.startswith('['):
+        entries = json.loads(text)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    manifest = []
+    for number, entry in enumerate(entries, 1):
+        task_id = entry.get("task_id")
+        if task_id not in TASKS_BY_ID:
+            raise ValueError(f"任务清单第{number}项: 任务不存在: {task_id}")
+        manifest.append({"episode": entry.get("episode"), "task_id": task_id,
+                         "args": list(entry.get("args") or []),
+                         "params": dict(entry.get("params") or {})})
+    return manifest
+
+
+def tasks_manifest(task_ids):
+    """按任务编号生成使用默认参数、对所有episode生效的清单"""
+    return [{"episode": None, "task_id": task_id, "args": list(TASKS_BY_ID[task_id]["args"]),
+             "params": {}} for task_id in task_ids if task_id in TASKS_BY_ID]
+
+
+class ManifestIndex:
+    """
+    按episode查找清单中的检查项: 精确的目录名用dict查找, 通配符逐个匹配, 省略episode的项对所有episode生效
+    """
+
+    def __init__(self, manifest):
+        self.exact = {}
+        self.patterns = []
+        self.common = []
+        for entry in manifest:
+            check = (entry["task_id"], entry["args"], entry["params"])
+            pattern = entry["episode"]
+            if pattern is None:
+                self.common.append(check)
+            elif glob.has_magic(pattern):
+                self.patterns.append((pattern, check))
+            else:
+                self.exact.setdefault(os.path.normpath(pattern), []).append(check)
+
+    def checks_for(self, episode):
+        """:return: [(任务编号, args, params)], 顺序同清单"""
+        name = os.path.basename(os.path.normpath(episode))
+        path = os.path.normpath(episode)
+        checks = list(self.common)
+        checks.extend(self.exact.get(name, []))
+        if path != name:
+            checks.extend(self.exact.get(path, []))
+        for pattern, check in self.patterns:
+            if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path, pattern):
+                checks.append(check)
+        return checks
+
+
+def evaluate_episode(episode, checks, archive=None):
+    """
+    在一个episode快照上执行检查
+    :param episode: episode目录(直接存放状态文件, 或包含files/autotest/); 指定archive时为归档中的episode名称
+    :param checks: [(任务编号, args, params)]
+    :param archive: 快照归档目录
+    :return: 结果行列表
+    """
+    plan = build_plan(sorted({task_id for task_id, _, _ in checks}))
+    snapshot = {}
+    errors = {}
+    try:
+        transport = ArchiveTransport(archive, episode) if archive else DirectoryTransport(episode)
+        contents = {name: transport.read_file(name) for name in plan["files"]}
+    except Exception as e:
+        # 归档中没有该episode或数据损坏时, 只把该episode的检查项记为错误, 不中断整批评估
+        contents = {}
+        errors = {name: f"无法读取episode: {e}" for name in plan["files"]}
+    for name, content in contents.items():
+        snapshot[name] = None
+        if content is None:
+            errors[name] = f"状态文件不存在: {name}"
+            continue
+        try:
+            snapshot[name] = decode_state_file(content)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            errors[name] = f"状态文件格式错误: {name}: {e}"
+
+    rows = []
+    with use_snapshot(snapshot):
+        for task_id, args, params in checks:
+            task = TASKS_BY_ID[task_id]
+            row = {"episode": episode, "task_id": task_id, "task_name": task["name"],
+                   "difficulty": task["difficulty"], "args": args, "params": params,
+                   "result": False, "error": None}
+            if not is_supported(task_id):
+                row["error"] = f"任务{task_id}不支持自动化验证"
+            elif task["file"] in errors:
+                row["error"] = errors[task["file"]]
+            else:
+                try:
+                    row["result"] = bool(task_function(task_id)(*args, **params))
+                except Exception as e:
+                    row["error"] = str(e)
+            rows.append(row)
+    return rows
+
+
+def evaluate_batch(batch):
+    """进程池中执行: 评估一批episode, batch为(归档目录或None, [(episode, checks)])"""
+    archive, episodes = batch
+    rows = []
+    for episode, checks in episodes:
+        rows.extend(evaluate_episode(episode, checks, archive))
+    return rows
+
+
+def find_episodes(patterns, archive=None):
+    """
+    展开episode的通配符, 按路径排序去重
+    :param archive: 指定时在归档的episode名称中匹配(不指定通配符时为全部episode), 否则匹配目录
+    """
+    if archive:
+        names = open_archive(archive).episodes()
+        return sorted(name for name in names
+                      if not patterns or any(fnmatch.fnmatch(name, p) for p in patterns))
+    episodes = set()
+    for pattern in patterns:
+        episodes.update(path for path in glob.glob(pattern) if os.path.isdir(path))
+    return sorted(episodes)
+
+
+def _batches(episodes, index, batch_size, archive=None):
+    batch = []
+    for episode in episodes:
+        checks = index.checks_for(episode)
+        if not checks:
+            continue
+        batch.append((episode, checks))
+        if len(batch) >= batch_size:
+            yield archive, batch
+            batch = []
+    if batch:
+        yield archive, batch
+
+
+class ResultWriter:
+    """
+    结果写入器: .csv写CSV(args和params为JSON字符串), 其他扩展名写JSONL。
+    JSONL每行的格式与results_store的result记录相同, 可以直接用results_store.py汇总或导入results_db
+    """
+
+    def __init__(self, path, run_id=None):
+        self.path = path
+        self.run_id = run_id or new_run_id()
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.csv = csv.writer(self.file) if path.endswith('.csv') else None
+        if self.csv:
+            self.csv.writerow(CSV_FIELDS)
+        else:
+            self._write_record({"type": "run_start", "run": self.run_id,
+                                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                                "source": "batch_evaluate"})
+
+    def _write_record(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def write(self, row):
+        if self.csv:
+            self.csv.writerow([json.dumps(row[field], ensure_ascii=False, separators=(',', ':'))
+                               if field in ("args", "params") else row[field] for field in CSV_FIELDS])
+        else:
+            self._write_record({"type": "result", "run": self.run_id, **row})
+
+    def close(self, **run_info):
+        """
+        关闭结果文件, JSONL最后写入run_end记录
+        :param run_info: 写入run_end记录的统计信息
+        """
+        if not self.csv:
+            self._write_record({"type": "run_end", "run": self.run_id,
+                                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                                **run_info})
+        self.file.close()
+
+
+def run_batch(episodes, manifest, output, workers=None, batch_size=BATCH_SIZE, archive=None):
+    """
+    批量评估episode并写入结果文件
+    :param episodes: episode目录列表
+    :param manifest: load_manifest/tasks_manifest返回的清单
+    :param output: 结果文件(.csv或.jsonl)
+    :param workers: 进程数, 默认为CPU核数; 为1时在当前进程中评估
+    :param archive: 从该快照归档读取episode
+    :return: {"episodes", "checks", "passed", "failed", "errors", "elapsed"}
+    """
+    index = ManifestIndex(manifest)
+    batches = _batches(episodes, index, batch_size, archive)
+    stats = {"episodes": 0, "checks": 0, "passed": 0, "failed": 0, "errors": 0}
+    start = time.perf_counter()
+    writer = ResultWriter(output)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    try:
+        results = executor.map(evaluate_batch, batches) if executor else map(evaluate_batch, batches)
+        seen = None
+        for rows in results:
+            for row in rows:
+                writer.write(row)
+                if row["episode"] != seen:
+                    seen = row["episode"]
+                    stats["episodes"] += 1
+                stats["checks"] += 1
+                if row["error"]:
+                    stats["errors"] += 1
+                elif row["result"]:
+                    stats["passed"] += 1
+                else:
+                    stats["failed"] += 1
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        stats["elapsed"] = round(time.perf_counter() - start, 3)
+        writer.close(**stats)
+    return stats
+
+if __name__ == "__main__":
+    manifest_path = None
+    task_ids = None
+    output = f"batch_results_{new_run_id()}.csv"
+    workers = None
+    batch_size = BATCH_SIZE
+    archive = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--manifest='):
+            manifest_path = arg.split('=', 1)[1]
+        elif arg.startswith('--tasks='):
+            task_ids = parse_task_numbers(arg.split('=', 1)[1].split(','))
+        elif arg.startswith('--output='):
+            output = arg.split('=', 1)[1]
+        elif arg.startswith('--workers='):
+            workers = int(arg.split('=', 1)[1])
+        elif arg.startswith('--batch-size='):
+            batch_size = int(arg.split('=', 1)[1])
+        elif arg.startswith('--archive='):
+            archive = arg.split('=', 1)[1]
+    patterns = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if (not patterns and not archive) or (manifest_path is None and task_ids is None):
+        print("用法: python batch_evaluate.py <episode目录通配符>... (--manifest=<清单> | --tasks=1-10) "
+              "[--output=<结果.csv|结果.jsonl>] [--workers=<进程数>] [--archive=<归档目录>]")
+        sys.exit(1)
+
+    try:
+        manifest = load_manifest(manifest_path) if manifest_path else tasks_manifest(task_ids)
+    except (OSError, ValueError) as e:
+        print(f"✗ 无法读取任务清单: {e}")
+        sys.exit(1)
+    try:
+        episodes = find_episodes(patterns, archive)
+    except FileNotFoundError:
+        print(f"✗ 归档不存在: {archive}")
+        sys.exit(1)
+    if not episodes:
+        print(f"✗ 没有匹配的episode: {' '.join(patterns)}")
+        sys.exit(1)
+
+    print(f"评估 {len(episodes)} 个episode, 清单 {len(manifest)} 项, "
+          f"进程数 {workers or os.cpu_count()}")
+    stats = run_batch(episodes, manifest, output, workers, batch_size, archive)
+    rate = stats["episodes"] / stats["elapsed"] * 60 if stats["elapsed"] else 0
+    print(f"✓ 已评估 {stats['episodes']} 个episode, {stats['checks']} 项检查: "
+          f"通过 {stats['passed']}, 失败 {stats['failed']}, 错误 {stats['errors']}")
+    print(f"耗时 {stats['elapsed']:.1f}s ({rate:.0f} 个episode/分钟)")
+    print(f"结果已保存到: {output}")
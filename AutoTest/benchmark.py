@@ -0,0 +1,263 @@
+"""
+音乐App自动化测试 - 验证流程基准测试
+对每个task_XX验证分别计时读取(fetch)、解码(decode)和判断(predicate)三个阶段,
+在从small到huge的不同规模状态文件(generate_fixtures生成)上运行, 结果写入JSON文件并与保存的基线比较,
+任一阶段超过基线的(1 + 阈值)倍时判为退化。不同规模之间的增长指数(scaling)可以发现O(n)变成O(n²)的检查
+
+用法:
+  python benchmark.py                               # 运行全部规模, 与benchmark_baseline.json比较
+  python benchmark.py --sizes=small,medium --repeat=3
+  python benchmark.py --save-baseline               # 把本次结果保存为基线
+  python benchmark.py --threshold=0.5               # 退化阈值(默认0.25, 即慢25%)
+  python benchmark.py --transport=adb:emulator-5554 # 测量指定数据源(如fake adb), 不生成状态文件
+"""
+
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import verification_functions
+from generate_fixtures import DEFAULT_COUNTS, generate
+from task_registry import PREDICATES, bind_params, supported_tasks
+from transport import AUTOTEST_FILES, DirectoryTransport, apply_transport_options, get_transport
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 状态文件规模: 名称 -> generate_fixtures的缩放倍数(相对于DEFAULT_COUNTS)
+SIZES = {
+    "small": 0.001,
+    "medium": 0.01,
+    "large": 0.1,
+    "huge": 1.0,
+}
+
+# 生成的状态文件存放目录, 每个规模一个子目录, 已存在时直接复用
+FIXTURES_DIR = os.path.join(BENCHMARK_DIR, 'benchmark_fixtures')
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, 'benchmark_baseline.json')
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25
+# 低于该耗时(秒)的差异视为计时噪声, 不判为退化
+NOISE_FLOOR = 0.0005
+# 增长指数超过该值(相对文件大小)时提示可能是超线性的检查
+SUPERLINEAR_EXPONENT = 1.5
+
+STAGES = ("fetch", "decode", "predicate")
+
+
+def prepare_fixtures(size, seed=0, regenerate=False):
+    """
+    准备指定规模的状态文件目录
+    :param size: SIZES中的规模名称
+    :param regenerate: 为True时重新生成
+    :return: 目录路径
+    """
+    path = os.path.join(FIXTURES_DIR, size)
+    complete = all(os.path.exists(os.path.join(path, name)) for name in AUTOTEST_FILES)
+    if regenerate or not complete:
+        scale = SIZES[size]
+        counts = {key: max(1, int(count * scale)) for key, count in DEFAULT_COUNTS.items()
+                  if key != 'playlist_size'}
+        print(f"生成{size}规模状态文件: {path}")
+        generate(path, counts, seed)
+    return path
+
+
+def _time(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def measure_task(transport, task, repeat):
+    """
+    分阶段测量一个任务的验证
+    每次重复都重新读取和解码, 按需解码(LazyDocument)推迟到判断阶段的字段解析计入predicate
+    :return: {"file", "bytes", "fetch", "decode", "predicate", "result"}, 各阶段为最小耗时(秒)
+    """
+    params = bind_params(task, task["args"])
+    predicate = PREDICATES[task["id"]]
+    timings = {stage: [] for stage in STAGES}
+    content = None
+    result = None
+    for _ in range(repeat):
+        elapsed, content = _time(transport.read_file, task["file"])
+        timings["fetch"].append(elapsed)
+        if content is None:
+            break
+        elapsed, data = _time(verification_functions.decode_state_file, content)
+        timings["decode"].append(elapsed)
+        elapsed, result = _time(predicate, data, params)
+        timings["predicate"].append(elapsed)
+
+    measurement = {"file": task["file"], "bytes": len(content) if content else 0,
+                   "result": bool(result)}
+    for stage, samples in timings.items():
+        measurement[stage] = min(samples) if samples else None
+        measurement[f"{stage}_median"] = statistics.median(samples) if samples else None
+    return measurement
+
+
+def run_benchmark(sources, repeat=DEFAULT_REPEAT):
+    """
+    在每个数据源上测量全部支持自动化验证的任务
+    :param sources: [(规模名称, Transport)]
+    :return: 基准测试结果dict
+    """
+    results = {}
+    for size, transport in sources:
+        print(f"\n[{size}] {transport.describe()}")
+        tasks = {}
+        for task in supported_tasks():
+            measurement = measure_task(transport, task, repeat)
+            tasks[str(task["id"])] = measurement
+            if measurement["fetch"] is None or measurement["decode"] is None:
+                print(f"  任务{task['id']:02d}: ✗ 读取失败 ({task['file']})")
+                continue
+            print(f"  任务{task['id']:02d}: fetch {measurement['fetch'] * 1000:8.2f}ms  "
+                  f"decode {measurement['decode'] * 1000:8.2f}ms  "
+                  f"predicate {measurement['predicate'] * 1000:8.2f}ms  "
+                  f"({measurement['bytes']} 字节)")
+        results[size] = tasks
+
+    return {
+        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "partial_decode": verification_functions.PARTIAL_DECODE,
+        "sizes": results,
+        "scaling": scaling(results),
+    }
+
+
+def scaling(results):
+    """
+    计算各任务判断阶段耗时随文件大小的增长指数: log(耗时比) / log(大小比)
+    取最小和最大规模比较, 约等于1为线性, 约等于2为平方
+    :return: {任务ID: 增长指数}
+    """
+    sizes = [size for size in results if size != "custom"]
+    if len(sizes) < 2:
+        return {}
+    first, last = results[sizes[0]], results[sizes[-1]]
+    exponents = {}
+    for task_id, small in first.items():
+        large = last.get(task_id)
+        if not large or not small["predicate"] or not large["predicate"]:
+            continue
+        if large["bytes"] <= small["bytes"] * 2:
+            continue
+        exponents[task_id] = round(
+            math.log(large["predicate"] / small["predicate"]) /
+            math.log(large["bytes"] / small["bytes"]), 2)
+    return exponents
+
+
+def compare_with_baseline(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    与基线比较
+    :param threshold: 允许变慢的比例
+    :return: 退化列表[(规模, 任务ID, 阶段, 基线耗时, 本次耗时)]
+    """
+    regressions = []
+    for size, tasks in report["sizes"].items():
+        base_tasks = baseline.get("sizes", {}).get(size, {})
+        for task_id, measurement in tasks.items():
+            base = base_tasks.get(task_id)
+            if not base:
+                continue
+            for stage in STAGES:
+                old, new = base.get(stage), measurement.get(stage)
+                if old is None or new is None:
+                    continue
+                if new > old * (1 + threshold) and new - old > NOISE_FLOOR:
+                    regressions.append((size, task_id, stage, old, new))
+    return regressions
+
+
+def save_report(report, path=None):
+    """保存基准测试结果, 默认文件名为benchmark_<时间>.json"""
+    path = path or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_baseline(path=BASELINE_FILE):
+    """读取基线, 不存在时返回None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    sizes = list(SIZES)
+    repeat = DEFAULT_REPEAT
+    threshold = DEFAULT_THRESHOLD
+    seed = 0
+    output = None
+    baseline_path = BASELINE_FILE
+    for arg in sys.argv[1:]:
+        if arg.startswith('--sizes='):
+            sizes = [size for size in arg.split('=', 1)[1].split(',') if size]
+        elif arg.startswith('--repeat='):
+            repeat = int(arg.split('=', 1)[1])
+        elif arg.startswith('--threshold='):
+            threshold = float(arg.split('=', 1)[1])
+        elif arg.startswith('--seed='):
+            seed = int(arg.split('=', 1)[1])
+        elif arg.startswith('--output='):
+            output = arg.split('=', 1)[1]
+        elif arg.startswith('--baseline='):
+            baseline_path = arg.split('=', 1)[1]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        print(f"未知的规模: {', '.join(unknown)}, 可选: {', '.join(SIZES)}")
+        sys.exit(1)
+
+    apply_transport_options(sys.argv[1:])
+    if any(arg.startswith(('--transport=', '--backend=')) for arg in sys.argv[1:]):
+        # 指定了数据源时只测量该数据源
+        sources = [("custom", get_transport())]
+    else:
+        sources = [(size, DirectoryTransport(prepare_fixtures(size, seed, '--regenerate' in sys.argv)))
+                   for size in sizes]
+
+    report = run_benchmark(sources, repeat)
+    superlinear = {task_id: exponent for task_id, exponent in report["scaling"].items()
+                   if exponent > SUPERLINEAR_EXPONENT}
+    if superlinear:
+        print()
+        for task_id, exponent in superlinear.items():
+            print(f"⚠ 任务{int(task_id):02d}的判断耗时随文件大小超线性增长 (指数 {exponent})")
+
+    print(f"\n基准测试结果已保存到: {save_report(report, output)}")
+
+    if '--save-baseline' in sys.argv:
+        save_report(report, baseline_path)
+        print(f"✓ 已保存为基线: {baseline_path}")
+        sys.exit(0)
+
+    baseline = load_baseline(baseline_path)
+    if baseline is None:
+        print(f"未找到基线 {baseline_path}, 可用--save-baseline保存本次结果")
+        sys.exit(0)
+    common = set(report["sizes"]) & set(baseline.get("sizes", {}))
+    if not common:
+        print(f"基线 {baseline_path} 中没有本次测量的规模, 未比较")
+        sys.exit(0)
+    regressions = compare_with_baseline(report, baseline, threshold)
+    if not regressions:
+        print(f"✓ 与基线相比没有超过 {threshold * 100:.0f}% 的退化")
+        sys.exit(0)
+    print(f"✗ {len(regressions)} 项超过基线 {threshold * 100:.0f}%:")
+    for size, task_id, stage, old, new in regressions:
+        print(f"  [{size}] 任务{int(task_id):02d} {stage}: "
+              f"{old * 1000:.2f}ms → {new * 1000:.2f}ms (+{(new / old - 1) * 100:.0f}%)")
+    sys.exit(1)
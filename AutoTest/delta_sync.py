@@ -0,0 +1,129 @@
+"""
+音乐App自动化测试 - 增量同步
+每次同步先用一条stat命令取回全部状态文件的大小和修改时间, 与本地保存的副本比较,
+只重新下载发生变化的文件。长时间运行时navigationHistory、playbackHistory等数组不断增长,
+未变化的大文件不必重复传输
+
+用法:
+  python delta_sync.py                      # 同步一次并打印传输统计
+  python delta_sync.py --interval=2 --runs=10
+"""
+
+import sys
+import time
+
+from snapshot_cache import SnapshotCache
+from transport import AUTOTEST_FILES, apply_transport_options, get_transport
+from verification_functions import decode_snapshot
+
+
+class DeltaSync:
+    """
+    状态文件的增量同步器
+
+    本地副本保存在不按时间过期的SnapshotCache中, 版本为stat_files返回的(大小, 修改时间),
+    版本不一致的条目由缓存自动淘汰并重新下载。
+    """
+
+    def __init__(self, transport=None, files=None):
+        """
+        :param transport: 数据源, 默认为当前生效的Transport
+        :param files: 同步的文件名列表, 默认为AUTOTEST_FILES
+        """
+        self.transport = transport or get_transport()
+        self.files = list(files or AUTOTEST_FILES)
+        self.cache = SnapshotCache(max_entries=len(self.files), max_age=None)
+        self.runs = 0
+        self.files_fetched = 0
+        self.files_skipped = 0
+        self.bytes_transferred = 0
+        self.bytes_skipped = 0
+
+    def sync(self, files=None):
+        """
+        同步一次
+        :param files: 本次需要的文件名列表(须包含在self.files中), 默认为全部
+        :return: (快照{文件名: JSON数据或None}, 本次统计)
+        """
+        files = files or self.files
+        key = self.transport.key
+        versions = self.transport.stat_files(files)
+
+        snapshot = {}
+        changed = []
+        bytes_skipped = 0
+        for name in files:
+            version = versions.get(name)
+            if version is None:
+                # 文件不存在
+                self.cache.invalidate(key, name)
+                snapshot[name] = None
+                continue
+            data = self.cache.get(key, name, version)
+            if data is None:
+                changed.append(name)
+            else:
+                snapshot[name] = data
+                bytes_skipped += version[0]
+
+        bytes_transferred = 0
+        if changed:
+            contents = self.transport.read_files(changed)
+            bytes_transferred = sum(len(content) for content in contents.values() if content)
+            fetched = decode_snapshot(contents, changed)
+            for name in changed:
+                # 读取期间文件若再次变化, 内容比记录的版本新, 下一次同步会发现版本不同并重新下载
+                self.cache.put(key, name, fetched[name], version=versions[name])
+            snapshot.update(fetched)
+
+        run_stats = {
+            "files_fetched": len(changed),
+            "files_skipped": len(files) - len(changed),
+            "bytes_transferred": bytes_transferred,
+            "bytes_skipped": bytes_skipped,
+            "changed": changed
+        }
+        self.runs += 1
+        self.files_fetched += run_stats["files_fetched"]
+        self.files_skipped += run_stats["files_skipped"]
+        self.bytes_transferred += bytes_transferred
+        self.bytes_skipped += bytes_skipped
+        return snapshot, run_stats
+
+    def stats(self):
+        """返回累计的同步统计"""
+        total = self.bytes_transferred + self.bytes_skipped
+        return {
+            "runs": self.runs,
+            "files_fetched": self.files_fetched,
+            "files_skipped": self.files_skipped,
+            "bytes_transferred": self.bytes_transferred,
+            "bytes_skipped": self.bytes_skipped,
+            "saved": f"{self.bytes_skipped/total*100:.1f}%" if total else "0%"
+        }
+
+
+if __name__ == "__main__":
+    apply_transport_options(sys.argv[1:])
+    interval = 2.0
+    runs = 1
+    for arg in sys.argv[1:]:
+        if arg.startswith('--interval='):
+            interval = float(arg.split('=', 1)[1])
+        elif arg.startswith('--runs='):
+            runs = int(arg.split('=', 1)[1])
+
+    delta = DeltaSync()
+    print(f"数据源: {delta.transport.describe()}")
+    for run in range(runs):
+        if run:
+            time.sleep(interval)
+        _, run_stats = delta.sync()
+        changed = ", ".join(run_stats["changed"]) or "无"
+        print(f"[第{run + 1}次] 下载 {run_stats['files_fetched']} 个文件 "
+              f"({run_stats['bytes_transferred']} 字节), 跳过 {run_stats['files_skipped']} 个 "
+              f"({run_stats['bytes_skipped']} 字节), 变化: {changed}")
+
+    stats = delta.stats()
+    print(f"累计: 传输 {stats['bytes_transferred']} 字节, 跳过 {stats['bytes_skipped']} 字节, "
+          f"节省 {stats['saved']}")
@@ -0,0 +1,423 @@
+"""
+音乐App自动化测试 - 大规模状态文件生成
+按AutoTestHelper的数据结构(AutoTestModels.kt)生成任意规模的autotest快照目录, 用于测量
+read_json_from_device和各验证函数随状态文件增长的表现。输出格式与App中
+GsonBuilder().setPrettyPrinting()一致: 两空格缩进、字段按数据类声明顺序、null字段省略;
+大数组边生成边写入磁盘, 内存中只保留当前元素
+
+歌曲信息取自app/src/main/assets/data/songs.json。收藏歌曲在App中按songId去重, 数量超过曲库时
+后续记录使用曲库之外的歌曲ID(song_031, song_032, ...), 歌名和歌手按曲库循环取用
+
+用法:
+  python generate_fixtures.py --out=fixtures/large
+  python generate_fixtures.py --out=fixtures/huge --navigation=1000000 --favorites=100000 --playlists=5000
+  python generate_fixtures.py --out=fixtures/small --scale=0.01 --seed=7
+"""
+
+import calendar
+import json
+import os
+import random
+import sys
+import time
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from itertools import chain
+
+from task_registry import TASKS
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          '..', 'app', 'src', 'main', 'assets')
+DATA_DIR = os.path.join(ASSETS_DIR, 'data')
+
+# 各数组的默认规模, 可用--<名称>=<数量>单独指定, --scale=<倍数>整体缩放
+DEFAULT_COUNTS = {
+    "navigation": 100000,        # app_state.json navigationHistory
+    "playback_history": 100000,  # playback_state.json playbackHistory
+    "favorites": 10000,          # user_favorites.json favoriteSongs
+    "playlists": 1000,           # user_playlists.json playlists
+    "playlist_size": 20,         # 每个歌单的歌曲数
+    "searches": 10000,           # search_history.json searches
+    "comments": 10000,           # comments.json userComments
+    "mv_history": 10000,         # mv_playback.json mvHistory
+    "task_logs": 1000,           # task_logs.json tasks
+}
+
+# 生成数据的起始时间, 每条记录之后时间前进1秒
+START_TIME = datetime(2025, 11, 3, 9, 0, 0)
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+PAGES = ['recommend', 'stroll', 'profile', 'playlist_detail', 'song_detail', 'album_detail',
+         'search', 'player', 'lyrics', 'rank_list', 'daily_recommend', 'mv_player']
+PLAYBACK_MODES = ['sequential', 'single_loop', 'shuffle']
+PLAYBACK_ACTIONS = ['play', 'pause', 'stop']
+SOURCES = [('daily_recommend', '第{n}首'), ('rank', '华语热歌榜第{n}首'), ('search', ''),
+           ('playlist', ''), ('stroll', '')]
+SORT_ORDERS = ['default', 'time_desc', 'time_asc', 'name_asc', 'name_desc']
+SEARCH_RESULT_TYPES = ['song', 'artist', 'album', 'playlist']
+SEARCH_ACTIONS = ['view', 'play']
+COMMENT_TEXTS = ['这首歌太好听了', '单曲循环中', '前奏一响就哭了', '每次听都有新的感受',
+                 '歌词写得真好', '<3 & 收藏了']
+STROLL_SCENES = ['伤感', '快乐', '伪感', '放松', '运动']
+PLAYER_STYLES = [('style_001', '经典黑胶'), ('style_002', '简约封面'), ('style_003', '歌词海报')]
+
+# Gson默认开启HTML转义, 这些字符输出为\uXXXX
+_GSON_ESCAPES = {'<': '\\u003c', '>': '\\u003e', '&': '\\u0026', '=': '\\u003d', "'": '\\u0027',
+                 '\u2028': '\\u2028', '\u2029': '\\u2029'}
+_GSON_ESCAPE_TABLE = str.maketrans(_GSON_ESCAPES)
+
+
+# ==================== Gson格式输出 ====================
+
+def gson_string(value):
+    """按Gson的规则编码字符串(非ASCII字符原样输出, HTML字符转义)"""
+    return json.dumps(value, ensure_ascii=False).translate(_GSON_ESCAPE_TABLE)
+
+
+def _scalar(value):
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, str):
+        return gson_string(value)
+    return str(value)
+
+
+def write_value(write, value, indent=0):
+    """
+    按Gson pretty printing格式写出一个值
+    :param write: 写入函数, 如文件对象的write
+    :param value: dict(字段按插入顺序输出, 值为None的字段省略)、list、迭代器(作为数组逐个写出)或标量
+    :param indent: 当前缩进空格数
+    """
+    if isinstance(value, dict):
+        items = [(key, item) for key, item in value.items() if item is not None]
+        if not items:
+            write('{}')
+            return
+        write('{')
+        for position, (key, item) in enumerate(items):
+            write(',\n' if position else '\n')
+            write(' ' * (indent + 2) + gson_string(key) + ': ')
+            write_value(write, item, indent + 2)
+        write('\n' + ' ' * indent + '}')
+    elif isinstance(value, (list, Iterator)):
+        iterator = iter(value)
+        first = next(iterator, None)
+        if first is None:
+            write('[]')
+            return
+        write('[')
+        for position, item in enumerate(chain((first,), iterator)):
+            write(',\n' if position else '\n')
+            write(' ' * (indent + 2))
+            write_value(write, item, indent + 2)
+        write('\n' + ' ' * indent + ']')
+    else:
+        write(_scalar(value))
+
+
+def write_file(path, document):
+    """
+    把一个状态文件写入磁盘, 数组为迭代器时边生成边写入
+    :return: 写入的字节数
+    """
+    with open(path, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+        write_value(f.write, document)
+    return os.path.getsize(path)
+
+
+# ==================== 状态文件内容 ====================
+
+def load_catalog(name):
+    """读取app/src/main/assets/data下的曲库数据"""
+    with open(os.path.join(DATA_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FixtureGenerator:
+    """
+    按AutoTestModels.kt的字段顺序生成各状态文件的内容, 大数组以生成器的形式返回
+    """
+
+    def __init__(self, counts=None, seed=0):
+        """
+        :param counts: 各数组的规模, 缺省项使用DEFAULT_COUNTS
+        :param seed: 随机数种子, 相同的种子生成相同的文件
+        """
+        self.counts = dict(DEFAULT_COUNTS, **(counts or {}))
+        self.random = random.Random(seed)
+        self.songs = load_catalog('songs.json')
+        self.albums = load_catalog('albums.json')
+        self.playlists = load_catalog('playlists.json')
+        self.videos = load_catalog('music_videos.json')
+        self.follow_items = load_catalog('follow_items.json')
+        self.clock = START_TIME
+
+    def _tick(self):
+        """返回当前时间戳并前进1秒"""
+        timestamp = self.clock.strftime(TIMESTAMP_FORMAT)
+        self.clock += timedelta(seconds=1)
+        return timestamp
+
+    def _millis(self):
+        """当前时间对应的毫秒时间戳(createTime/searchId/commentId使用)"""
+        return calendar.timegm(self.clock.timetuple()) * 1000
+
+    def _song(self):
+        return self.random.choice(self.songs)
+
+    def app_state(self):
+        def history():
+            for _ in range(self.counts["navigation"]):
+                yield {"page": self.random.choice(PAGES), "timestamp": self._tick()}
+
+        # currentPage位于navigationHistory之前, 生成历史时还不知道最后一页, 先按随机种子预演一遍
+        return {
+            "currentPage": self._last_page(),
+            "navigationHistory": history(),
+            "showLyrics": False,
+            "lastUpdated": _Deferred(self._now),
+        }
+
+    def _last_page(self):
+        """不生成历史, 只推算navigationHistory最后一项的页面"""
+        state = self.random.getstate()
+        page = PAGES[0]
+        for _ in range(self.counts["navigation"]):
+            page = self.random.choice(PAGES)
+        self.random.setstate(state)
+        return page
+
+    def _now(self):
+        """最近一次写入记录的时间"""
+        return (self.clock - timedelta(seconds=1)).strftime(TIMESTAMP_FORMAT)
+
+    def playback_state(self):
+        song = self._song()
+        source, detail = self.random.choice(SOURCES)
+
+        def history():
+            for _ in range(self.counts["playback_history"]):
+                yield {"songId": self._song()["songId"], "timestamp": self._tick(),
+                       "action": self.random.choice(PLAYBACK_ACTIONS)}
+
+        return {
+            "currentSong": {
+                "songId": song["songId"],
+                "songName": song["songName"],
+                "artist": song["artist"],
+                "source": source,
+                "sourceDetail": detail.format(n=self.random.randint(1, 30)),
+            },
+            "isPlaying": self.random.random() < 0.5,
+            "playbackMode": self.random.choice(PLAYBACK_MODES),
+            "volume": self.random.randint(0, 100),
+            "progress": self.random.randint(0, song["duration"] // 1000),
+            "duration": song["duration"] // 1000,
+            "playbackHistory": history(),
+            "lastUpdated": _Deferred(self._now),
+        }
+
+    def user_favorites(self):
+        def favorites():
+            for index in range(self.counts["favorites"]):
+                song = self.songs[index % len(self.songs)]
+                # 超出曲库的收藏使用新的歌曲ID, 保持songId唯一
+                song_id = song["songId"] if index < len(self.songs) else f"song_{index + 1:03d}"
+                yield {"songId": song_id, "songName": song["songName"],
+                       "artist": song["artist"], "addedTime": self._tick()}
+
+        return {"favoriteSongs": favorites(), "lastUpdated": _Deferred(self._now)}
+
+    def user_playlists(self):
+        size = min(self.counts["playlist_size"], len(self.songs))
+
+        def playlists():
+            for index in range(self.counts["playlists"]):
+                song_ids = [song["songId"] for song in self.random.sample(self.songs, size)]
+                self._tick()
+                yield {"playlistId": f"user_playlist_{index + 1:03d}",
+                       "playlistName": f"歌单{index + 1}",
+                       "songIds": song_ids,
+                       "songCount": len(song_ids),
+                       "createTime": self._millis(),
+                       "sortOrder": self.random.choice(SORT_ORDERS)}
+
+        return {"playlists": playlists(), "lastUpdated": _Deferred(self._now)}
+
+    def collected_items(self):
+        # App按ID去重, 收藏数量不超过曲库中的歌单和专辑数
+        return {
+            "collectedPlaylists": [
+                {"playlistId": playlist["playlistId"], "playlistName": playlist["playlistName"],
+                 "collectedTime": self._tick()} for playlist in self.playlists],
+            "collectedAlbums": [
+                {"albumId": album["albumId"], "albumName": album["albumName"],
+                 "artist": album["artist"], "artistId": album["artistId"],
+                 "collectedTime": self._tick()} for album in self.albums],
+            "lastUpdated": _Deferred(self._now),
+        }
+
+    def followed_artists(self):
+        # 与AutoTestHelper初始化时一致: 加载follow_items.json中的全部关注项
+        followed = [{"artistId": item["id"], "artistName": item["name"],
+                     "followedTime": self._tick()} for item in self.follow_items]
+        unfollowed = followed.pop()["artistId"] if followed else None
+        return {"followedArtists": followed, "recentlyUnfollowed": unfollowed,
+                "lastUpdated": _Deferred(self._now)}
+
+    def search_history(self):
+        def searches():
+            for _ in range(self.counts["searches"]):
+                song = self._song()
+                result_type = self.random.choice(SEARCH_RESULT_TYPES)
+                query = song["artist"] if result_type == 'artist' else song["songName"]
+                timestamp = self._tick()
+                yield {"searchId": f"search_{self._millis()}", "query": query,
+                       "timestamp": timestamp, "resultType": result_type,
+                       "resultId": song["songId"], "action": self.random.choice(SEARCH_ACTIONS)}
+
+        return {"searches": searches(), "lastUpdated": _Deferred(self._now)}
+
+    def comments(self):
+        def comments():
+            for _ in range(self.counts["comments"]):
+                timestamp = self._tick()
+                yield {"commentId": f"comment_{self._millis()}", "songId": self._song()["songId"],
+                       "content": self.random.choice(COMMENT_TEXTS), "timestamp": timestamp}
+
+        return {"userComments": comments(), "lastUpdated": _Deferred(self._now)}
+
+    def player_settings(self):
+        style_id, style_name = self.random.choice(PLAYER_STYLES)
+        return {
+            "playerStyle": {"styleId": style_id, "styleName": style_name,
+                            "changedTime": self._tick()},
+            "strollMode": {"isActive": True, "scene": self.random.choice(STROLL_SCENES),
+                           "activatedTime": self._tick()},
+            "lastUpdated": _Deferred(self._now),
+        }
+
+    def listening_stats(self):
+        end = self.clock.date()
+        return {
+            "weeklyStats": {"totalMinutes": self.random.randint(0, 7 * 24 * 60),
+                            "weekStartDate": str(end - timedelta(days=6)),
+                            "weekEndDate": str(end)},
+            "monthlyStats": {"totalMinutes": self.random.randint(0, 31 * 24 * 60),
+                             "month": end.strftime('%Y-%m'), "year": end.year},
+            "viewedStats": {"weekly": self.random.random() < 0.5,
+                            "monthly": self.random.random() < 0.5},
+            "lastUpdated": self._tick(),
+        }
+
+    def mv_playback(self):
+        video = self.random.choice(self.videos)
+
+        def history():
+            for _ in range(self.counts["mv_history"]):
+                yield {"mvId": self.random.choice(self.videos)["mvId"], "timestamp": self._tick(),
+                       "action": self.random.choice(['play', 'pause'])}
+
+        return {
+            "currentMV": {"mvId": video["mvId"], "songId": video["songId"],
+                          "songName": video["title"], "artist": video["artist"],
+                          "isPlaying": self.random.random() < 0.5},
+            "mvHistory": history(),
+            "lastUpdated": _Deferred(self._now),
+        }
+
+    def task_logs(self):
+        tasks = [task for task in TASKS if task["check"]]
+
+        def logs():
+            for _ in range(self.counts["task_logs"]):
+                task = self.random.choice(tasks)
+                yield {"taskId": f"task_{task['id']:03d}", "taskName": task["name"],
+                       "status": "TASK_COMPLETED", "completedTime": self._tick()}
+
+        return {"tasks": logs(), "lastUpdated": _Deferred(self._now)}
+
+    def documents(self):
+        """依次返回(文件名, 文件内容)"""
+        yield 'app_state.json', self.app_state()
+        yield 'playback_state.json', self.playback_state()
+        yield 'user_favorites.json', self.user_favorites()
+        yield 'user_playlists.json', self.user_playlists()
+        yield 'collected_items.json', self.collected_items()
+        yield 'followed_artists.json', self.followed_artists()
+        yield 'search_history.json', self.search_history()
+        yield 'comments.json', self.comments()
+        yield 'player_settings.json', self.player_settings()
+        yield 'listening_stats.json', self.listening_stats()
+        yield 'mv_playback.json', self.mv_playback()
+        yield 'task_logs.json', self.task_logs()
+
+
+class _Deferred:
+    """写到该字段时才求值的值(lastUpdated取前面数组写完后的时间)"""
+
+    def __init__(self, func):
+        self.func = func
+
+    def __str__(self):
+        return gson_string(self.func())
+
+
+def generate(out_dir, counts=None, seed=0):
+    """
+    生成一个完整的autotest快照目录
+    :param out_dir: 输出目录, 结构与app/src/main/assets/autotest相同
+    :param counts: 各数组的规模, 缺省项使用DEFAULT_COUNTS
+    :param seed: 随机数种子
+    :return: {文件名: 字节数}
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    sizes = {}
+    for name, document in FixtureGenerator(counts, seed).documents():
+        sizes[name] = write_file(os.path.join(out_dir, name), document)
+    return sizes
+
+
+def parse_counts(args):
+    """解析--<名称>=<数量>和--scale=<倍数>参数"""
+    scale = 1.0
+    counts = {}
+    for arg in args:
+        if not arg.startswith('--') or '=' not in arg:
+            continue
+        key, value = arg[2:].split('=', 1)
+        key = key.replace('-', '_')
+        if key == 'scale':
+            scale = float(value)
+        elif key in DEFAULT_COUNTS:
+            counts[key] = int(value)
+    scaled = {key: max(1, int(count * scale)) for key, count in DEFAULT_COUNTS.items()
+              if key != 'playlist_size'}
+    scaled.update(counts)
+    return scaled
+
+
+if __name__ == "__main__":
+    out_dir = None
+    seed = 0
+    for arg in sys.argv[1:]:
+        if arg.startswith('--out='):
+            out_dir = arg.split('=', 1)[1]
+        elif arg.startswith('--seed='):
+            seed = int(arg.split('=', 1)[1])
+    if not out_dir:
+        print("用法: python generate_fixtures.py --out=<目录> [--scale=1] [--seed=0] "
+              "[--navigation=N] [--favorites=N] [--playlists=N] ...")
+        sys.exit(1)
+
+    counts = parse_counts(sys.argv[1:])
+    start = time.perf_counter()
+    sizes = generate(out_dir, counts, seed)
+    elapsed = time.perf_counter() - start
+    for name, size in sizes.items():
+        print(f"  {name:<24} {size / 1024 / 1024:8.2f} MB")
+    print(f"✓ 已生成 {len(sizes)} 个文件到 {out_dir}, 共 "
+          f"{sum(sizes.values()) / 1024 / 1024:.2f} MB, 用时 {elapsed:.1f} 秒")
@@ -0,0 +1,134 @@
+"""
+音乐App自动化测试 - 验证耗时统计
+每个验证运行时在ContextVar中放一个计时字典, 读取、解码和判断各阶段把耗时累加到当前字典,
+没有计时字典时只多一次ContextVar读取, 可以常开。测试报告中的每条结果带上这些计时,
+报告顶层的timing汇总设备总耗时和最慢的任务
+"""
+
+import contextvars
+import heapq
+import time
+from contextlib import contextmanager
+
+# 当前验证的计时字典, 为None时不记录
+_active_timings = contextvars.ContextVar('autotest_timings', default=None)
+
+# 报告中列出的最慢任务数
+SLOWEST_COUNT = 5
+
+
+def new_timings():
+    """
+    返回一个空的计时字典
+    transport_ms: 访问设备/数据源的耗时; bytes: 读取的字节数; decode_ms: JSON解码耗时;
+    predicate_ms: 判断条件的耗时; retries: 设备命令的重连/重试次数
+    """
+    return {"transport_ms": 0.0, "bytes": 0, "decode_ms": 0.0, "predicate_ms": 0.0, "retries": 0}
+
+
+@contextmanager
+def collect_timings(timings):
+    """
+    在with块内把各阶段的耗时累加到timings
+    :param timings: new_timings()返回的字典, 为None时不记录
+    """
+    token = _active_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _active_timings.reset(token)
+
+
+def record(name, value):
+    """把value累加到当前计时字典的name项"""
+    timings = _active_timings.get()
+    if timings is not None:
+        timings[name] += value
+
+
+@contextmanager
+def timed(name):
+    """把with块的耗时(毫秒)累加到当前计时字典的name项"""
+    timings = _active_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] += (time.perf_counter() - start) * 1000
+
+
+def rounded(timings):
+    """报告中使用的计时: 毫秒保留3位小数"""
+    return {name: round(value, 3) if isinstance(value, float) else value
+            for name, value in timings.items()}
+
+
+class TimingSummary:
+    """
+    逐条累加结果计时的汇总, 内存只与SLOWEST_COUNT有关, 与结果条数无关
+    """
+
+    def __init__(self, run_timings=None):
+        """
+        :param run_timings: 运行级别的计时(如快照拉取), 计入设备总耗时
+        """
+        self.total = new_timings()
+        self.snapshot_ms = 0.0
+        self._slowest = []  # 小顶堆: (耗时, 序号, 条目)
+        self._count = 0
+        if run_timings:
+            self.add_run(run_timings)
+
+    def add_run(self, run_timings):
+        """累加一次运行级别的计时"""
+        for name, value in run_timings.items():
+            self.total[name] += value
+        self.snapshot_ms += run_timings.get("transport_ms", 0)
+
+    def add(self, result):
+        """累加一条带timings的结果"""
+        timings = result.get("timings") or {}
+        for name, value in timings.items():
+            if name in self.total:
+                self.total[name] += value
+        check_ms = timings.get("transport_ms", 0) + timings.get("decode_ms", 0) + \
+            timings.get("predicate_ms", 0)
+        entry = {"task_id": result["task_id"], "task_name": result["task_name"],
+                 "total_ms": round(check_ms, 3)}
+        if "serial" in result:
+            entry["serial"] = result["serial"]
+        # 耗时相同时先出现的结果排在前面
+        self._count += 1
+        item = (check_ms, -self._count, entry)
+        if len(self._slowest) < SLOWEST_COUNT:
+            heapq.heappush(self._slowest, item)
+        elif item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def summary(self):
+        """:return: 报告顶层的timing字典"""
+        return {
+            "device_ms": round(self.total["transport_ms"], 3),
+            "snapshot_ms": round(self.snapshot_ms, 3),
+            "bytes_read": self.total["bytes"],
+            "decode_ms": round(self.total["decode_ms"], 3),
+            "predicate_ms": round(self.total["predicate_ms"], 3),
+            "retries": self.total["retries"],
+            "slowest": [entry for _, _, entry in sorted(self._slowest, reverse=True)]
+        }
+
+
+def summarize(results, run_timings=None):
+    """
+    汇总一次运行的计时
+    :param results: 报告中的结果列表(或任意可迭代对象), 每条结果带timings
+    :param run_timings: 运行级别的计时(如快照拉取), 计入设备总耗时
+    :return: 报告顶层的timing字典
+    """
+    summary = TimingSummary(run_timings)
+    for result in results:
+        summary.add(result)
+    return summary.summary()
@@ -0,0 +1,177 @@
+"""
+音乐App自动化测试 - 多设备并行运行器
+从adb devices发现全部在线设备, 在线程池中并发运行TEST_CASES, 结果合并为一份测试报告
+
+用法:
+  python parallel_runner.py                    # 每台设备各运行全部任务(每台设备一个episode)
+  python parallel_runner.py --mode=shard       # 把任务均分到各台设备上运行
+  python parallel_runner.py --devices=emulator-5554,emulator-5556
+  python parallel_runner.py --live             # 关闭快照模式
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from metrics import collect_timings, new_timings, rounded, summarize
+from run_all_tests import TEST_CASES, load_snapshot, run_single_test, save_test_report
+from snapshot_cache import SnapshotCache
+from transport import AdbTransport, apply_transport_options, list_devices, use_transport
+
+# 多线程输出时保证每行完整
+_print_lock = threading.Lock()
+
+
+def discover_devices():
+    """
+    从adb devices获取全部在线设备的序列号
+    :return: 序列号列表
+    """
+    return [serial for serial, state in list_devices() if state == 'device']
+
+
+def plan_assignments(serials, test_cases, mode='each'):
+    """
+    把测试用例分配到各台设备
+    :param serials: 设备序列号列表
+    :param test_cases: TEST_CASES格式的测试用例
+    :param mode: 'each'每台设备运行全部用例, 'shard'按轮转方式均分用例
+    :return: [(序列号, 测试用例列表), ...]
+    """
+    if mode == 'each':
+        return [(serial, list(test_cases)) for serial in serials]
+    if mode == 'shard':
+        return [(serial, list(test_cases[i::len(serials)])) for i, serial in enumerate(serials)]
+    raise ValueError(f"未知的分配方式: {mode}")
+
+
+def run_on_device(serial, test_cases, snapshot_mode=True):
+    """
+    在一台设备上运行分配给它的测试用例(在工作线程中执行)
+    :return: (结果列表, 缓存统计, 耗时秒数, 快照拉取的计时)
+    """
+    start = time.perf_counter()
+    cache = SnapshotCache()
+    results = []
+    run_timings = new_timings()
+    with use_transport(AdbTransport(serial)):
+        with collect_timings(run_timings):
+            load_snapshot(snapshot_mode, cache)
+        for task_id, task_name, func, args, difficulty in test_cases:
+            timings = new_timings()
+            _, _, result, error_msg, _ = run_single_test(
+                task_id, task_name, func, args, difficulty, cache, timings
+            )
+            results.append({
+                "task_id": task_id,
+                "task_name": task_name,
+                "result": result,
+                "error": error_msg,
+                "difficulty": difficulty,
+                "serial": serial,
+                "timings": rounded(timings)
+            })
+            status = "✗ 错误" if error_msg else ("✓ 通过" if result else "✗ 失败")
+            with _print_lock:
+                print(f"[{serial}] [任务{task_id:02d}] {task_name}... {status}")
+    return results, cache.stats(), time.perf_counter() - start, run_timings
+
+
+def run_parallel(serials=None, mode='each', snapshot_mode=True):
+    """
+    在多台设备上并发运行测试并保存合并后的报告
+    :param serials: 设备序列号列表, 为None时自动发现
+    :param mode: 用例分配方式, 见plan_assignments
+    :param snapshot_mode: 是否启用快照模式
+    :return: (passed, failed, errors)
+    """
+    serials = serials or discover_devices()
+    if not serials:
+        print("✗ 没有检测到在线设备")
+        return 0, 0, 0
+
+    assignments = plan_assignments(serials, TEST_CASES, mode)
+    print("=" * 70)
+    print("音乐App自动化测试 - 多设备并行运行器")
+    print("=" * 70)
+    print(f"开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"设备数量: {len(serials)}, 分配方式: {mode}")
+    for serial, cases in assignments:
+        print(f"  - {serial}: {len(cases)} 个测试用例")
+    print("=" * 70)
+    print()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(assignments)) as pool:
+        futures = [(serial, pool.submit(run_on_device, serial, cases, snapshot_mode))
+                   for serial, cases in assignments]
+
+    results = []
+    devices = []
+    cache_totals = {"hits": 0, "misses": 0}
+    snapshot_timings = new_timings()
+    for serial, future in futures:
+        device_results, cache_stats, elapsed, run_timings = future.result()
+        results.extend(device_results)
+        for name, value in run_timings.items():
+            snapshot_timings[name] += value
+        cache_totals["hits"] += cache_stats["hits"]
+        cache_totals["misses"] += cache_stats["misses"]
+        devices.append({
+            "serial": serial,
+            "total": len(device_results),
+            "passed": sum(1 for r in device_results if r["result"] and not r["error"]),
+            "elapsed_seconds": round(elapsed, 3)
+        })
+    wall_time = time.perf_counter() - start
+
+    errors = sum(1 for r in results if r["error"])
+    passed = sum(1 for r in results if r["result"] and not r["error"])
+    failed = len(results) - passed - errors
+
+    print()
+    print("=" * 70)
+    print("测试总结")
+    print("=" * 70)
+    for device in devices:
+        print(f"  {device['serial']}: 通过 {device['passed']}/{device['total']}, "
+              f"耗时 {device['elapsed_seconds']:.2f}s")
+    total = len(results)
+    if total:
+        print(f"总计: {total} 个测试, 通过 {passed} ({passed/total*100:.1f}%), "
+              f"失败 {failed}, 错误 {errors}")
+    busy_time = sum(d["elapsed_seconds"] for d in devices)
+    print(f"总耗时: {wall_time:.2f}s (各设备耗时之和 {busy_time:.2f}s, "
+          f"并行加速 {busy_time / wall_time if wall_time else 0:.2f}x)")
+
+    timing = summarize(results, snapshot_timings)
+    print(f"设备耗时: {timing['device_ms']:.1f}ms (读取 {timing['bytes_read']} 字节, "
+          f"重试 {timing['retries']} 次)")
+    print("=" * 70)
+
+    save_test_report(results, passed, failed, errors, cache_totals,
+                     {"mode": mode, "devices": devices, "wall_seconds": round(wall_time, 3),
+                      "timing": timing})
+    return passed, failed, errors
+
+
+if __name__ == "__main__":
+    apply_transport_options(sys.argv[1:])
+    snapshot_mode = '--live' not in sys.argv
+    mode = 'each'
+    serials = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--mode='):
+            mode = arg.split('=', 1)[1]
+        elif arg.startswith('--devices='):
+            serials = [s for s in arg.split('=', 1)[1].split(',') if s]
+
+    passed, failed, errors = run_parallel(serials, mode, snapshot_mode)
+    if errors > 0:
+        sys.exit(2)
+    elif failed > 0:
+        sys.exit(1)
+    else:
+        sys.exit(0)
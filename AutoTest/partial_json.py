@@ -0,0 +1,260 @@
+"""
+部分JSON解码
+状态文件中的navigationHistory、playbackHistory、searches等数组会随测试过程不断增长,
+而多数验证函数只需要currentPage、isPlaying等少数字段。这里的解码器只解析被访问的字段,
+其余值用正则表达式跳过, 不构建Python对象; 大数组可以逐个元素迭代
+
+用法:
+  extract(text, ['currentPage', 'currentSong.songId'])  # -> {'currentPage': ..., 'currentSong.songId': ...}
+  for item in iter_array(text, 'playbackHistory'): ...
+  doc = LazyDocument(text); doc.get('currentPage')       # 按需解码的只读dict
+"""
+
+import json
+import re
+from collections.abc import Mapping
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# 一次匹配到下一个括号之前的全部内容(字符串整体跳过, 其中的括号不计)
+_BETWEEN_BRACKETS = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*')
+_SCALAR = re.compile(r'[^,\]}\s]+')
+# 数组元素之间的分隔(连同前后的空白)
+_ARRAY_SEPARATOR = re.compile(r'[ \t\n\r]*([,\]])[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+
+
+def _text(data):
+    """统一为str, bytes按UTF-8解码"""
+    return data.decode('utf-8') if isinstance(data, (bytes, bytearray)) else data
+
+
+def _skip_whitespace(text, pos):
+    return _WHITESPACE.match(text, pos).end()
+
+
+def _error(message, text, pos):
+    return json.JSONDecodeError(message, text, min(pos, len(text)))
+
+
+def skip_value(text, pos):
+    """
+    跳过pos处的一个JSON值, 不构建Python对象
+    :return: 该值之后的位置
+    """
+    if pos >= len(text):
+        raise _error("Expecting value", text, pos)
+    char = text[pos]
+    if char == '"':
+        match = _STRING.match(text, pos)
+        if match is None:
+            raise _error("Unterminated string", text, pos)
+        return match.end()
+    if char in '[{':
+        # 只在括号处回到Python计数深度, 其余内容由正则一次跳过
+        depth = 0
+        while True:
+            char = text[pos:pos + 1]
+            if char in ('[', '{'):
+                depth += 1
+            elif char in (']', '}'):
+                depth -= 1
+                if depth == 0:
+                    return pos + 1
+            else:
+                raise _error("Unterminated array, object or string", text, pos)
+            pos = _BETWEEN_BRACKETS.match(text, pos + 1).end()
+    match = _SCALAR.match(text, pos)
+    if match is None:
+        raise _error("Expecting value", text, pos)
+    return match.end()
+
+
+def iter_members(text, pos=0):
+    """
+    依次返回pos处JSON对象的成员, 只解码键, 值只记录位置
+    值在继续迭代时才被跳过, 找到所需的键后停止迭代就不会扫描该值
+    :return: 生成(键, 值起始位置); 生成器的返回值(StopIteration.value)为对象结束后的位置
+    """
+    pos = _skip_whitespace(text, pos)
+    if text[pos:pos + 1] != '{':
+        raise _error("Expecting '{'", text, pos)
+    pos = _skip_whitespace(text, pos + 1)
+    if text[pos:pos + 1] == '}':
+        return pos + 1
+    while True:
+        match = _STRING.match(text, pos)
+        if match is None:
+            raise _error("Expecting property name enclosed in double quotes", text, pos)
+        key = json.loads(match.group())
+        pos = _skip_whitespace(text, match.end())
+        if text[pos:pos + 1] != ':':
+            raise _error("Expecting ':' delimiter", text, pos)
+        start = _skip_whitespace(text, pos + 1)
+        yield key, start
+        pos = _skip_whitespace(text, skip_value(text, start))
+        char = text[pos:pos + 1]
+        if char == '}':
+            return pos + 1
+        if char != ',':
+            raise _error("Expecting ',' delimiter", text, pos)
+        pos = _skip_whitespace(text, pos + 1)
+
+
+def _split_path(path):
+    return path.split('.') if isinstance(path, str) else list(path)
+
+
+def _locate(text, path, pos=0):
+    """
+    查找路径对应的值
+    :return: 值起始位置, 路径不存在时返回None
+    """
+    for key in _split_path(path):
+        for name, start in iter_members(text, pos):
+            if name == key:
+                pos = start
+                break
+        else:
+            return None
+    return pos
+
+
+def extract(data, paths):
+    """
+    只解码指定的字段, 找齐后立即停止扫描
+    :param data: JSON文本(str或UTF-8字节)
+    :param paths: 字段路径列表, 嵌套字段用"."连接, 如"currentSong.songId"
+    :return: {路径: 值}, 不存在的路径不出现在结果中
+    """
+    text = _text(data)
+    wanted = {}
+    for path in paths:
+        keys = _split_path(path)
+        wanted.setdefault(keys[0], []).append((path, keys[1:]))
+
+    result = {}
+    for name, start in iter_members(text):
+        if name not in wanted:
+            continue
+        for path, rest in wanted.pop(name):
+            if not rest:
+                result[path] = _decoder.raw_decode(text, start)[0]
+                continue
+            located = _locate(text, rest, start) if text[start] == '{' else None
+            if located is not None:
+                result[path] = _decoder.raw_decode(text, located)[0]
+        if not wanted:
+            break
+    return result
+
+
+def get_path(data, path, default=None):
+    """
+    只解码单个字段
+    :param path: 字段路径, 嵌套字段用"."连接
+    """
+    key = path if isinstance(path, str) else '.'.join(path)
+    return extract(data, [key]).get(key, default)
+
+
+def iter_array(data, path=None):
+    """
+    逐个解码数组中的元素, 任何时候只持有一个元素
+    :param data: JSON文本(str或UTF-8字节)
+    :param path: 数组所在的字段路径, 为None时文本本身是数组
+    :return: 生成数组元素, 路径不存在或不是数组时不生成任何元素
+    """
+    text = _text(data)
+    if path is None:
+        pos = _skip_whitespace(text, 0)
+    else:
+        pos = _locate(text, path)
+        if pos is None:
+            return
+    if text[pos:pos + 1] != '[':
+        return
+    pos = _skip_whitespace(text, pos + 1)
+    if text[pos:pos + 1] == ']':
+        return
+    decode = _decoder.raw_decode
+    separator = _ARRAY_SEPARATOR.match
+    while True:
+        value, pos = decode(text, pos)
+        yield value
+        match = separator(text, pos)
+        if match is None:
+            raise _error("Expecting ',' delimiter", text, _skip_whitespace(text, pos))
+        if match.group(1) == ']':
+            return
+        pos = match.end()
+
+
+class LazyDocument(Mapping):
+    """
+    按需解码的JSON对象, 可当作只读dict使用
+
+    构造时扫描一遍顶层成员, 记下每个键的位置并检查格式;
+    值在第一次被访问时才解码, 未访问的字段(如很长的history数组)只被跳过。
+    """
+
+    def __init__(self, data):
+        """
+        :param data: JSON对象文本(str或UTF-8字节)
+        :raises json.JSONDecodeError: 顶层结构不完整或格式错误(如App写入到一半的文件)
+        """
+        self.text = _text(data)
+        self._first = _skip_whitespace(self.text, 0)
+        # 构造时扫描一遍顶层成员: 每个值只被跳过, 不解码, 但格式错误的文件在这里就被发现,
+        # 与完整解码一样视为读取失败
+        self._offsets = {}
+        members = iter_members(self.text, self._first)
+        while True:
+            try:
+                name, start = next(members)
+            except StopIteration as stop:
+                end = stop.value
+                break
+            # 重复的键与json模块一样以最后一个为准
+            self._offsets[name] = start
+        end = _skip_whitespace(self.text, end)
+        if end != len(self.text):
+            raise _error("Extra data", self.text, end)
+        self._values = {}
+
+    def __getitem__(self, key):
+        if key in self._values:
+            return self._values[key]
+        if key not in self._offsets:
+            raise KeyError(key)
+        value = _decoder.raw_decode(self.text, self._offsets[key])[0]
+        self._values[key] = value
+        return value
+
+    def __contains__(self, key):
+        return key in self._offsets
+
+    def __iter__(self):
+        return iter(list(self._offsets))
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def to_dict(self):
+        """完整解码为dict"""
+        return json.loads(self.text)
+
+    def __repr__(self):
+        return f"LazyDocument({len(self.text)} chars)"
+
+
+def load_document(data):
+    """
+    解码状态文件: JSON对象返回LazyDocument, 其他类型(数组等)直接完整解码
+    :param data: 文件内容字节
+    """
+    text = _text(data)
+    pos = _skip_whitespace(text, 0)
+    if text[pos:pos + 1] == '{':
+        return LazyDocument(text)
+    return json.loads(text)
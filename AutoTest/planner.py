@@ -0,0 +1,90 @@
+"""
+音乐App自动化测试 - 读取计划
+根据选中的任务从任务注册表计算需要读取的最少状态文件集合: 读取同一文件的任务归为一组,
+每个文件只读取一次(全部文件合并为一次批量读取), 组内的验证函数共用读取结果
+
+用法:
+  python planner.py 1-10 --explain        # 查看任务1到10的读取计划
+  python planner.py all --explain
+"""
+
+import sys
+
+from run_single_test import parse_task_numbers
+from task_registry import TASKS_BY_ID, is_supported
+from transport import AUTOTEST_FILES, apply_transport_options, get_transport
+from verification_functions import pull_autotest_snapshot
+
+
+def build_plan(task_ids):
+    """
+    为一组任务生成读取计划
+    :param task_ids: 任务编号列表
+    :return: 计划dict, groups为{文件名: [任务编号]}, files为需要读取的文件,
+             reads_unplanned为逐个任务读取时的读取次数, reads_planned为按计划读取的文件数
+    """
+    groups = {}
+    unsupported = []
+    for task_id in task_ids:
+        if not is_supported(task_id):
+            unsupported.append(task_id)
+            continue
+        groups.setdefault(TASKS_BY_ID[task_id]["file"], []).append(task_id)
+
+    return {
+        "tasks": [task_id for task_id in task_ids if task_id not in unsupported],
+        "unsupported": unsupported,
+        "groups": groups,
+        "files": list(groups),
+        "reads_unplanned": sum(len(tasks) for tasks in groups.values()),
+        "reads_full_snapshot": len(AUTOTEST_FILES),
+        "reads_planned": len(groups)
+    }
+
+
+def explain(plan):
+    """打印读取计划: 各文件被哪些任务依赖, 以及规划前后的读取次数"""
+    print("读取计划")
+    print("-" * 70)
+    for name, tasks in plan["groups"].items():
+        task_list = ", ".join(str(task_id) for task_id in tasks)
+        print(f"  {name:<24} 读取1次, 验证 {len(tasks)} 个任务: {task_list}")
+    if plan["unsupported"]:
+        skipped = ", ".join(str(task_id) for task_id in plan["unsupported"])
+        print(f"  不支持自动化验证, 跳过: {skipped}")
+    print("-" * 70)
+    print(f"逐个任务读取: {plan['reads_unplanned']} 次设备读取")
+    print(f"全量快照: 读取 {plan['reads_full_snapshot']} 个文件")
+    print(f"按计划读取: {plan['reads_planned']} 个文件, 合并为 "
+          f"{1 if plan['files'] else 0} 次批量读取")
+
+
+def fetch_plan(plan, cache=None, serial=None):
+    """
+    按计划一次读取所需的全部文件
+    :param cache: SnapshotCache实例, 读取结果同时写入该缓存
+    :param serial: 设备序列号
+    :return: 只包含计划中文件的快照, 读取失败时返回None
+    """
+    if not plan["files"]:
+        return {}
+    transport = get_transport(serial)
+    # 先取文件版本再读取内容, 计划中不存在的文件同时缓存为不存在
+    versions = cache.versions(transport, AUTOTEST_FILES) if cache is not None else None
+    snapshot = pull_autotest_snapshot(plan["files"], serial)
+    if snapshot is not None and cache is not None:
+        cache.put_snapshot(transport.key, snapshot, versions)
+    return snapshot
+
+
+if __name__ == "__main__":
+    apply_transport_options(sys.argv[1:])
+    positional = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    plan = build_plan(parse_task_numbers(positional))
+    explain(plan)
+    if '--explain' not in sys.argv:
+        snapshot = fetch_plan(plan)
+        if snapshot is None:
+            sys.exit(1)
+        for name in plan["files"]:
+            print(f"{'✓' if snapshot.get(name) is not None else '✗'} {name}")
@@ -0,0 +1,105 @@
+"""
+音乐App自动化测试 - 等待任务完成
+AutoTestHelper写入状态文件是异步的, 操作完成后立即验证可能读到旧数据。
+wait_for在超时时间内通过DeltaSync反复探测任务相关文件的版本(大小+修改时间, 一条stat命令, 不下载内容),
+只有版本变化时才重新下载文件并执行验证函数, 探测间隔按指数退避逐渐拉长
+
+用法:
+  python polling.py <任务ID> [--timeout=10]
+  python polling.py 8 --timeout=15
+"""
+
+import sys
+import time
+
+from delta_sync import DeltaSync
+from run_all_tests import TEST_CASES
+from task_registry import supported_tasks
+from transport import apply_transport_options, get_transport
+from verification_functions import use_snapshot
+
+# 各任务的验证函数读取的状态文件
+TASK_FILES = {task["id"]: [task["file"]] for task in supported_tasks()}
+
+# 退避参数(秒): 从INITIAL_INTERVAL开始, 文件未变化时每次乘以BACKOFF_FACTOR, 不超过MAX_INTERVAL
+INITIAL_INTERVAL = 0.1
+MAX_INTERVAL = 2.0
+BACKOFF_FACTOR = 1.5
+
+
+def find_test_case(task_id):
+    """
+    从TEST_CASES中查找任务
+    :return: (任务ID, 任务名称, 验证函数, 参数列表, 难度)
+    """
+    for case in TEST_CASES:
+        if case[0] == task_id:
+            return case
+    raise KeyError(f"未找到任务{task_id}, 该任务可能不支持自动化验证")
+
+
+def wait_for(task, timeout=10, args=None, serial=None, stats=None):
+    """
+    等待任务的验证函数返回True
+    :param task: 任务ID
+    :param timeout: 最长等待时间(秒)
+    :param args: 验证函数参数, 默认使用TEST_CASES中的参数
+    :param serial: 设备序列号, 未设置Transport时用于选择设备
+    :param stats: 传入dict时写入探测次数(polls)、验证次数(evaluations)和下载字节数(bytes_transferred)
+    :return: 从开始等待到验证首次通过所用的秒数, 超时返回None
+    """
+    task_id, _, func, default_args, _ = find_test_case(task)
+    args = default_args if args is None else args
+    files = TASK_FILES[task_id]
+    delta = DeltaSync(get_transport(serial), files)
+    stats = stats if stats is not None else {}
+    stats.update(polls=0, evaluations=0)
+
+    start = time.monotonic()
+    deadline = start + timeout
+    interval = INITIAL_INTERVAL
+    while True:
+        # 每次探测只有一条stat命令, 文件有变化时才下载变化的文件
+        snapshot, run_stats = delta.sync()
+        stats["polls"] += 1
+        if run_stats["files_fetched"] or stats["evaluations"] == 0:
+            with use_snapshot(snapshot):
+                result = func(*args)
+            stats["evaluations"] += 1
+            if result:
+                stats["bytes_transferred"] = delta.bytes_transferred
+                return time.monotonic() - start
+            interval = INITIAL_INTERVAL
+        else:
+            interval = min(interval * BACKOFF_FACTOR, MAX_INTERVAL)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            stats["bytes_transferred"] = delta.bytes_transferred
+            return None
+        time.sleep(min(interval, remaining))
+
+
+if __name__ == "__main__":
+    apply_transport_options(sys.argv[1:])
+    positional = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if not positional:
+        print("用法: python polling.py <任务ID> [--timeout=10]")
+        sys.exit(1)
+
+    timeout = 10.0
+    for arg in sys.argv[1:]:
+        if arg.startswith('--timeout='):
+            timeout = float(arg.split('=', 1)[1])
+
+    task_id = int(positional[0])
+    print(f"等待任务{task_id}完成, 最长 {timeout:.0f} 秒...")
+    stats = {}
+    elapsed = wait_for(task_id, timeout, stats=stats)
+    print()
+    if elapsed is None:
+        print(f"✗ 超时: {timeout:.0f} 秒内验证未通过 "
+              f"(探测 {stats['polls']} 次, 验证 {stats['evaluations']} 次)")
+        sys.exit(1)
+    print(f"✓ 验证通过, 用时 {elapsed:.2f} 秒 "
+          f"(探测 {stats['polls']} 次, 验证 {stats['evaluations']} 次)")
@@ -0,0 +1,370 @@
+"""
+音乐App自动化测试 - SQLite结果库
+把run_all_tests/run_single_test的每条验证结果写入本地SQLite数据库, 按任务、难度、被测build和日期统计通过率。
+数据库使用WAL模式, 多个测试运行器可以同时写入; 每次写入时同步更新按(日期, build, 任务)汇总的daily_stats表,
+常用的统计查询只扫描汇总表, 结果行数再多也能在毫秒级返回
+
+用法:
+  python results_db.py import test_report_*.json results/ [--build=<build>]  # 导入测试报告和JSONL结果文件
+  python results_db.py task [--since=2025-11-01] [--until=2025-11-30] [--build=<build>]
+  python results_db.py difficulty [--since=...]
+  python results_db.py build [--task=8]
+  python results_db.py day [--task=8] [--difficulty=高]
+  (所有命令都可以加--db=<数据库文件>, 默认为results.db)
+"""
+
+import glob
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+from results_store import iter_records
+
+DB_FILE = os.environ.get('AUTOTEST_RESULTS_DB', 'results.db')
+# 被测build的默认名称, 也可以用--build=指定
+DEFAULT_BUILD = os.environ.get('AUTOTEST_BUILD', '')
+# 每批写入的结果条数, 每批一个事务
+BATCH_SIZE = 1000
+# 其他运行器持有写锁时的最长等待时间(毫秒)
+BUSY_TIMEOUT_MS = 30000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_key TEXT NOT NULL UNIQUE,
+    started_at TEXT,
+    day TEXT NOT NULL,
+    build TEXT NOT NULL DEFAULT '',
+    source TEXT,
+    transport TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_day ON runs(day);
+CREATE INDEX IF NOT EXISTS idx_runs_build ON runs(build, day);
+
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    task_id INTEGER NOT NULL,
+    task_name TEXT,
+    difficulty TEXT,
+    result INTEGER NOT NULL,
+    error TEXT,
+    serial TEXT,
+    transport_ms REAL,
+    bytes INTEGER,
+    decode_ms REAL,
+    predicate_ms REAL,
+    retries INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results(run_id);
+CREATE INDEX IF NOT EXISTS idx_results_task ON results(task_id, run_id);
+
+CREATE TABLE IF NOT EXISTS daily_stats (
+    day TEXT NOT NULL,
+    build TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    task_name TEXT,
+    difficulty TEXT,
+    total INTEGER NOT NULL DEFAULT 0,
+    passed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, build, task_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_daily_task ON daily_stats(task_id, day);
+CREATE INDEX IF NOT EXISTS idx_daily_build ON daily_stats(build, day);
+CREATE INDEX IF NOT EXISTS idx_daily_difficulty ON daily_stats(difficulty, day);
+"""
+
+_UPSERT_DAILY = """
+INSERT INTO daily_stats (day, build, task_id, task_name, difficulty, total, passed, failed, errors)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (day, build, task_id) DO UPDATE SET
+    task_name = excluded.task_name,
+    difficulty = excluded.difficulty,
+    total = total + excluded.total,
+    passed = passed + excluded.passed,
+    failed = failed + excluded.failed,
+    errors = errors + excluded.errors
+"""
+
+# 统计维度: 命令 -> (分组字段, 显示名称)
+GROUPS = {
+    "task": ("task_id", "任务"),
+    "difficulty": ("difficulty", "难度"),
+    "build": ("build", "build"),
+    "day": ("day", "日期"),
+}
+# 按难度分组时的排列顺序: 低、中、高
+DIFFICULTY_ORDER = "CASE difficulty WHEN '低' THEN 0 WHEN '中' THEN 1 WHEN '高' THEN 2 ELSE 3 END"
+
+
+def _day(started_at, run_key=None):
+    """运行开始时间 -> 日期(YYYY-MM-DD), 没有开始时间时从运行ID(YYYYmmdd_HHMMSS...)中取"""
+    if started_at:
+        return started_at[:10]
+    if run_key and run_key[:8].isdigit():
+        return f"{run_key[:4]}-{run_key[4:6]}-{run_key[6:8]}"
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+class ResultsDB:
+    """
+    结果库的写入和查询
+    """
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        # 自行管理事务: 每批结果一个BEGIN IMMEDIATE事务, 避免并发写入时读锁升级为写锁的死锁
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        self.conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._runs = {}  # 运行的行ID -> (日期, build)
+        self._pending = []  # [(运行的行ID, 结果)]
+
+    def start_run(self, run_key=None, started_at=None, build=DEFAULT_BUILD, source=None,
+                  transport=None):
+        """
+        登记一次运行
+        :param run_key: 运行的唯一标识(JSONL结果的运行ID或测试报告文件名), 默认为当前时间
+        :param started_at: 开始时间'YYYY-MM-DD HH:MM:SS'
+        :param build: 被测build
+        :param source: 结果来源, 如run_all_tests、测试报告文件
+        :return: 运行的行ID, 该运行已导入过时返回None
+        """
+        started_at = started_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        run_key = run_key or datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        day = _day(started_at, run_key)
+        build = build or ''
+        with self._transaction():
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO runs (run_key, started_at, day, build, source, transport) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (run_key, started_at, day, build, source, transport))
+        if not cursor.rowcount:
+            return None
+        self._runs[cursor.lastrowid] = (day, build)
+        return cursor.lastrowid
+
+    def add_result(self, run_id, result):
+        """
+        写入一条验证结果(缓冲BATCH_SIZE条后批量写入)
+        :param run_id: start_run返回的行ID
+        :param result: 与测试报告results中格式相同的dict
+        """
+        self._pending.append((run_id, result))
+        if len(self._pending) >= BATCH_SIZE:
+            self.flush()
+
+    def add_results(self, run_id, results):
+        """写入多条验证结果"""
+        for result in results:
+            self.add_result(run_id, result)
+        self.flush()
+
+    def flush(self):
+        """把缓冲的结果写入数据库, 同时更新daily_stats"""
+        if not self._pending:
+            return
+        rows = []
+        daily = {}
+        for run_id, r in self._pending:
+            if r.get("task_id") is None:
+                continue
+            timings = r.get("timings") or {}
+            rows.append((run_id, r["task_id"], r.get("task_name"), r.get("difficulty"),
+                         1 if r.get("result") else 0, r.get("error"), r.get("serial"),
+                         timings.get("transport_ms"), timings.get("bytes"),
+                         timings.get("decode_ms"), timings.get("predicate_ms"),
+                         timings.get("retries")))
+            day, build = self._runs[run_id]
+            stats = daily.setdefault((day, build, r["task_id"]),
+                                     [r.get("task_name"), r.get("difficulty"), 0, 0, 0, 0])
+            stats[2] += 1
+            if r.get("error"):
+                stats[5] += 1
+            elif r.get("result"):
+                stats[3] += 1
+            else:
+                stats[4] += 1
+        with self._transaction():
+            self.conn.executemany(
+                "INSERT INTO results (run_id, task_id, task_name, difficulty, result, error, serial, "
+                "transport_ms, bytes, decode_ms, predicate_ms, retries) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.executemany(_UPSERT_DAILY, [key + tuple(stats) for key, stats in daily.items()])
+        # 提交成功后才清空缓冲; 写入失败(数据库被锁、磁盘已满等)时事务回滚, 结果留在缓冲中下次重试
+        self._pending = []
+
+    def _transaction(self):
+        return _Transaction(self.conn)
+
+    def pass_rates(self, group, since=None, until=None, build=None, task_id=None,
+                   difficulty=None):
+        """
+        按维度统计通过率
+        :param group: GROUPS中的维度: task/difficulty/build/day
+        :param since: 起始日期(含), 'YYYY-MM-DD'
+        :param until: 结束日期(含)
+        :param build: 只统计该build
+        :param task_id: 只统计该任务
+        :param difficulty: 只统计该难度
+        :return: [(分组值, 任务名称, 总数, 通过, 失败, 错误)], 任务名称只在按任务分组时有值
+        """
+        column = GROUPS[group][0]
+        conditions, params = [], []
+        for condition, value in (("day >= ?", since), ("day <= ?", until), ("build = ?", build),
+                                 ("task_id = ?", task_id), ("difficulty = ?", difficulty)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        name = "MAX(task_name)" if group == "task" else "NULL"
+        order = DIFFICULTY_ORDER if group == "difficulty" else column
+        return self.conn.execute(
+            f"SELECT {column}, {name}, SUM(total), SUM(passed), SUM(failed), SUM(errors) "
+            f"FROM daily_stats {where} GROUP BY {column} ORDER BY {order}", params).fetchall()
+
+    def close(self):
+        """写入剩余的结果并关闭数据库"""
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, 出错时回滚"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.conn.execute("ROLLBACK")
+            return
+        try:
+            self.conn.execute("COMMIT")
+        except sqlite3.Error:
+            # COMMIT失败时事务仍然打开, 回滚后下一次写入才能重新BEGIN
+            self.conn.execute("ROLLBACK")
+            raise
+
+
+def import_report(db, path, build=DEFAULT_BUILD):
+    """
+    导入一个测试报告(test_report_<时间>.json)
+    :return: 导入的结果条数, 已导入过时为0
+    """
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    run_id = db.start_run(os.path.basename(path), report.get("timestamp"), build,
+                          source="report")
+    if run_id is None:
+        return 0
+    results = report.get("results", [])
+    db.add_results(run_id, results)
+    return len(results)
+
+
+def import_jsonl(db, paths, build=DEFAULT_BUILD):
+    """
+    流式导入results_store写出的JSONL结果文件
+    run_start记录中的build优先于参数build
+    :return: 导入的结果条数, 已导入过的运行跳过
+    """
+    runs = {}  # 运行ID -> 行ID, 已导入过的运行为None
+    count = 0
+    for record in iter_records(paths):
+        run_key = record.get("run")
+        kind = record.get("type", "result")
+        if run_key not in runs:
+            started_at = record.get("timestamp") if kind == "run_start" else None
+            runs[run_key] = db.start_run(run_key, started_at, record.get("build") or build,
+                                         source="jsonl", transport=record.get("transport"))
+        if kind == "result" and runs[run_key] is not None:
+            db.add_result(runs[run_key], record)
+            count += 1
+    db.flush()
+    return count
+
+
+def import_paths(db, paths, build=DEFAULT_BUILD):
+    """
+    导入测试报告和JSONL结果文件
+    :param paths: 文件、目录或通配符, 目录中的test_report_*.json和results_*.jsonl都会导入
+    :return: 导入的结果条数
+    """
+    reports, jsonl = [], []
+    for path in paths:
+        for match in sorted(glob.glob(path)) or [path]:
+            if os.path.isdir(match):
+                reports.extend(sorted(glob.glob(os.path.join(glob.escape(match), 'test_report_*.json'))))
+                jsonl.append(match)
+            elif match.endswith('.jsonl'):
+                jsonl.append(match)
+            else:
+                reports.append(match)
+    count = 0
+    for path in reports:
+        count += import_report(db, path, build)
+    if jsonl:
+        count += import_jsonl(db, jsonl, build)
+    return count
+
+
+def print_pass_rates(group, rows):
+    """打印pass_rates的统计结果"""
+    label = GROUPS[group][1]
+    print("=" * 70)
+    print(f"按{label}统计通过率")
+    print("=" * 70)
+    if not rows:
+        print("没有符合条件的结果")
+        return
+    for key, task_name, total, passed, failed, errors in rows:
+        if group == "task":
+            key = f"任务{key:02d} {task_name or ''}"
+        elif group == "build" and not key:
+            key = "(未指定)"
+        print(f"  {key}: {passed}/{total} ({passed/total*100:.1f}%), "
+              f"失败 {failed}, 错误 {errors}")
+    total = sum(row[2] for row in rows)
+    passed = sum(row[3] for row in rows)
+    print("-" * 70)
+    print(f"总计: {passed}/{total} ({passed/total*100:.1f}%)")
+
+
+if __name__ == "__main__":
+    options = {}
+    for arg in sys.argv[1:]:
+        if arg.startswith('--') and '=' in arg:
+            key, value = arg[2:].split('=', 1)
+            options[key] = value
+    argv = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    command = argv[0] if argv else None
+    if command != "import" and command not in GROUPS:
+        print("用法: python results_db.py import <文件或目录>... [--build=<build>] [--db=<数据库文件>]")
+        print("      python results_db.py task|difficulty|build|day [--since=YYYY-MM-DD] "
+              "[--until=YYYY-MM-DD] [--build=<build>] [--task=<任务编号>] [--difficulty=低|中|高]")
+        sys.exit(1)
+
+    with ResultsDB(options.get('db', DB_FILE)) as db:
+        if command == "import":
+            count = import_paths(db, argv[1:] or ['.'], options.get('build', DEFAULT_BUILD))
+            print(f"✓ 已导入 {count} 条结果到 {db.path}")
+        else:
+            task_id = int(options['task']) if 'task' in options else None
+            print_pass_rates(command, db.pass_rates(command, options.get('since'),
+                                                    options.get('until'), options.get('build'),
+                                                    task_id, options.get('difficulty')))
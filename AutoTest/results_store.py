@@ -0,0 +1,265 @@
+"""
+音乐App自动化测试 - 追加写入的JSONL结果存储
+每完成一个任务验证就向结果文件追加一行紧凑的JSON记录, 不在内存中保留全部结果。
+单个文件超过MAX_FILE_BYTES时切换到下一个分段文件, 每FSYNC_EVERY条记录或FSYNC_INTERVAL秒
+fsync一次, 进程中途退出时最多丢失最后一批记录(读取时跳过写了一半的行)
+
+记录格式(每行一个JSON对象):
+  {"type": "run_start", "run": 运行ID, "timestamp": ..., ...}        运行开始
+  {"type": "result", "run": 运行ID, "task_id": ..., "result": ..., ...} 一个任务的验证结果
+  {"type": "run_end", "run": 运行ID, "timestamp": ..., ...}          运行结束(缓存、计时等运行级别信息)
+
+用法:
+  python results_store.py results/                 # 汇总目录下全部运行的结果
+  python results_store.py results/ --run=20251103_222048_000000
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from metrics import TimingSummary
+
+RESULTS_DIR = 'results'
+# 单个分段文件的最大字节数, 超过时切换到下一个分段
+MAX_FILE_BYTES = 64 * 1024 * 1024
+# 每写入多少条记录fsync一次
+FSYNC_EVERY = 100
+# 距上次fsync超过该秒数时, 下一条记录写入后fsync
+FSYNC_INTERVAL = 1.0
+
+
+def new_run_id():
+    """返回新的运行ID: 当前时间(精确到微秒, 同一秒内开始的多次运行不会写入同一文件)"""
+    return datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+
+
+def segment_path(directory, run_id, part):
+    """返回运行run_id的第part个分段文件路径"""
+    return os.path.join(directory, f"results_{run_id}_{part:04d}.jsonl")
+
+
+class ResultsStore:
+    """
+    一次运行的结果写入器
+    """
+
+    def __init__(self, directory=RESULTS_DIR, run_id=None, max_bytes=MAX_FILE_BYTES,
+                 fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL, **run_info):
+        """
+        :param directory: 结果目录, 不存在时创建
+        :param run_id: 运行ID, 默认为当前时间
+        :param max_bytes: 单个分段文件的最大字节数
+        :param fsync_every: 每写入多少条记录fsync一次
+        :param fsync_interval: fsync的最长间隔(秒)
+        :param run_info: 写入run_start记录的其他字段, 如数据源
+        """
+        self.directory = directory
+        self.run_id = run_id or new_run_id()
+        self.max_bytes = max_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.records = 0
+        self.paths = []
+        self._file = None
+        self._size = 0
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        self._write({"type": "run_start", "run": self.run_id,
+                     "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'), **run_info})
+
+    def _open_segment(self):
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+        path = segment_path(self.directory, self.run_id, len(self.paths))
+        self._file = open(path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+        self.paths.append(path)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        size = len(line.encode('utf-8'))
+        if self._file is None or (self._size and self._size + size > self.max_bytes):
+            self._open_segment()
+        self._file.write(line)
+        self._size += size
+        self._pending += 1
+        if self._pending >= self.fsync_every or \
+                time.monotonic() - self._last_sync >= self.fsync_interval:
+            self._sync()
+
+    def append(self, result):
+        """
+        追加一条验证结果
+        :param result: 与测试报告results中格式相同的dict
+        """
+        self._write({"type": "result", "run": self.run_id, **result})
+        self.records += 1
+
+    def close(self, **run_info):
+        """
+        写入run_end记录并关闭文件
+        :param run_info: 运行级别的信息, 如缓存统计、计时汇总
+        """
+        if self._file is None or self._file.closed:
+            return
+        self._write({"type": "run_end", "run": self.run_id,
+                     "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                     "records": self.records, **run_info})
+        self._sync()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def result_files(paths, run_id=None):
+    """
+    展开结果文件路径
+    :param paths: 文件或目录列表, 目录取其中的results_*.jsonl
+    :param run_id: 只取该运行的分段文件
+    :return: 按文件名排序的路径列表(同一运行的分段按顺序排列)
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    pattern = f"results_{run_id}_*.jsonl" if run_id else "results_*.jsonl"
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(glob.escape(path), pattern))))
+        else:
+            files.append(path)
+    return files
+
+
+def iter_records(paths, run_id=None):
+    """
+    逐行读取结果记录, 不一次性加载文件
+    写了一半的行(进程中途退出)和无法解析的行被跳过
+    :param paths: 文件或目录(列表)
+    :param run_id: 只读取该运行的记录
+    """
+    for path in result_files(paths, run_id):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if run_id is None or record.get("run") == run_id:
+                    yield record
+
+
+def aggregate(records):
+    """
+    流式汇总结果记录, 内存只与任务数和运行数有关
+    :param records: iter_records返回的记录
+    :return: 汇总dict, 格式与测试报告顶层字段相同, 另有按难度、按任务的统计
+    """
+    passed = failed = errors = 0
+    by_difficulty = {}
+    by_task = {}
+    runs = {}
+    timing = TimingSummary()
+    for record in records:
+        kind = record.get("type", "result")
+        if kind == "run_start":
+            runs.setdefault(record.get("run"), {})["start"] = record.get("timestamp")
+            continue
+        if kind == "run_end":
+            runs.setdefault(record.get("run"), {})["end"] = record.get("timestamp")
+            run_timing = record.get("run_timings")
+            if run_timing:
+                timing.add_run(run_timing)
+            continue
+        if kind != "result":
+            continue
+
+        if record.get("error"):
+            status = "errors"
+            errors += 1
+        elif record.get("result"):
+            status = "passed"
+            passed += 1
+        else:
+            status = "failed"
+            failed += 1
+        difficulty = by_difficulty.setdefault(
+            record.get("difficulty"), {"total": 0, "passed": 0, "failed": 0, "errors": 0})
+        difficulty["total"] += 1
+        difficulty[status] += 1
+        task = by_task.setdefault(record.get("task_id"), {
+            "task_name": record.get("task_name"), "total": 0, "passed": 0, "failed": 0, "errors": 0})
+        task["total"] += 1
+        task[status] += 1
+        timing.add(record)
+
+    total = passed + failed + errors
+    return {
+        "runs": len(runs),
+        "total": total,
+        "passed": passed,
+        "failed": failed,
+        "errors": errors,
+        "pass_rate": f"{passed/total*100:.1f}%" if total else "0%",
+        "by_difficulty": by_difficulty,
+        "by_task": dict(sorted(by_task.items(), key=lambda item: _task_order(item[0]))),
+        "timing": timing.summary(),
+    }
+
+
+def _task_order(task_id):
+    # 任务编号按数值排序, 缺少编号的记录排在最后
+    return (0, task_id, "") if isinstance(task_id, int) else (1, 0, str(task_id))
+
+
+def print_summary(summary):
+    """打印aggregate的汇总结果"""
+    print("=" * 70)
+    print(f"运行数: {summary['runs']}, 结果数: {summary['total']}")
+    print(f"通过: {summary['passed']} ({summary['pass_rate']}), 失败: {summary['failed']}, "
+          f"错误: {summary['errors']}")
+    print("=" * 70)
+    for difficulty in ["低", "中", "高"]:
+        stats = summary["by_difficulty"].get(difficulty)
+        if stats:
+            print(f"【{difficulty}难度】 {stats['passed']}/{stats['total']} "
+                  f"({stats['passed']/stats['total']*100:.1f}%)")
+    print("-" * 70)
+    for task_id, stats in summary["by_task"].items():
+        symbol = "✓" if stats["passed"] == stats["total"] else "✗"
+        label = f"任务{task_id:02d}" if isinstance(task_id, int) else f"任务{task_id}"
+        print(f"  {symbol} {label}: {stats['task_name']} - {stats['passed']}/{stats['total']}")
+    timing = summary["timing"]
+    print("-" * 70)
+    print(f"设备耗时: {timing['device_ms']:.1f}ms (读取 {timing['bytes_read']} 字节, "
+          f"重试 {timing['retries']} 次), 解码 {timing['decode_ms']:.1f}ms, "
+          f"判断 {timing['predicate_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    run_id = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--run='):
+            run_id = arg.split('=', 1)[1]
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith('--')] or [RESULTS_DIR]
+    if not result_files(paths, run_id):
+        print(f"✗ 没有找到结果文件: {', '.join(paths)}")
+        sys.exit(1)
+    print_summary(aggregate(iter_records(paths, run_id)))
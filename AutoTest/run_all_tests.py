@@ -7,70 +7,115 @@ import sys
 import json
 from datetime import datetime
 from verification_functions import *
-
-# 定义所有测试用例
+from metrics import TimingSummary, collect_timings, new_timings, rounded
+from planner import build_plan, explain, fetch_plan
+from results_db import DEFAULT_BUILD, ResultsDB
+from results_store import ResultsStore
+from run_single_test import parse_task_numbers
+from snapshot_cache import SNAPSHOT_CACHE
+from state_diff import load_state
+from task_registry import supported_tasks
+from transport import AUTOTEST_FILES, apply_transport_options, get_adb_backend, get_transport
+
+# 定义所有测试用例, 由任务注册表(task_registry.TASKS)派生, 不支持自动化验证的任务(18、23、25、26)不在其中
 # 格式: (任务ID, 任务名称, 验证函数, 参数列表, 难度)
 TEST_CASES = [
-    # 低难度任务
-    (1, "打开app并进入'推荐'首页", task_01_check_open_recommend_page, [], "低"),
-    (2, "从'推荐'页面进入'漫游'页面", task_02_check_navigate_to_stroll, [], "低"),
-    (3, "从'推荐'页面进入'我的'页面", task_03_check_navigate_to_profile, [], "低"),
-    (4, "播放当前暂停的歌曲", task_04_check_play_song, [], "低"),
-    (5, "暂停播放当前的歌曲", task_05_check_pause_song, [], "低"),
-    (6, "切换播放上一首歌曲", task_06_check_switch_previous_song, [None], "低"),
-    (7, "将播放模式改为随机播放", task_07_check_shuffle_mode, [], "低"),
-    (8, "收藏当前歌曲", task_08_check_favorite_song, ["song_001"], "低"),
-    (9, "调节当前音乐播放的音量", task_09_check_volume_adjusted, [None], "低"),
-    (10, "随机进入'我的'中的一个歌单", task_10_check_enter_playlist, [], "低"),
-
-    # 中难度任务
-    (11, "进入'每日推荐'播放第三首歌曲", task_11_check_daily_recommend_third_song, [], "中"),
-    (12, "创建一个新的歌单,并添加首音乐", task_12_check_create_playlist_and_add_song, ["我的最爱"], "中"),
-    (13, "搜索'烟雨'并播放", task_13_check_search_and_play, ["烟雨"], "中"),
-    (14, "搜索某个歌手并播放其中的第一首歌", task_14_check_search_artist_and_play, [], "中"),
-    (15, "查看一首歌曲的详细信息", task_15_check_view_song_detail, ["song_001"], "中"),
-    (16, "查看一首歌曲的歌词", task_16_check_view_lyrics, [], "中"),
-    (17, "漫游播放并设置播放场景为'伪感'", task_17_check_stroll_scene_setting, ["伪感"], "中"),
-    # 任务18: 不支持自动化验证
-    (19, "在排行榜中随机选择打开一个榜单并播放第一首歌曲", task_19_check_rank_list_play, [], "中"),
-    (20, "在推荐歌单中随机选择一个歌单并收藏", task_20_check_collect_playlist, ["playlist_001"], "中"),
-    (21, "删除歌单中的第一首歌", task_21_check_delete_song_from_playlist, ["user_playlist_001", 1], "中"),
-
-    # 高难度任务
-    (22, "查看每周、每月听歌时长", task_22_check_view_listening_stats, ["weekly"], "高"),
-    # 任务23: 不支持自动化验证
-    (24, "在歌单中选择一首歌曲并发表评论", task_24_check_post_comment, ["song_001", None], "高"),
-    # 任务25、26: 不支持自动化验证
-    (27, "更改歌单的排序顺序", task_27_check_playlist_sort_order, ["user_playlist_001", "time_desc"], "高"),
-    (28, "搜索一个歌手,在歌手主页选择一个专辑并收藏", task_28_check_collect_album, ["album_001"], "高"),
-    (29, "将关注列表中的一位歌手删除", task_29_check_unfollow_artist, ["artist_002"], "高"),
-    (30, "搜索一首歌曲并播放MV", task_30_check_play_mv, ["mv_001"], "高"),
-    (31, "更改播放器样式", task_31_check_change_player_style, ["style_001"], "高"),
+    (task["id"], task["name"], task_function(task["id"]), task["args"], task["difficulty"])
+    for task in supported_tasks()
 ]
 
 
-def run_single_test(task_id, task_name, func, args, difficulty):
+def run_single_test(task_id, task_name, func, args, difficulty, cache=None, timings=None,
+                    pre_state=None):
     """
     运行单个测试用例
+    :param cache: SnapshotCache实例, 验证函数读取文件时先查询该缓存
+    :param timings: metrics.new_timings()返回的字典, 运行期间各阶段的耗时累加到其中
+    :param pre_state: 任务开始前的状态, 指定时同时检查任务的change条件
     :return: (task_id, task_name, result, error_msg, difficulty)
     """
     try:
-        result = func(*args)
+        with use_cache(cache), collect_timings(timings), use_pre_state(pre_state):
+            result = func(*args)
         return (task_id, task_name, result, None, difficulty)
     except Exception as e:
         return (task_id, task_name, False, str(e), difficulty)
 
 
-def run_all_tests():
-    """运行所有测试用例"""
+def select_cases(task_ids=None, difficulty=None):
+    """
+    从TEST_CASES中选出要运行的测试用例
+    :param task_ids: 任务编号列表, 为None时不按编号筛选
+    :param difficulty: 难度, 为None时不按难度筛选
+    """
+    return [tc for tc in TEST_CASES
+            if (task_ids is None or tc[0] in task_ids)
+            and (difficulty is None or tc[4] == difficulty)]
+
+
+def load_snapshot(snapshot_mode, cache, plan=None):
+    """
+    开始一次测试运行: 清空上一次运行留下的缓存, 快照模式下一次性拉取状态文件写入缓存
+    :param snapshot_mode: 是否启用快照模式
+    :param cache: 本次运行使用的SnapshotCache
+    :param plan: planner.build_plan生成的读取计划, 指定时只拉取计划中的文件, 否则拉取全部状态文件
+    :return: 快照数据, 未启用或拉取失败时返回None(回退为逐个文件读取并缓存)
+    """
+    cache.clear()
+    if not snapshot_mode:
+        return None
+    if plan is not None:
+        snapshot = fetch_plan(plan, cache)
+    else:
+        # 先取文件版本再读取内容, 读取期间文件变化时下次按版本比较会重新读取
+        versions = cache.versions(get_transport(), AUTOTEST_FILES)
+        snapshot = pull_autotest_snapshot()
+        if snapshot is not None:
+            cache.put_snapshot(get_transport().key, snapshot, versions)
+    if snapshot is None:
+        print("快照拉取失败, 回退为逐个文件读取")
+    return snapshot
+
+
+def run_all_tests(snapshot_mode=True, task_ids=None, results_dir=None, db_path=None,
+                  build=DEFAULT_BUILD, pre_state=None):
+    """
+    运行所有测试用例
+    :param snapshot_mode: 为True时先按读取计划一次拉取所需的状态文件, 所有验证函数共用该快照
+    :param task_ids: 只运行这些任务, 默认为全部
+    :param results_dir: 指定时每条结果追加写入该目录下的JSONL结果文件(results_store), 不在内存中保留结果,
+                        也不生成test_report_<时间>.json
+    :param db_path: 指定时每条结果同时写入该SQLite结果库(results_db)
+    :param build: 被测build, 写入结果文件和结果库
+    :param pre_state: 任务开始前的状态(state_diff.load_state), 指定时还检查任务的change条件
+    """
+    cases = select_cases(task_ids)
+    plan = build_plan([tc[0] for tc in cases])
     print("=" * 70)
     print("音乐App自动化测试 - 批量测试运行器")
     print("=" * 70)
     print(f"开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"测试用例数量: {len(TEST_CASES)}")
+    print(f"测试用例数量: {len(cases)}")
+    print(f"数据源: {get_transport().describe()}")
+    if snapshot_mode:
+        print(f"读取方式: 快照(一次读取 {plan['reads_planned']} 个文件)")
+    else:
+        print("读取方式: 逐个文件读取")
+    if pre_state is not None:
+        print("任务前状态: 已加载, 同时检查状态变化(change条件)")
     print("=" * 70)
     print()
 
+    run_timings = new_timings()
+    with collect_timings(run_timings):
+        load_snapshot(snapshot_mode, SNAPSHOT_CACHE, plan)
+    timing_summary = TimingSummary(run_timings)
+    store = ResultsStore(results_dir, transport=get_transport().describe(),
+                         snapshot=snapshot_mode, build=build) if results_dir else None
+    db = ResultsDB(db_path) if db_path else None
+    db_run = db.start_run(store.run_id if store else None, build=build, source="run_all_tests",
+                          transport=get_transport().describe()) if db else None
+
     results = []
     passed = 0
     failed = 0
@@ -79,20 +124,29 @@ def run_all_tests():
     # 按难度分组
     difficulty_groups = {"低": [], "中": [], "高": []}
 
-    for task_id, task_name, func, args, difficulty in TEST_CASES:
+    for task_id, task_name, func, args, difficulty in cases:
         print(f"[任务{task_id:02d}] {task_name}...", end=" ")
 
+        timings = new_timings()
         task_id_val, task_name_val, result, error_msg, diff = run_single_test(
-            task_id, task_name, func, args, difficulty
+            task_id, task_name, func, args, difficulty, SNAPSHOT_CACHE, timings, pre_state
         )
 
-        results.append({
+        entry = {
             "task_id": task_id_val,
             "task_name": task_name_val,
             "result": result,
             "error": error_msg,
-            "difficulty": diff
-        })
+            "difficulty": diff,
+            "timings": rounded(timings)
+        }
+        timing_summary.add(entry)
+        if db is not None:
+            db.add_result(db_run, entry)
+        if store is not None:
+            store.append(entry)
+        else:
+            results.append(entry)
 
         if error_msg:
             print(f"✗ 错误")
@@ -115,9 +169,25 @@ def run_all_tests():
     print("=" * 70)
     total = passed + failed + errors
     print(f"总计: {total} 个测试")
-    print(f"通过: {passed} ({passed/total*100:.1f}%)")
-    print(f"失败: {failed} ({failed/total*100:.1f}%)")
-    print(f"错误: {errors} ({errors/total*100:.1f}%)")
+    # 没有选中任何测试用例时total为0, 比例记为0
+    print(f"通过: {passed} ({passed/max(total, 1)*100:.1f}%)")
+    print(f"失败: {failed} ({failed/max(total, 1)*100:.1f}%)")
+    print(f"错误: {errors} ({errors/max(total, 1)*100:.1f}%)")
+    cache_stats = SNAPSHOT_CACHE.stats()
+    print(f"缓存: 命中 {cache_stats['hits']} 次, 未命中 {cache_stats['misses']} 次")
+    timing = timing_summary.summary()
+    print(f"设备耗时: {timing['device_ms']:.1f}ms (读取 {timing['bytes_read']} 字节, "
+          f"重试 {timing['retries']} 次), 解码 {timing['decode_ms']:.1f}ms, "
+          f"判断 {timing['predicate_ms']:.1f}ms")
+    if timing["slowest"]:
+        slowest = timing["slowest"][0]
+        print(f"最慢任务: 任务{slowest['task_id']:02d} ({slowest['total_ms']:.1f}ms)")
+    if get_adb_backend() == 'session':
+        from adb_session import session_stats
+        for stats in session_stats():
+            print(f"会话[{stats['serial']}]: {stats['commands']} 条命令, "
+                  f"平均延迟 {stats['avg_ms']}ms, 最大 {stats['max_ms']}ms, "
+                  f"重连 {stats['reconnects']} 次")
     print()
 
     # 按难度打印详细结果
@@ -141,13 +211,25 @@ def run_all_tests():
     print("=" * 70)
 
     # 保存测试报告
-    save_test_report(results, passed, failed, errors)
+    if db is not None:
+        db.close()
+        print(f"\n测试结果已写入结果库: {db.path}")
+    if store is not None:
+        store.close(passed=passed, failed=failed, errors=errors, cache=cache_stats,
+                    run_timings=rounded(run_timings), timing=timing)
+        print(f"\n测试结果已写入: {', '.join(store.paths)}")
+    else:
+        save_test_report(results, passed, failed, errors, cache_stats, {"timing": timing})
 
     return passed, failed, errors
 
 
-def save_test_report(results, passed, failed, errors):
-    """保存测试报告为JSON文件"""
+def save_test_report(results, passed, failed, errors, cache_stats=None, extra=None):
+    """
+    保存测试报告为JSON文件
+    :param cache_stats: 快照缓存统计
+    :param extra: 附加到报告顶层的其他字段, 如多设备运行的设备列表
+    """
     report = {
         "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         "total": len(results),
@@ -157,6 +239,10 @@ def save_test_report(results, passed, failed, errors):
         "pass_rate": f"{passed/len(results)*100:.1f}%" if results else "0%",
         "results": results
     }
+    if cache_stats is not None:
+        report["cache"] = cache_stats
+    if extra:
+        report.update(extra)
 
     report_file = f"test_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
     with open(report_file, 'w', encoding='utf-8') as f:
@@ -165,18 +251,20 @@ def save_test_report(results, passed, failed, errors):
     print(f"\n测试报告已保存到: {report_file}")
 
 
-def run_tests_by_difficulty(difficulty):
+def run_tests_by_difficulty(difficulty, snapshot_mode=True):
     """按难度运行测试"""
     print(f"运行【{difficulty}难度】测试用例")
     print("=" * 70)
 
-    filtered_cases = [tc for tc in TEST_CASES if tc[4] == difficulty]
+    filtered_cases = select_cases(difficulty=difficulty)
     passed = 0
     failed = 0
+    load_snapshot(snapshot_mode, SNAPSHOT_CACHE, build_plan([tc[0] for tc in filtered_cases]))
 
     for task_id, task_name, func, args, diff in filtered_cases:
         print(f"[任务{task_id:02d}] {task_name}...", end=" ")
-        _, _, result, error_msg, _ = run_single_test(task_id, task_name, func, args, diff)
+        _, _, result, error_msg, _ = run_single_test(task_id, task_name, func, args, diff,
+                                                     SNAPSHOT_CACHE)
 
         if error_msg:
             print(f"✗ 错误: {error_msg}")
@@ -193,18 +281,64 @@ def run_tests_by_difficulty(difficulty):
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        # 支持按难度运行
-        difficulty = sys.argv[1]
-        if difficulty in ["低", "中", "高"]:
-            run_tests_by_difficulty(difficulty)
-        else:
-            print(f"无效的难度参数: {difficulty}")
-            print("用法: python run_all_tests.py [低|中|高]")
+    # --live: 关闭快照模式, 每个验证函数各自从设备读取文件
+    snapshot_mode = '--live' not in sys.argv
+    # --backend=session: 通过常驻adb shell会话执行设备命令
+    # --transport=dir:<目录>: 从本地快照目录读取状态文件
+    apply_transport_options(sys.argv[1:])
+    # --results=<目录>: 结果逐条追加写入JSONL结果文件, 代替一次性写出的测试报告
+    # --db=<文件>: 结果同时写入SQLite结果库; --build=<build>: 被测build
+    # --pre=<目录|spec>: 任务开始前保存的状态(state_diff.py capture), 同时检查状态变化
+    results_dir = None
+    db_path = None
+    build = DEFAULT_BUILD
+    pre_source = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--results='):
+            results_dir = arg.split('=', 1)[1]
+        elif arg.startswith('--db='):
+            db_path = arg.split('=', 1)[1]
+        elif arg.startswith('--build='):
+            build = arg.split('=', 1)[1]
+        elif arg.startswith('--pre='):
+            pre_source = arg.split('=', 1)[1]
+    argv = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+
+    usage = ("用法: python run_all_tests.py [低|中|高|任务编号] [--explain] [--live] [--results=<目录>] [--db=<文件>] [--build=<build>] [--pre=<目录>] "
+             "[--backend=subprocess|session|socket] [--transport=<spec>]")
+    difficulty = argv[0] if argv and argv[0] in ["低", "中", "高"] else None
+    task_ids = None
+    if argv and difficulty is None:
+        # 支持按任务编号运行, 格式同run_single_test.py: 1 4 7 / 1-10 / all
+        try:
+            task_ids = parse_task_numbers(argv)
+        except ValueError:
+            print(f"无效的参数: {' '.join(argv)}")
+            print(usage)
+            sys.exit(1)
+        if not select_cases(task_ids):
+            # 如任务18、23、25、26不支持自动化验证, 或编号不存在
+            print(f"没有可运行的测试用例: {' '.join(argv)}")
+            print(usage)
             sys.exit(1)
+
+    if '--explain' in sys.argv:
+        # --explain: 只打印读取计划, 不读取设备
+        explain(build_plan([tc[0] for tc in select_cases(task_ids, difficulty)]))
+    elif difficulty:
+        # 支持按难度运行
+        run_tests_by_difficulty(difficulty, snapshot_mode)
     else:
         # 运行所有测试
-        passed, failed, errors = run_all_tests()
+        pre_state = None
+        if pre_source:
+            try:
+                pre_state = load_state(pre_source)
+            except Exception as e:
+                print(f"✗ 无法读取任务前状态: {e}")
+                sys.exit(2)
+        passed, failed, errors = run_all_tests(snapshot_mode, task_ids, results_dir, db_path, build,
+                                               pre_state)
 
         # 根据结果设置退出码
         if errors > 0:
@@ -6,12 +6,17 @@
   python run_single_test.py 1 4 7 8       # 运行任务1, 4, 7, 8
   python run_single_test.py 1-10          # 运行任务1到10
   python run_single_test.py all           # 运行所有任务
+  python run_single_test.py 1-10 --db=results.db --build=1.2.0  # 结果写入SQLite结果库
 """
 
 import sys
 import os
 import importlib
 
+from results_db import DEFAULT_BUILD, ResultsDB
+from task_registry import TASKS, TASKS_BY_ID, get_task, is_supported
+from verification_functions import task_function
+
 def run_test(task_num):
     """运行指定编号的测试"""
     try:
@@ -25,17 +30,43 @@ def run_test(task_num):
             print(f"✗ 任务{task_num}的测试文件中没有test()函数")
             return False
     except ModuleNotFoundError:
+        if is_supported(task_num):
+            # 只在注册表中定义、还没有测试文件的任务, 按注册表运行
+            return run_registry_test(task_num)
         print(f"✗ 找不到任务{task_num}的测试文件: test_task_{task_num:02d}.py")
         return False
     except Exception as e:
         print(f"✗ 运行任务{task_num}时出错: {e}")
         return False
 
+def run_registry_test(task_num):
+    """按任务注册表中的操作步骤和默认参数运行测试"""
+    task = get_task(task_num)
+    print("=" * 70)
+    print(f"任务{task_num}：{task['name']}")
+    print("=" * 70)
+    print("\n📋 人工操作步骤：")
+    for i, step in enumerate(task["steps"], 1):
+        print(f"  {i}. {step}")
+    print("\n🔍 开始验证...")
+
+    result = task_function(task_num)(*task["args"])
+
+    print("\n" + "=" * 70)
+    if result:
+        print(f"✓ 测试通过 - 任务{task_num}完成")
+    else:
+        print(f"✗ 测试失败 - 任务{task_num}未完成")
+        if task["param_info"]:
+            print(f"提示：{task['param_info']}")
+    print("=" * 70)
+    return result
+
 def parse_task_numbers(args):
     """解析命令行参数，返回要测试的任务编号列表"""
     if not args or args[0] == 'all':
-        # 运行所有任务（1-31）
-        return list(range(1, 32))
+        # 运行注册表中的所有任务
+        return [task["id"] for task in TASKS]
 
     task_nums = []
     for arg in args:
@@ -58,7 +89,15 @@ def main():
         print("  python run_single_test.py all           # 运行所有任务")
         sys.exit(1)
 
-    task_nums = parse_task_numbers(sys.argv[1:])
+    # --db=<文件>: 结果写入SQLite结果库; --build=<build>: 被测build
+    db_path = None
+    build = DEFAULT_BUILD
+    for arg in sys.argv[1:]:
+        if arg.startswith('--db='):
+            db_path = arg.split('=', 1)[1]
+        elif arg.startswith('--build='):
+            build = arg.split('=', 1)[1]
+    task_nums = parse_task_numbers([arg for arg in sys.argv[1:] if not arg.startswith('--')])
 
     print("\n" + "=" * 70)
     print(f"准备运行 {len(task_nums)} 个测试任务")
@@ -97,6 +136,17 @@ def main():
 
     print("=" * 70)
 
+    if db_path:
+        with ResultsDB(db_path) as db:
+            run_id = db.start_run(build=build, source="run_single_test")
+            for task_num, result in results.items():
+                task = TASKS_BY_ID.get(task_num)
+                db.add_result(run_id, {"task_id": task_num,
+                                       "task_name": task["name"] if task else None,
+                                       "difficulty": task["difficulty"] if task else None,
+                                       "result": result})
+        print(f"测试结果已写入结果库: {db_path}")
+
     # 如果有失败的任务，退出码为1
     sys.exit(0 if failed == 0 else 1)
 
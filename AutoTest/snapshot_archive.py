@@ -0,0 +1,506 @@
+"""
+音乐App自动化测试 - 按内容寻址的快照归档
+把大量episode的autotest目录存成一个归档目录: 每个不同的文件内容(blob)按哈希只存一次,
+用从AutoTestHelper输出训练的预设字典(zlib zdict)压缩; episode -> 各状态文件blob的索引为定长记录,
+通过mmap读取, 评估时直接从归档中解压单个文件, 不需要先解包到磁盘
+
+归档目录结构:
+  archive.json   格式版本和状态文件列表(索引中各列对应的文件)
+  dict.bin       压缩字典
+  blobs.pack     依次追加的压缩blob
+  blobs.idx      定长记录: 内容哈希(16字节)、在blobs.pack中的偏移和长度、原始大小, 记录序号即blob编号
+  episodes.idx   定长记录: episode名称(UTF-8, 128字节) + 各状态文件的blob编号(不存在时为0xFFFFFFFF)
+
+同一归档同时只能有一个写入者; 写入顺序为blob数据 -> blob索引 -> episode索引, 中途退出时打开归档会忽略末尾不完整的记录、
+指向blobs.pack末尾之外的blob记录以及引用了这些blob的episode记录
+
+用法:
+  python snapshot_archive.py add archive/ "episodes/*"      # 归档episode目录(归档不存在时创建并训练字典)
+  python snapshot_archive.py list archive/
+  python snapshot_archive.py stats archive/
+  python snapshot_archive.py extract archive/ ep_00017 out/  # 解出一个episode
+"""
+
+import collections
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from transport import AUTOTEST_DIR, AUTOTEST_FILES, Transport
+
+FORMAT_VERSION = 1
+# 压缩字典的最大字节数(zlib的窗口大小)
+DICT_SIZE = 32 * 1024
+# 创建归档时最多用多少个episode训练字典
+TRAIN_EPISODES = 200
+COMPRESS_LEVEL = 9
+# 训练字典时额外使用的样本: App内置的状态文件模板(AutoTestHelper的初始输出)
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', 'app', 'src', 'main', 'assets', 'autotest')
+
+NAME_BYTES = 128
+MISSING_BLOB = 0xFFFFFFFF
+BLOB_RECORD = struct.Struct('<16sQII')  # 哈希, 偏移, 压缩后长度, 原始大小
+
+
+def content_hash(content):
+    """blob的内容哈希"""
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+
+def train_dictionary(samples, size=DICT_SIZE):
+    """
+    从样本文件训练压缩字典
+    Gson格式化输出按行重复(字段名、缩进、常见取值), 统计各行出现在多少个样本中, 按(出现次数 x 行长度)
+    选出最有价值的行拼成字典, 价值最高的放在末尾(离被压缩数据最近, 引用距离最短)
+    :param samples: 文件内容字节列表
+    :param size: 字典的最大字节数
+    :return: 字典字节
+    """
+    counts = collections.Counter()
+    for content in samples:
+        counts.update(set(content.splitlines(keepends=True)))
+    ranked = sorted(counts, key=lambda line: (counts[line] * len(line), line), reverse=True)
+    chosen = []
+    total = 0
+    for line in ranked:
+        if counts[line] < 2 and len(samples) > 1:
+            break
+        if total + len(line) > size:
+            continue
+        chosen.append(line)
+        total += len(line)
+    return b''.join(reversed(chosen))
+
+
+def _episode_dir(directory):
+    """episode目录可以直接存放状态文件, 也可以是包含files/autotest/的App数据目录"""
+    nested = os.path.join(directory, AUTOTEST_DIR)
+    return nested if os.path.isdir(nested) else directory
+
+
+def _read_samples(directories, files):
+    samples = []
+    for directory in directories:
+        root = _episode_dir(directory)
+        for name in files:
+            try:
+                with open(os.path.join(root, name), 'rb') as f:
+                    samples.append(f.read())
+            except FileNotFoundError:
+                continue
+    return samples
+
+
+class SnapshotArchive:
+    """
+    快照归档的读写
+    """
+
+    def __init__(self, path, writable=False):
+        """
+        打开已有的归档
+        :param path: 归档目录
+        :param writable: 是否允许追加episode
+        :raises FileNotFoundError: 归档不存在
+        :raises ValueError: 归档格式版本不支持
+        """
+        self.path = path
+        with open(os.path.join(path, 'archive.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的归档格式版本: {meta.get('version')}")
+        self.files = meta["files"]
+        self._columns = {name: i for i, name in enumerate(self.files)}
+        self.episode_record = struct.Struct(f'<{NAME_BYTES}s{len(self.files)}I')
+        with open(os.path.join(path, 'dict.bin'), 'rb') as f:
+            self.zdict = f.read()
+        self.writable = writable
+        self._maps = {}  # 文件名 -> (mmap, 映射时的大小)
+        self._handles = {}
+        self._episode_total = self._truncate_partial()
+        self._episodes = None  # 名称 -> 记录序号, 第一次按名称查找时建立
+        self._hashes = None  # 内容哈希 -> blob编号, 第一次写入时建立
+        if writable:
+            self._handles = {name: open(os.path.join(path, name), 'ab')
+                             for name in ('blobs.pack', 'blobs.idx', 'episodes.idx')}
+
+    @classmethod
+    def create(cls, path, samples=(), dict_size=DICT_SIZE):
+        """
+        创建空归档
+        :param samples: 训练压缩字典的样本文件内容, 内置模板总是包含在内
+        :return: 可写的SnapshotArchive
+        """
+        os.makedirs(path, exist_ok=True)
+        samples = list(samples) + _read_samples([TEMPLATE_DIR], AUTOTEST_FILES)
+        with open(os.path.join(path, 'dict.bin'), 'wb') as f:
+            f.write(train_dictionary(samples, dict_size))
+        for name in ('blobs.pack', 'blobs.idx', 'episodes.idx'):
+            open(os.path.join(path, name), 'wb').close()
+        with open(os.path.join(path, 'archive.json'), 'w', encoding='utf-8') as f:
+            json.dump({"version": FORMAT_VERSION, "files": AUTOTEST_FILES}, f,
+                      ensure_ascii=False, indent=2)
+        return cls(path, writable=True)
+
+    def _valid_records(self, name, record, valid):
+        """索引中的有效记录数: 从最后一条完整记录往前检查, 直到满足valid(通常只需读一条)"""
+        file_path = os.path.join(self.path, name)
+        count = os.path.getsize(file_path) // record.size
+        with open(file_path, 'rb') as f:
+            while count:
+                f.seek((count - 1) * record.size)
+                if valid(record.unpack(f.read(record.size))):
+                    break
+                count -= 1
+        return count
+
+    def _truncate_partial(self):
+        """
+        上次写入中途退出时, 截掉索引末尾不完整的记录、数据没有完整写入blobs.pack的blob记录,
+        以及引用了这些blob的episode记录; 只读打开时不修改文件, 只忽略这些记录
+        :return: 有效的episode记录数
+        """
+        pack_size = os.path.getsize(os.path.join(self.path, 'blobs.pack'))
+        blob_total = self._valid_records('blobs.idx', BLOB_RECORD,
+                                         lambda entry: entry[1] + entry[2] <= pack_size)
+        episode_total = self._valid_records(
+            'episodes.idx', self.episode_record,
+            lambda entry: all(blob == MISSING_BLOB or blob < blob_total for blob in entry[1:]))
+        if self.writable:
+            for name, size in (('blobs.idx', blob_total * BLOB_RECORD.size),
+                               ('episodes.idx', episode_total * self.episode_record.size)):
+                file_path = os.path.join(self.path, name)
+                if os.path.getsize(file_path) != size:
+                    with open(file_path, 'r+b') as f:
+                        f.truncate(size)
+        return episode_total
+
+    def _map(self, name):
+        """
+        返回文件的mmap
+        只读归档只映射一次(打开后其他进程追加的episode不可见); 可写归档在文件增长后重新映射
+        """
+        entry = self._maps.get(name)
+        if entry is not None and not self.writable:
+            return entry[0]
+        file_path = os.path.join(self.path, name)
+        size = os.path.getsize(file_path)
+        if entry is not None and entry[1] == size:
+            return entry[0]
+        if entry is not None:
+            entry[0].close()
+        if size == 0:
+            self._maps.pop(name, None)
+            return b''
+        with open(file_path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[name] = (mapped, size)
+        return mapped
+
+    # ---------- 索引 ----------
+
+    def blob_count(self):
+        return len(self._map('blobs.idx')) // BLOB_RECORD.size
+
+    def _episode_names(self):
+        if self._episodes is None:
+            index = self._map('episodes.idx')
+            self._episodes = {}
+            for number in range(self._episode_total):
+                raw = index[number * self.episode_record.size:
+                            number * self.episode_record.size + NAME_BYTES]
+                # 同名episode以最后归档的为准
+                self._episodes[raw.rstrip(b'\0').decode('utf-8')] = number
+        return self._episodes
+
+    def episodes(self):
+        """返回归档中的episode名称(按归档顺序)"""
+        return list(self._episode_names())
+
+    def __contains__(self, episode):
+        return episode in self._episode_names()
+
+    def _blob_numbers(self, episode):
+        number = self._episode_names().get(episode)
+        if number is None:
+            raise KeyError(f"归档中没有该episode: {episode}")
+        record = self.episode_record.unpack_from(self._map('episodes.idx'),
+                                                 number * self.episode_record.size)
+        return record[1:]
+
+    def _blob_entry(self, blob):
+        return BLOB_RECORD.unpack_from(self._map('blobs.idx'), blob * BLOB_RECORD.size)
+
+    # ---------- 读取 ----------
+
+    def read_file(self, episode, name):
+        """
+        读取episode中的一个状态文件
+        :return: 文件内容字节, episode中不存在该文件时返回None
+        :raises KeyError: 归档中没有该episode
+        """
+        column = self._columns.get(name)
+        if column is None:
+            return None
+        blob = self._blob_numbers(episode)[column]
+        if blob == MISSING_BLOB:
+            return None
+        _, offset, length, _ = self._blob_entry(blob)
+        decompressor = zlib.decompressobj(zdict=self.zdict)
+        return decompressor.decompress(self._map('blobs.pack')[offset:offset + length]) + \
+            decompressor.flush()
+
+    def stat_files(self, episode, names):
+        """
+        不解压取得文件版本
+        :return: {文件名: (原始大小, 内容哈希)或None}
+        """
+        blobs = self._blob_numbers(episode)
+        stats = {}
+        for name in names:
+            column = self._columns.get(name)
+            blob = blobs[column] if column is not None else MISSING_BLOB
+            if blob == MISSING_BLOB:
+                stats[name] = None
+            else:
+                digest, _, _, raw_size = self._blob_entry(blob)
+                stats[name] = (raw_size, digest.hex())
+        return stats
+
+    # ---------- 写入 ----------
+
+    def _blob_hashes(self):
+        if self._hashes is None:
+            index = self._map('blobs.idx')
+            self._hashes = {BLOB_RECORD.unpack_from(index, i * BLOB_RECORD.size)[0]: i
+                            for i in range(len(index) // BLOB_RECORD.size)}
+        return self._hashes
+
+    def add_blob(self, content):
+        """
+        存入一个blob, 相同内容只存一次
+        :return: (blob编号, 是否新增)
+        """
+        hashes = self._blob_hashes()
+        digest = content_hash(content)
+        if digest in hashes:
+            return hashes[digest], False
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zdict=self.zdict)
+        data = compressor.compress(content) + compressor.flush()
+        pack = self._handles['blobs.pack']
+        offset = pack.seek(0, os.SEEK_END)
+        pack.write(data)
+        # 先把blob数据写出再写索引记录, 否则索引的缓冲区先写满时会出现指向blobs.pack末尾之外的记录
+        pack.flush()
+        self._handles['blobs.idx'].write(BLOB_RECORD.pack(digest, offset, len(data), len(content)))
+        hashes[digest] = len(hashes)
+        return hashes[digest], True
+
+    def add_episode(self, name, contents):
+        """
+        归档一个episode
+        :param name: episode名称
+        :param contents: {文件名: 文件内容字节或None}
+        :return: 新增的blob数
+        """
+        if not self.writable:
+            raise IOError("归档以只读方式打开")
+        encoded = name.encode('utf-8')
+        if len(encoded) > NAME_BYTES:
+            raise ValueError(f"episode名称超过{NAME_BYTES}字节: {name}")
+        blobs = []
+        added = 0
+        for file_name in self.files:
+            content = contents.get(file_name)
+            if content is None:
+                blobs.append(MISSING_BLOB)
+                continue
+            blob, new = self.add_blob(content)
+            blobs.append(blob)
+            added += new
+        # blob写入磁盘后再写episode记录, 中途退出时不会出现指向不存在blob的记录
+        self._handles['blobs.pack'].flush()
+        self._handles['blobs.idx'].flush()
+        episodes = self._episode_names()
+        self._handles['episodes.idx'].write(self.episode_record.pack(encoded, *blobs))
+        self._handles['episodes.idx'].flush()
+        episodes[name] = self._episode_total
+        self._episode_total += 1
+        return added
+
+    def add_directory(self, directory, name=None):
+        """
+        归档一个episode目录
+        :param name: episode名称, 默认为目录名
+        :return: 新增的blob数
+        """
+        root = _episode_dir(directory)
+        contents = {}
+        for file_name in self.files:
+            try:
+                with open(os.path.join(root, file_name), 'rb') as f:
+                    contents[file_name] = f.read()
+            except FileNotFoundError:
+                contents[file_name] = None
+        return self.add_episode(name or os.path.basename(os.path.normpath(directory)), contents)
+
+    def stats(self):
+        """
+        :return: {"episodes", "blobs", "files", "raw_bytes", "unique_bytes", "stored_bytes"}
+                 raw_bytes为全部episode文件的原始总大小, unique_bytes为去重后的原始大小,
+                 stored_bytes为归档实际占用的大小
+        """
+        sizes = [self._blob_entry(i)[3] for i in range(self.blob_count())]
+        raw = files = 0
+        index = self._map('episodes.idx')
+        for number in self._episode_names().values():
+            for blob in self.episode_record.unpack_from(
+                    index, number * self.episode_record.size)[1:]:
+                if blob != MISSING_BLOB:
+                    raw += sizes[blob]
+                    files += 1
+        stored = sum(os.path.getsize(os.path.join(self.path, name))
+                     for name in ('archive.json', 'dict.bin', 'blobs.pack', 'blobs.idx',
+                                  'episodes.idx'))
+        return {"episodes": len(self._episode_names()), "blobs": len(sizes), "files": files,
+                "raw_bytes": raw, "unique_bytes": sum(sizes), "stored_bytes": stored}
+
+    def close(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+        for mapped, _ in self._maps.values():
+            mapped.close()
+        self._maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# 按路径复用的只读归档(每个进程打开一次)
+_open_archives = {}
+
+
+def open_archive(path):
+    """返回路径对应的只读归档, 同一进程中复用"""
+    key = os.path.abspath(path)
+    archive = _open_archives.get(key)
+    if archive is None:
+        archive = _open_archives[key] = SnapshotArchive(path)
+    return archive
+
+
+class ArchiveTransport(Transport):
+    """
+    从快照归档中读取一个episode的状态文件
+    """
+
+    def __init__(self, path, episode):
+        """
+        :param path: 归档目录
+        :param episode: episode名称
+        """
+        self.archive = open_archive(path)
+        self.episode = episode
+        self.key = f"archive:{os.path.abspath(path)}#{episode}"
+
+    def read_file(self, name):
+        return self.archive.read_file(self.episode, name)
+
+    def stat_files(self, names):
+        return self.archive.stat_files(self.episode, names)
+
+    def list_files(self):
+        stats = self.archive.stat_files(self.episode, self.archive.files)
+        return sorted(name for name, stat in stats.items() if stat is not None)
+
+    def describe(self):
+        return f"归档 {self.archive.path} 中的episode {self.episode}"
+
+
+def archive_directories(path, directories):
+    """
+    把episode目录追加到归档, 归档不存在时用前TRAIN_EPISODES个目录训练字典并创建
+    :return: (归档的episode数, 新增的blob数)
+    """
+    if os.path.exists(os.path.join(path, 'archive.json')):
+        archive = SnapshotArchive(path, writable=True)
+    else:
+        archive = SnapshotArchive.create(
+            path, _read_samples(directories[:TRAIN_EPISODES], AUTOTEST_FILES))
+    added = 0
+    with archive:
+        for directory in directories:
+            added += archive.add_directory(directory)
+    return len(directories), added
+
+
+def extract_episode(archive, episode, out_dir):
+    """把一个episode的状态文件解出到目录"""
+    os.makedirs(out_dir, exist_ok=True)
+    count = 0
+    for name in archive.files:
+        content = archive.read_file(episode, name)
+        if content is None:
+            continue
+        with open(os.path.join(out_dir, name), 'wb') as f:
+            f.write(content)
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    command = argv[0] if argv else None
+    if command not in ("add", "list", "stats", "extract") or len(argv) < 2:
+        print("用法: python snapshot_archive.py add <归档目录> <episode目录通配符>...")
+        print("      python snapshot_archive.py list|stats <归档目录>")
+        print("      python snapshot_archive.py extract <归档目录> <episode> <输出目录>")
+        sys.exit(1)
+    archive_path = argv[1]
+
+    if command == "add":
+        directories = sorted({path for pattern in argv[2:] for path in glob.glob(pattern)
+                              if os.path.isdir(path)})
+        if not directories:
+            print(f"✗ 没有匹配的episode目录: {' '.join(argv[2:])}")
+            sys.exit(1)
+        count, added = archive_directories(archive_path, directories)
+        print(f"✓ 已归档 {count} 个episode, 新增 {added} 个blob")
+        sys.exit(0)
+
+    try:
+        archive = SnapshotArchive(archive_path)
+    except FileNotFoundError:
+        print(f"✗ 归档不存在: {archive_path}")
+        sys.exit(1)
+    with archive:
+        if command == "list":
+            for name in archive.episodes():
+                print(name)
+        elif command == "stats":
+            stats = archive.stats()
+            print(f"episode: {stats['episodes']}, 文件: {stats['files']}, blob: {stats['blobs']}")
+            print(f"原始大小: {stats['raw_bytes']} 字节, 去重后: {stats['unique_bytes']} 字节, "
+                  f"归档占用: {stats['stored_bytes']} 字节")
+            if stats['stored_bytes']:
+                print(f"压缩比: {stats['raw_bytes'] / stats['stored_bytes']:.1f}x")
+        else:
+            if len(argv) < 4:
+                print("用法: python snapshot_archive.py extract <归档目录> <episode> <输出目录>")
+                sys.exit(1)
+            try:
+                count = extract_episode(archive, argv[2], argv[3])
+            except KeyError as e:
+                print(f"✗ {e.args[0]}")
+                sys.exit(1)
+            print(f"✓ 已解出 {count} 个文件到 {argv[3]}")
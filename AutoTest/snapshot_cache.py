@@ -0,0 +1,181 @@
+"""
+状态文件快照缓存
+同一次测试运行中多个验证函数读取同一个文件时(如任务4/5/6/7/9/11/19都读playback_state.json),
+只从设备下载并解析一次, 其余读取直接命中缓存
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+# 未指定设备序列号时使用的键, adb在这种情况下会读取ANDROID_SERIAL或唯一连接的设备
+DEFAULT_SERIAL = "default"
+
+# 文件不存在: 作为缓存数据时为负缓存条目(get返回该值而不是None), 作为版本时表示数据源上没有该文件
+MISSING_FILE = object()
+
+
+def resolve_serial(serial=None):
+    """
+    返回缓存使用的设备键
+    :param serial: 设备序列号, 为None时使用ANDROID_SERIAL环境变量
+    """
+    return serial or os.environ.get('ANDROID_SERIAL') or DEFAULT_SERIAL
+
+
+class SnapshotCache:
+    """
+    以(设备序列号, 文件名)为键缓存解析后的JSON数据
+
+    淘汰规则:
+    1. 条目写入超过max_age秒后过期, 下次读取时视为未命中并删除
+    2. 条目数超过max_entries时淘汰最久未使用的条目(LRU)
+    3. 读取时传入version(文件的lastUpdated或mtime)且与缓存不一致时, 删除该条目;
+       versions()用一次stat_files取回数据源上全部文件的版本, revalidate_after秒内复用
+    4. 调用invalidate()显式失效
+
+    文件不存在也会被缓存(数据为MISSING_FILE), 同样按以上规则淘汰
+    """
+
+    def __init__(self, max_entries=64, max_age=30.0, revalidate_after=1.0):
+        """
+        :param max_entries: 最多缓存的文件数
+        :param max_age: 条目有效期(秒), 为None时不按时间过期
+        :param revalidate_after: versions()查询结果的有效期(秒)
+        """
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.revalidate_after = revalidate_after
+        self._entries = OrderedDict()  # key -> (data, version, stored_at)
+        self._versions = {}  # 设备键 -> ({文件名: 版本}, 查询时间)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, serial, name, version=None):
+        """
+        读取缓存
+        :param serial: 设备序列号
+        :param name: 文件名, 如"playback_state.json"
+        :param version: 调用方已知的文件版本, 与缓存版本不同则视为过期
+        :return: 缓存的JSON数据, 文件不存在的条目返回MISSING_FILE, 未命中时返回None
+        """
+        key = (resolve_serial(serial), name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                data, cached_version, stored_at = entry
+                expired = (self.max_age is not None and
+                           time.monotonic() - stored_at > self.max_age)
+                stale = version is not None and version != cached_version
+                if expired or stale:
+                    del self._entries[key]
+                    self.evictions += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return data
+            self.misses += 1
+            return None
+
+    def put(self, serial, name, data, version=None):
+        """
+        写入缓存, 数据为None(读取失败)时不缓存
+        :param data: JSON数据, 文件不存在时为MISSING_FILE
+        :param version: 文件版本, 默认取数据中的lastUpdated字段(按需解码的LazyDocument同样适用)
+        """
+        if data is None:
+            return
+        if version is None and isinstance(data, Mapping):
+            version = data.get('lastUpdated')
+        key = (resolve_serial(serial), name)
+        with self._lock:
+            self._entries[key] = (data, version, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def put_snapshot(self, serial, snapshot, versions=None):
+        """
+        将pull_autotest_snapshot返回的整份快照写入缓存
+        :param versions: 读取快照之前由versions()取得的文件版本; 提供时快照中为None且版本为MISSING_FILE的
+                         文件缓存为不存在, 版本早于内容时下次按版本比较会重新读取, 不会返回过期的数据
+        """
+        versions = versions or {}
+        for name, data in snapshot.items():
+            version = versions.get(name)
+            if data is None and version is MISSING_FILE:
+                data = MISSING_FILE
+            self.put(serial, name, data, version)
+
+    def versions(self, transport, files):
+        """
+        查询数据源上文件的当前版本, 一次stat_files取回全部文件, revalidate_after秒内复用查询结果
+        :param transport: Transport(使用key和stat_files)
+        :param files: 文件名列表
+        :return: {文件名: 版本, 文件不存在时为MISSING_FILE}, 查询失败时返回空字典(只按有效期淘汰)
+        """
+        key = resolve_serial(transport.key)
+        with self._lock:
+            entry = self._versions.get(key)
+            if entry is not None and time.monotonic() - entry[1] <= self.revalidate_after \
+                    and all(name in entry[0] for name in files):
+                return entry[0]
+        queried_at = time.monotonic()
+        try:
+            stats = transport.stat_files(list(files))
+        except Exception:
+            return {}
+        versions = {name: MISSING_FILE if stat is None else stat for name, stat in stats.items()}
+        with self._lock:
+            self._versions[key] = (versions, queried_at)
+        return versions
+
+    def invalidate(self, serial=None, name=None):
+        """
+        显式失效缓存条目
+        :param serial: 只失效该设备的条目, 为None时匹配所有设备
+        :param name: 只失效该文件, 为None时匹配所有文件
+        :return: 失效的条目数
+        """
+        with self._lock:
+            keys = [key for key in self._entries
+                    if (serial is None or key[0] == resolve_serial(serial)) and
+                    (name is None or key[1] == name)]
+            for key in keys:
+                del self._entries[key]
+            self.evictions += len(keys)
+            if serial is None:
+                self._versions.clear()
+            else:
+                self._versions.pop(resolve_serial(serial), None)
+            return len(keys)
+
+    def clear(self):
+        """清空缓存并重置计数器"""
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """返回缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": f"{self.hits/total*100:.1f}%" if total else "0%"
+            }
+
+
+# 进程内共享的默认缓存
+SNAPSHOT_CACHE = SnapshotCache()
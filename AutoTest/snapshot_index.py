@@ -0,0 +1,85 @@
+"""
+快照索引
+收藏歌曲、歌单、专辑和搜索记录的成员检查原本每次都线性扫描数组。这里对快照中的数组按指定字段
+建立一次哈希索引(如songId -> 收藏记录, (query, action) -> 搜索记录), 之后同一快照上的查找都是O(1),
+用同一份状态验证大量带参数的任务实例时不必重复扫描
+
+索引按数组对象缓存: 快照/缓存中的同一份数据在多次验证间复用同一个数组对象, 索引只在第一次查找时建立
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+# 最多保留索引的数组数, 超过时淘汰最久未使用的
+MAX_INDEXED_ARRAYS = 64
+
+# id(数组) -> (数组, {字段元组: 索引}), 同时持有数组本身, 保证缓存期间id不会被其他对象复用
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def build_index(items, fields):
+    """
+    为数组建立哈希索引
+    :param items: 元素为JSON对象的数组
+    :param fields: 作为键的字段名元组, 如('query', 'action')
+    :return: {字段值元组: 第一个具有该键的元素}, 缺少的字段按None处理, 字段值不可哈希的元素不进入索引
+    """
+    index = {}
+    for item in items:
+        if not isinstance(item, Mapping):
+            continue
+        key = tuple(item.get(field) for field in fields)
+        try:
+            index.setdefault(key, item)
+        except TypeError:
+            continue
+    return index
+
+
+def get_index(items, fields):
+    """
+    返回数组按fields建立的索引, 同一数组对象只建立一次
+    :param items: 快照中的数组
+    :param fields: 作为键的字段名元组
+    """
+    fields = tuple(fields)
+    with _lock:
+        entry = _indexes.get(id(items))
+        if entry is not None and entry[0] is items:
+            _indexes.move_to_end(id(items))
+            index = entry[1].get(fields)
+            if index is not None:
+                return index
+        else:
+            entry = (items, {})
+            _indexes[id(items)] = entry
+            while len(_indexes) > MAX_INDEXED_ARRAYS:
+                _indexes.popitem(last=False)
+    index = build_index(items, fields)
+    with _lock:
+        entry[1][fields] = index
+    return index
+
+
+def lookup(items, fields, values):
+    """
+    查找数组中第一个fields字段依次等于values的元素
+    :return: 找到的元素, 没有时返回None
+    """
+    try:
+        return get_index(items, fields).get(tuple(values))
+    except TypeError:
+        # 查找值不可哈希(如列表)时退回线性扫描
+        for item in items:
+            if isinstance(item, Mapping) and all(
+                    item.get(field) == value for field, value in zip(fields, values)):
+                return item
+        return None
+
+
+def clear_indexes():
+    """丢弃全部索引"""
+    with _lock:
+        _indexes.clear()
@@ -0,0 +1,312 @@
+"""
+音乐App自动化测试 - 任务前后状态差异
+任务执行前保存一份状态文件(pre-state), 执行后与当前状态比较, 得到RFC 6902风格的差异列表:
+  {"op": "add", "path": "/favoriteSongs/song_002", "value": {...}}
+  {"op": "remove", "path": "/followedArtists/artist_002", "old": {...}}
+  {"op": "replace", "path": "/currentSong/songId", "value": "song_009", "old": "song_010"}
+与RFC 6902的区别: remove和replace附带原值(old); 元素带有songId、playlistId等自然键的数组按键对齐,
+路径中用键值而不是下标表示元素, 插入或删除一个元素不会让后面的元素全部变成replace
+
+按键对齐用dict索引, 比较一个数组是线性时间; 按键对齐时不比较元素的顺序。
+没有自然键的对象数组按下标比较, 元素为互不相同的字符串/数字(如歌单的songIds)时按值对齐
+
+用法:
+  python state_diff.py capture pre/                          # 任务开始前保存当前状态
+  python state_diff.py diff pre/                             # 比较保存的状态与当前状态
+  python state_diff.py diff pre/ post/ --file=user_playlists.json
+  python run_all_tests.py 6 9 21 29 --pre=pre/               # 有pre-state时额外检查任务的change条件
+"""
+
+import json
+import os
+import sys
+from collections.abc import Mapping
+
+from baseline_seed import seed_directory
+from task_registry import pointer_segment
+from transport import (AUTOTEST_FILES, DirectoryTransport, apply_transport_options, create_transport,
+                       decode_json, get_transport)
+
+# 数组元素的自然键, 按顺序取元素中第一个存在且在数组内唯一的字段
+ARRAY_KEYS = ('songId', 'playlistId', 'artistId', 'searchId', 'albumId', 'mvId', 'commentId',
+              'styleId')
+
+# 按元素的值对齐(元素为互不相同的字符串或数字)
+VALUE_KEY = object()
+
+
+def _unique(items, field):
+    """数组中每个元素都有该字段, 且字段值可哈希、互不相同"""
+    seen = set()
+    for item in items:
+        if not isinstance(item, Mapping) or field not in item:
+            return False
+        value = item[field]
+        if isinstance(value, (dict, list)) or value in seen:
+            return False
+        seen.add(value)
+    return True
+
+
+def _unique_values(items):
+    values = set()
+    for item in items:
+        if not isinstance(item, (str, int, float)) or isinstance(item, bool) or item in values:
+            return False
+        values.add(item)
+    return True
+
+
+def array_key(before, after):
+    """
+    选择对齐两个数组的方式
+    :return: 自然键字段名, VALUE_KEY(按值对齐), 或None(按下标比较)
+    """
+    first = (before or after or [None])[0]
+    if isinstance(first, Mapping):
+        for field in ARRAY_KEYS:
+            if field in first and _unique(before, field) and _unique(after, field):
+                return field
+        return None
+    if first is not None and _unique_values(before) and _unique_values(after):
+        return VALUE_KEY
+    return None
+
+
+def _same(old, new):
+    # True == 1, 但布尔值变为数字也是变化
+    return old == new and isinstance(old, bool) == isinstance(new, bool)
+
+
+def _diff(before, after, path, emit):
+    if isinstance(before, Mapping) and isinstance(after, Mapping):
+        for key in before:
+            child = path + '/' + pointer_segment(key)
+            if key in after:
+                _diff(before[key], after[key], child, emit)
+            else:
+                emit({"op": "remove", "path": child, "old": before[key]})
+        for key in after:
+            if key not in before:
+                emit({"op": "add", "path": path + '/' + pointer_segment(key), "value": after[key]})
+        return
+    if isinstance(before, list) and isinstance(after, list):
+        key = array_key(before, after)
+        if key is None:
+            _diff_positional(before, after, path, emit)
+        else:
+            _diff_keyed(before, after, key, path, emit)
+        return
+    if not _same(before, after):
+        emit({"op": "replace", "path": path, "value": after, "old": before})
+
+
+def _diff_positional(before, after, path, emit):
+    common = min(len(before), len(after))
+    for index in range(common):
+        if before[index] != after[index]:
+            _diff(before[index], after[index], f"{path}/{index}", emit)
+    # 从后往前删除, 按顺序应用时下标仍然有效
+    for index in range(len(before) - 1, common - 1, -1):
+        emit({"op": "remove", "path": f"{path}/{index}", "old": before[index]})
+    for index in range(common, len(after)):
+        emit({"op": "add", "path": f"{path}/{index}", "value": after[index]})
+
+
+def _diff_keyed(before, after, key, path, emit):
+    if key is VALUE_KEY:
+        old = dict.fromkeys(before)
+        new = dict.fromkeys(after)
+    else:
+        old = {item[key]: item for item in before}
+        new = {item[key]: item for item in after}
+    for value, item in old.items():
+        child = path + '/' + pointer_segment(value)
+        if value not in new:
+            emit({"op": "remove", "path": child, "old": value if key is VALUE_KEY else item})
+        elif key is not VALUE_KEY and item != new[value]:
+            # 未变化的元素用一次(C实现的)相等比较跳过, 不逐个字段递归
+            _diff(item, new[value], child, emit)
+    for value, item in new.items():
+        if value not in old:
+            emit({"op": "add", "path": path + '/' + pointer_segment(value),
+                  "value": value if key is VALUE_KEY else item})
+
+
+def diff(before, after, path=''):
+    """
+    比较两个JSON值
+    :param before: 任务前的值, 文件不存在时传None
+    :param after: 任务后的值
+    :param path: 差异路径的前缀(JSON Pointer)
+    :return: 差异列表, 相同时为空
+    """
+    changes = []
+    _diff(before, after, path, changes.append)
+    return changes
+
+
+class StateDiff:
+    """
+    一个状态文件的前后差异, 按路径建立索引供task_registry的change条件查询
+    """
+
+    def __init__(self, changes):
+        self.changes = changes
+        self._by_path = {}
+        self._children = {}
+        self._touched = set()
+        for change in changes:
+            path = change["path"]
+            self._by_path[path] = change
+            self._children.setdefault(path.rpartition('/')[0], []).append(change)
+            while path not in self._touched:
+                self._touched.add(path)
+                if not path:
+                    break
+                path = path.rpartition('/')[0]
+
+    @classmethod
+    def between(cls, before, after):
+        """比较任务前后的文件数据, 任务前文件不存在时视为空对象"""
+        return cls(diff({} if before is None else before, after))
+
+    def get(self, pointer):
+        """:return: 该路径上的差异, 没有时返回None"""
+        return self._by_path.get(pointer)
+
+    def children(self, pointer):
+        """:return: 直接位于该路径下的差异(如数组中增删的元素)"""
+        return self._children.get(pointer, [])
+
+    def touches(self, pointer):
+        """
+        该路径或其下的任一字段是否有变化; 上层路径整体被替换、添加或删除时(如currentSong
+        由null变为对象), 其下的路径也视为有变化
+        """
+        if pointer in self._touched:
+            return True
+        while pointer:
+            pointer = pointer.rpartition('/')[0]
+            if pointer in self._by_path:
+                return True
+        return False
+
+    def __iter__(self):
+        return iter(self.changes)
+
+    def __len__(self):
+        return len(self.changes)
+
+
+def open_source(spec):
+    """本地目录或transport描述字符串(如archive:<目录>#<episode>) -> Transport"""
+    return DirectoryTransport(spec) if os.path.isdir(spec) else create_transport(spec)
+
+
+def capture(directory, transport=None, files=None):
+    """
+    保存当前状态作为pre-state: 一次读取状态文件, 原样写入本地目录(DirectoryTransport格式)
+    :param transport: 数据源, 默认为当前生效的Transport
+    :return: 保存的文件数
+    """
+    contents = (transport or get_transport()).read_files(files or AUTOTEST_FILES)
+    contents = {name: content for name, content in contents.items() if content is not None}
+    seed_directory(directory, contents)
+    return len(contents)
+
+
+def load_state(source, files=None):
+    """
+    读取并完整解码一份状态
+    :param source: 本地目录、transport描述字符串或Transport
+    :return: {文件名: JSON数据或None}
+    """
+    transport = open_source(source) if isinstance(source, str) else source
+    files = files or AUTOTEST_FILES
+    state = {}
+    for name, content in transport.read_files(files).items():
+        try:
+            state[name] = decode_json(content) if content is not None else None
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            print(f"状态文件格式错误: {name}, 错误: {e}")
+            state[name] = None
+    return state
+
+
+def diff_states(before, after, files=None):
+    """
+    比较两份状态
+    :return: {文件名: 差异列表}, 只包含有变化的文件; 文件被删除时为一个对根路径的remove
+    """
+    changes = {}
+    for name in files or sorted(set(before) | set(after)):
+        old, new = before.get(name), after.get(name)
+        if old is None and new is None:
+            continue
+        if new is None:
+            file_changes = [{"op": "remove", "path": "", "old": old}]
+        else:
+            file_changes = diff({} if old is None else old, new)
+        if file_changes:
+            changes[name] = file_changes
+    return changes
+
+
+def _format_value(value):
+    text = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    return text if len(text) <= 80 else text[:77] + '...'
+
+
+def print_changes(changes):
+    """打印diff_states的结果"""
+    if not changes:
+        print("✓ 没有变化")
+        return
+    for name, file_changes in changes.items():
+        print(f"{name} ({len(file_changes)} 处变化)")
+        for change in file_changes:
+            path = change["path"] or "/"
+            if change["op"] == "add":
+                print(f"  + {path} = {_format_value(change['value'])}")
+            elif change["op"] == "remove":
+                print(f"  - {path} (原值 {_format_value(change['old'])})")
+            else:
+                print(f"  ~ {path}: {_format_value(change['old'])} → "
+                      f"{_format_value(change['value'])}")
+
+
+if __name__ == "__main__":
+    # --transport=<spec>: capture的数据源, diff未指定任务后状态时的数据源
+    # --file=<文件名>: 只比较该文件; --json: 以JSON输出差异
+    apply_transport_options(sys.argv[1:])
+    files = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--file='):
+            files = [arg.split('=', 1)[1]]
+    argv = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    command = argv[0] if argv else None
+
+    if command == "capture" and len(argv) == 2:
+        try:
+            count = capture(argv[1], files=files)
+        except Exception as e:
+            print(f"✗ 保存状态失败: {e}")
+            sys.exit(1)
+        print(f"✓ 已保存 {count} 个状态文件 → {argv[1]} ({get_transport().describe()})")
+    elif command == "diff" and len(argv) in (2, 3):
+        try:
+            before = load_state(argv[1], files)
+            after = load_state(argv[2] if len(argv) == 3 else get_transport(), files)
+        except Exception as e:
+            print(f"✗ 读取状态失败: {e}")
+            sys.exit(1)
+        changes = diff_states(before, after, files)
+        if '--json' in sys.argv:
+            print(json.dumps(changes, ensure_ascii=False, indent=2))
+        else:
+            print_changes(changes)
+    else:
+        print("用法: python state_diff.py capture <目录> [--transport=<spec>]\n"
+              "      python state_diff.py diff <任务前目录> [任务后目录] [--file=<文件名>] [--json]")
+        sys.exit(1)
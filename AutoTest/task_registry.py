@@ -0,0 +1,593 @@
+"""
+音乐App自动化测试 - 任务注册表
+以数据描述每个任务的状态文件、判断条件、参数和难度(与验证逻辑表.md一一对应),
+导入时把判断条件编译为闭包。TEST_CASES、polling的文件映射和generate_test_files都从这里派生,
+新增任务只需在TASKS中添加一项, 不必再手写验证函数和测试文件
+
+判断条件是嵌套元组, 第一个元素为操作名:
+  ('eq', 路径, 值)              路径上的值等于给定值(与dict.get相同, 只缺最后一级字段时按null比较)
+  ('in', 路径, [值, ...])       路径上的值为列表中的某一个
+  ('gt', 路径, 值)              路径上的值大于给定值
+  ('contains', 路径, 子串)       路径上的字符串包含子串
+  ('exists', 路径)              路径存在
+  ('not_null', 路径)            路径上的值不为null(不存在视为null)
+  ('truthy', 路径)              路径上的值为真
+  ('any', 数组路径, 条件)         数组中有元素满足条件(条件中的路径相对于元素)
+  ('find', 数组路径, 匹配条件, 条件)  数组中第一个满足匹配条件的元素满足条件, 没有匹配的元素时不通过
+  ('latest', 数组路径, 排序字段, 条件) 排序字段最大的元素满足条件, 数组为空时不通过
+  ('lookup', 数组路径, (字段, ...), (值, ...), 条件)
+                                 字段依次等于给定值的第一个元素满足条件, 没有这样的元素时不通过;
+                                 按字段建立的哈希索引每个快照只建立一次(snapshot_index)
+  ('and', 条件, ...) / ('or', 条件, ...)
+  ('if_param', 参数名, 条件1, 条件2)          参数为真时检查条件1, 否则检查条件2
+  ('if_param_given', 参数名, 条件1, 条件2)    参数不为None时检查条件1, 否则检查条件2
+  ('true',)                      总是通过
+路径用"."连接, 也可以是元组; 值和路径中的某一段可以用P('参数名')引用任务参数
+
+任务的change条件只看任务后的状态无法判断的"变化", 有任务开始前的状态(pre-state)时在check之外额外检查,
+判断对象为state_diff.StateDiff(前后状态的差异); 路径中按键对齐的数组元素用键值表示,
+如('playlists', P('playlist_id'), 'songCount'):
+  ('changed', 路径)             路径上的值(或其下的任一字段)发生了变化
+  ('increased', 路径) / ('decreased', 路径)  路径上的数值增大/减小
+  ('added', 路径) / ('removed', 路径)        路径在任务后新增/被删除
+  ('removed_item', 数组路径)     数组中有元素被删除
+
+任务的sequence条件描述多步操作的先后顺序, 只由temporal.py(python temporal.py 14 28)在合并后的
+事件流上检查, check_task、run_all_tests等常规验证不检查它, 任务是否通过仍只看check:
+  ('seq', (来源, 条件), ...)     各步骤依次出现(中间可以夹杂其他事件), 条件作用于事件记录
+  ('within', 秒数, ('seq', ...))  从第一步到最后一步不超过给定秒数
+来源为temporal.EVENT_LOGS中的事件日志(navigation、playback、search、task、album)
+"""
+
+from collections.abc import Mapping
+
+from snapshot_index import lookup
+
+# 参数没有默认值(必须传入)
+REQUIRED = object()
+
+# 路径不存在
+MISSING = object()
+
+
+class P:
+    """引用任务参数"""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"P({self.name!r})"
+
+
+# 任务定义
+# id: 任务编号; name: 任务指令; difficulty: 难度; file: 读取的状态文件(files/autotest/下)
+# function: verification_functions中对应的验证函数名; params: [(参数名, 默认值)], 默认值为REQUIRED时必须传入
+# args: 批量运行时使用的参数; check: 判断条件, 为None表示不支持自动化验证(reason为原因)
+# change: (可选)对任务前后状态差异的判断条件, 只在有pre-state时检查
+# sequence: (可选)多步操作在事件日志中的先后顺序, 只由temporal.py检查, 不影响常规验证的结果
+# steps: 人工操作步骤; param_info: 参数说明(用于生成测试文件)
+# extra: (可选)生成测试文件时的附加内容: usage为文档中"使用方式"的各行, verify_note为(传入参数时, 不传参数时)
+#        开始验证时的说明(前者中的{}替换为第一个参数), hints为测试失败时打印的提示行
+TASKS = [
+    # 低难度任务
+    {"id": 1, "name": "打开app并进入'推荐'首页", "difficulty": "低",
+     "file": "app_state.json", "function": "task_01_check_open_recommend_page",
+     "params": [], "args": [],
+     "check": ('eq', 'currentPage', 'recommend'),
+     "steps": ["在模拟器中启动App", "确认进入推荐首页（底部导航栏默认选中\"推荐\"）"],
+     "param_info": ""},
+    {"id": 2, "name": "从'推荐'页面进入'漫游'页面", "difficulty": "低",
+     "file": "app_state.json", "function": "task_02_check_navigate_to_stroll",
+     "params": [], "args": [],
+     "check": ('eq', 'currentPage', 'stroll'),
+     "steps": ["确保App已启动在推荐页面", "点击底部导航栏的\"漫游\"按钮（音符图标）",
+               "确认页面切换到漫游界面"],
+     "param_info": ""},
+    {"id": 3, "name": "从'推荐'页面进入'我的'页面", "difficulty": "低",
+     "file": "app_state.json", "function": "task_03_check_navigate_to_profile",
+     "params": [], "args": [],
+     "check": ('in', 'currentPage', ['profile', 'my', 'mine']),
+     "steps": ["确保App已启动", "点击底部导航栏的\"我的\"按钮（人像图标）", "确认页面切换到我的页面"],
+     "param_info": ""},
+    {"id": 4, "name": "播放当前暂停的歌曲", "difficulty": "低",
+     "file": "playback_state.json", "function": "task_04_check_play_song",
+     "params": [], "args": [],
+     "check": ('eq', 'isPlaying', True),
+     "steps": ["进入播放页面（点击底部\"播放\"按钮）", "确保当前歌曲处于暂停状态",
+               "点击播放按钮（中间的播放图标）", "确认歌曲开始播放"],
+     "param_info": ""},
+    {"id": 5, "name": "暂停播放当前的歌曲", "difficulty": "低",
+     "file": "playback_state.json", "function": "task_05_check_pause_song",
+     "params": [], "args": [],
+     "check": ('eq', 'isPlaying', False),
+     "steps": ["进入播放页面", "点击暂停按钮"],
+     "param_info": ""},
+    {"id": 6, "name": "切换播放上一首歌曲", "difficulty": "低",
+     "file": "playback_state.json", "function": "task_06_check_switch_previous_song",
+     "params": [("expected_song_id", None)], "args": [None],
+     # 没有指定期望ID时, 只要有currentSong就认为切换成功
+     "check": ('if_param', 'expected_song_id',
+               ('eq', 'currentSong.songId', P('expected_song_id')),
+               ('exists', 'currentSong.songId')),
+     "change": ('changed', 'currentSong.songId'),
+     "steps": ["进入播放页面", "点击上一首按钮（←）"],
+     "param_info": "可选参数：expected_song_id（期望的歌曲ID）"},
+    {"id": 7, "name": "将播放模式改为随机播放", "difficulty": "低",
+     "file": "playback_state.json", "function": "task_07_check_shuffle_mode",
+     "params": [], "args": [],
+     "check": ('eq', 'playbackMode', 'shuffle'),
+     "steps": ["进入播放页面", "找到播放模式切换按钮（通常在播放控制区域）",
+               "多次点击直到切换到随机播放模式（显示随机图标）"],
+     "param_info": ""},
+    {"id": 8, "name": "收藏当前歌曲", "difficulty": "低",
+     "file": "user_favorites.json", "function": "task_08_check_favorite_song",
+     "params": [("song_id", REQUIRED)], "args": ["song_001"],
+     "check": ('lookup', 'favoriteSongs', ('songId',), (P('song_id'),), ('true',)),
+     "steps": ["进入播放页面，确保有歌曲正在播放或暂停", "点击收藏按钮（通常是爱心图标）",
+               "看到\"成功收藏\"提示"],
+     "param_info": "参数：song_id（歌曲ID），默认'song_001'"},
+    {"id": 9, "name": "调节当前音乐播放的音量", "difficulty": "低",
+     "file": "playback_state.json", "function": "task_09_check_volume_adjusted",
+     "params": [("expected_volume", None)], "args": [None],
+     # 没有指定期望音量时, 只要volume字段存在就认为成功
+     "check": ('if_param_given', 'expected_volume',
+               ('eq', 'volume', P('expected_volume')),
+               ('exists', 'volume')),
+     "change": ('changed', 'volume'),
+     "steps": ["进入播放页面", "调整音量滑块或按钮"],
+     "param_info": "可选参数：expected_volume（期望的音量值0-100）"},
+    {"id": 10, "name": "随机进入'我的'中的一个歌单", "difficulty": "低",
+     "file": "user_playlists.json", "function": "task_10_check_enter_playlist",
+     "params": [], "args": [],
+     "check": ('not_null', 'currentViewingPlaylist'),
+     "steps": ["进入我的页面", "点击任意一个歌单"],
+     "param_info": ""},
+
+    # 中难度任务
+    {"id": 11, "name": "进入'每日推荐'播放第三首歌曲", "difficulty": "中",
+     "file": "playback_state.json", "function": "task_11_check_daily_recommend_third_song",
+     "params": [], "args": [],
+     "check": ('and',
+               ('eq', 'currentSong.source', 'daily_recommend'),
+               ('contains', 'currentSong.sourceDetail', '第3首')),
+     "steps": ["进入推荐页面", "点击'每日推荐'", "点击第3首歌曲播放"],
+     "param_info": ""},
+    {"id": 12, "name": "创建一个新的歌单,并添加首音乐", "difficulty": "中",
+     "file": "user_playlists.json", "function": "task_12_check_create_playlist_and_add_song",
+     "params": [("playlist_name", None)], "args": ["我的最爱"],
+     # 不传歌单名称时检查最新创建的歌单
+     "check": ('if_param_given', 'playlist_name',
+               ('lookup', 'playlists', ('playlistName',), (P('playlist_name'),),
+                ('gt', 'songCount', 0)),
+               ('latest', 'playlists', 'createTime', ('gt', 'songCount', 0))),
+     "steps": ["进入我的页面", "点击创建歌单",
+               "输入歌单名称（可以是任意数字或名称，如\"1\"、\"2\"、\"测试歌单\"等）", "添加歌曲"],
+     "param_info": "参数：playlist_name（歌单名称），默认'我的最爱'",
+     "extra": {"usage": ["方式1（推荐）：不传参数，自动检查最新创建的歌单",
+                         "  python test_task_12.py",
+                         "",
+                         "方式2：传入歌单名称，检查指定歌单",
+                         "  python test_task_12.py 1",
+                         "  python test_task_12.py 2",
+                         "  python test_task_12.py 测试歌单"],
+               "verify_note": ("检查歌单名称: {}", "检查最新创建的歌单"),
+               "hints": ["  - 方式1（推荐）：不传参数，自动检查最新创建的歌单",
+                         "    python test_task_12.py",
+                         "  - 方式2：传入歌单名称（可以是数字如 1, 2, 3）",
+                         "    python test_task_12.py 1",
+                         "    python test_task_12.py 测试歌单"]}},
+    {"id": 13, "name": "搜索'烟雨'并播放", "difficulty": "中",
+     "file": "search_history.json", "function": "task_13_check_search_and_play",
+     "params": [("search_query", "稻香")], "args": ["烟雨"],
+     "check": ('lookup', 'searches', ('query', 'action'), (P('search_query'), 'play'), ('true',)),
+     "steps": ["点击搜索按钮", "输入'烟雨'", "点击搜索结果播放"],
+     "param_info": "参数：search_query（搜索关键词），默认'烟雨'"},
+    {"id": 14, "name": "搜索某个歌手并播放其中的第一首歌", "difficulty": "中",
+     "file": "search_history.json", "function": "task_14_check_search_artist_and_play",
+     "params": [], "args": [],
+     "check": ('lookup', 'searches', ('resultType', 'action'), ('artist', 'play'), ('true',)),
+     # 搜索结果中点击歌手 -> 歌手主页 -> 播放页(只由temporal.py检查)
+     "sequence": ('within', 600, ('seq',
+                                  ('search', ('eq', 'resultType', 'artist')),
+                                  ('navigation', ('eq', 'page', 'singer')),
+                                  ('navigation', ('eq', 'page', 'play')))),
+     "steps": ["点击搜索", "搜索歌手名", "进入歌手页面", "播放第一首歌"],
+     "param_info": ""},
+    {"id": 15, "name": "查看一首歌曲的详细信息", "difficulty": "中",
+     "file": "app_state.json", "function": "task_15_check_view_song_detail",
+     "params": [("song_id", REQUIRED)], "args": ["song_001"],
+     "check": ('and',
+               ('eq', 'currentPage', 'song_detail'),
+               ('eq', 'currentSongId', P('song_id'))),
+     "steps": ["找到一首歌曲", "点击进入歌曲详情页面"],
+     "param_info": "参数：song_id（歌曲ID），默认'song_001'"},
+    {"id": 16, "name": "查看一首歌曲的歌词", "difficulty": "中",
+     "file": "app_state.json", "function": "task_16_check_view_lyrics",
+     "params": [], "args": [],
+     "check": ('or', ('eq', 'showLyrics', True), ('eq', 'currentPage', 'lyrics')),
+     "steps": ["进入播放页面", "点击显示歌词按钮"],
+     "param_info": ""},
+    {"id": 17, "name": "漫游播放并设置播放场景为'伪感'", "difficulty": "中",
+     "file": "player_settings.json", "function": "task_17_check_stroll_scene_setting",
+     "params": [("scene_name", REQUIRED)], "args": ["伪感"],
+     "check": ('eq', 'strollMode.scene', P('scene_name')),
+     "steps": ["进入漫游页面（点击底部\"漫游\"按钮）", "点击场景选择按钮（通常在页面上方）",
+               "在场景列表中找到并点击\"伪感\"场景", "确认场景已切换"],
+     "param_info": "参数：scene_name（场景名称），默认'伪感'"},
+    {"id": 18, "name": "打开一首歌曲的评论区并随机复制一条评论", "difficulty": "中",
+     "file": None, "function": "task_18_check_copy_comment",
+     "params": [], "args": [], "check": None,
+     "reason": "无法可靠验证剪贴板内容",
+     "steps": [], "param_info": ""},
+    {"id": 19, "name": "在排行榜中随机选择打开一个榜单并播放第一首歌曲", "difficulty": "中",
+     "file": "playback_state.json", "function": "task_19_check_rank_list_play",
+     "params": [], "args": [],
+     "check": ('or',
+               ('contains', 'currentSong.source', 'rank'),
+               ('contains', 'currentSong.source', '榜单')),
+     "steps": ["进入排行榜", "选择一个榜单", "播放第一首歌"],
+     "param_info": ""},
+    {"id": 20, "name": "在推荐歌单中随机选择一个歌单并收藏", "difficulty": "中",
+     "file": "collected_items.json", "function": "task_20_check_collect_playlist",
+     "params": [("playlist_id", REQUIRED)], "args": ["playlist_001"],
+     "check": ('lookup', 'collectedPlaylists', ('playlistId',), (P('playlist_id'),), ('true',)),
+     "steps": ["进入推荐", "找到推荐歌单", "点击收藏"],
+     "param_info": "参数：playlist_id（歌单ID），默认'playlist_001'"},
+    {"id": 21, "name": "删除歌单中的第一首歌", "difficulty": "中",
+     "file": "user_playlists.json", "function": "task_21_check_delete_song_from_playlist",
+     "params": [("playlist_id", REQUIRED), ("expected_count", REQUIRED)],
+     "args": ["user_playlist_001", 1],
+     "check": ('lookup', 'playlists', ('playlistId',), (P('playlist_id'),),
+               ('eq', 'songCount', P('expected_count'))),
+     "change": ('decreased', ('playlists', P('playlist_id'), 'songCount')),
+     "steps": ["进入歌单", "选择第一首歌", "删除"],
+     "param_info": "参数：playlist_id, expected_count（删除后的歌曲数量）"},
+
+    # 高难度任务
+    {"id": 22, "name": "查看每周、每月听歌时长", "difficulty": "高",
+     "file": "listening_stats.json", "function": "task_22_check_view_listening_stats",
+     "params": [("stat_type", REQUIRED)], "args": ["weekly"],
+     "check": ('eq', ('viewedStats', P('stat_type')), True),
+     "steps": ["进入我的页面", "点击听歌时长", "查看周/月统计"],
+     "param_info": "参数：stat_type（'weekly'或'monthly'），默认'weekly'"},
+    {"id": 23, "name": "分享一首歌曲到微信朋友圈", "difficulty": "高",
+     "file": None, "function": "task_23_check_share_to_wechat",
+     "params": [], "args": [], "check": None,
+     "reason": "外部应用交互无法验证",
+     "steps": [], "param_info": ""},
+    {"id": 24, "name": "在歌单中选择一首歌曲并发表评论", "difficulty": "高",
+     "file": "comments.json", "function": "task_24_check_post_comment",
+     "params": [("song_id", REQUIRED), ("comment_content", REQUIRED)],
+     "args": ["song_001", None],
+     # 检查该歌曲的第一条评论; 传入评论内容时还需内容一致
+     "check": ('lookup', 'userComments', ('songId',), (P('song_id'),),
+               ('if_param', 'comment_content',
+                ('eq', 'content', P('comment_content')),
+                ('true',))),
+     "steps": ["进入歌曲", "点击评论区", "输入评论", "发表"],
+     "param_info": "参数：song_id, comment_content（可选，用于精确匹配）"},
+    {"id": 25, "name": "邀请好友一起听歌", "difficulty": "高",
+     "file": None, "function": "task_25_check_invite_friend",
+     "params": [], "args": [], "check": None,
+     "reason": "多用户功能无法验证",
+     "steps": [], "param_info": ""},
+    {"id": 26, "name": "听歌识曲", "difficulty": "高",
+     "file": None, "function": "task_26_check_song_recognition",
+     "params": [], "args": [], "check": None,
+     "reason": "跨应用功能过于复杂",
+     "steps": [], "param_info": ""},
+    {"id": 27, "name": "更改歌单的排序顺序", "difficulty": "高",
+     "file": "user_playlists.json", "function": "task_27_check_playlist_sort_order",
+     "params": [("playlist_id", REQUIRED), ("expected_order", REQUIRED)],
+     "args": ["user_playlist_001", "time_desc"],
+     "check": ('lookup', 'playlists', ('playlistId',), (P('playlist_id'),),
+               ('eq', 'sortOrder', P('expected_order'))),
+     "steps": ["进入歌单", "打开设置", "选择排序方式"],
+     "param_info": "参数：playlist_id, expected_order（如'time_desc'）"},
+    {"id": 28, "name": "搜索一个歌手,在歌手主页选择一个专辑并收藏", "difficulty": "高",
+     "file": "collected_items.json", "function": "task_28_check_collect_album",
+     "params": [("album_id", REQUIRED)], "args": ["album_001"],
+     "check": ('lookup', 'collectedAlbums', ('albumId',), (P('album_id'),), ('true',)),
+     # 搜索歌手 -> 歌手主页 -> 收藏专辑(只由temporal.py检查)
+     "sequence": ('within', 600, ('seq',
+                                  ('search', ('eq', 'resultType', 'artist')),
+                                  ('navigation', ('eq', 'page', 'singer')),
+                                  ('album', ('eq', 'albumId', P('album_id'))))),
+     "steps": ["搜索歌手", "进入歌手页面", "选择专辑", "收藏"],
+     "param_info": "参数：album_id，默认'album_001'"},
+    {"id": 29, "name": "将关注列表中的一位歌手删除", "difficulty": "高",
+     "file": "followed_artists.json", "function": "task_29_check_unfollow_artist",
+     "params": [("artist_id", None)], "args": ["artist_002"],
+     # 没有指定artist_id时, 只要有recentlyUnfollowed记录就算通过
+     "check": ('if_param', 'artist_id',
+               ('eq', 'recentlyUnfollowed', P('artist_id')),
+               ('truthy', 'recentlyUnfollowed')),
+     "change": ('if_param', 'artist_id',
+                ('removed', ('followedArtists', P('artist_id'))),
+                ('removed_item', 'followedArtists')),
+     "steps": ["进入关注列表", "找到歌手", "取消关注"],
+     "param_info": "参数：artist_id，默认'artist_002'"},
+    {"id": 30, "name": "搜索一首歌曲并播放MV", "difficulty": "高",
+     "file": "mv_playback.json", "function": "task_30_check_play_mv",
+     "params": [("mv_id", REQUIRED)], "args": ["mv_001"],
+     "check": ('and',
+               ('eq', 'currentMV.mvId', P('mv_id')),
+               ('eq', 'currentMV.isPlaying', True)),
+     "steps": ["搜索歌曲", "找到MV", "播放"],
+     "param_info": "参数：mv_id，默认'mv_001'"},
+    {"id": 31, "name": "更改播放器样式", "difficulty": "高",
+     "file": "player_settings.json", "function": "task_31_check_change_player_style",
+     "params": [("style_id", REQUIRED)], "args": ["style_001"],
+     "check": ('eq', 'playerStyle.styleId', P('style_id')),
+     "steps": ["进入播放器设置", "选择样式"],
+     "param_info": "参数：style_id，默认'style_001'"},
+]
+
+
+# ==================== 判断条件编译 ====================
+
+def _compile_value(value):
+    """编译一个值: P引用在调用时从参数中取, 其他值原样返回"""
+    if isinstance(value, P):
+        name = value.name
+        return lambda params: params[name]
+    return lambda params: value
+
+
+def _compile_path(path, default=MISSING):
+    """
+    编译路径为取值函数
+    :param default: 上一级对象存在而最后一级字段不存在时返回的值
+    :return: get(obj, params), 路径不存在时返回MISSING
+    """
+    keys = tuple(path.split('.')) if isinstance(path, str) else tuple(path)
+    if not any(isinstance(key, P) for key in keys):
+        parents, last = keys[:-1], keys[-1]
+
+        def get(obj, params):
+            for key in parents:
+                if not isinstance(obj, Mapping) or key not in obj:
+                    return MISSING
+                obj = obj[key]
+            return obj.get(last, default) if isinstance(obj, Mapping) else MISSING
+        return get
+
+    resolvers = [_compile_value(key) for key in keys]
+    parents, last = resolvers[:-1], resolvers[-1]
+
+    def get(obj, params):
+        for resolve in parents:
+            key = resolve(params)
+            if not isinstance(obj, Mapping) or key not in obj:
+                return MISSING
+            obj = obj[key]
+        return obj.get(last(params), default) if isinstance(obj, Mapping) else MISSING
+    return get
+
+
+def pointer_segment(key):
+    """JSON Pointer(RFC 6901)中的一段: ~写作~0, /写作~1"""
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def _compile_pointer(path):
+    """
+    编译路径为JSON Pointer, 用于在state_diff.StateDiff中查找变化
+    :return: pointer(params)
+    """
+    keys = tuple(path.split('.')) if isinstance(path, str) else tuple(path)
+    resolvers = [_compile_value(key) for key in keys]
+    return lambda params: ''.join('/' + pointer_segment(resolve(params)) for resolve in resolvers)
+
+
+def _compile_change(op, path):
+    """编译作用于前后状态差异(StateDiff)的判断条件"""
+    pointer = _compile_pointer(path)
+    if op == 'changed':
+        return lambda diff, params: diff.touches(pointer(params))
+    if op in ('added', 'removed'):
+        return lambda diff, params: (diff.get(pointer(params)) or {}).get('op') == \
+            ('add' if op == 'added' else 'remove')
+    if op == 'removed_item':
+        return lambda diff, params: any(
+            change['op'] == 'remove' for change in diff.children(pointer(params)))
+
+    def compare(diff, params):
+        change = diff.get(pointer(params))
+        if change is None or change['op'] != 'replace':
+            return False
+        old, new = change['old'], change['value']
+        if not all(isinstance(value, (int, float)) and not isinstance(value, bool)
+                   for value in (old, new)):
+            return False
+        return new > old if op == 'increased' else new < old
+    return compare
+
+
+def _items(obj):
+    """数组路径上的值, 不是数组时视为空"""
+    return obj if isinstance(obj, list) else ()
+
+
+def compile_check(check):
+    """
+    把判断条件编译为闭包
+    :param check: 判断条件元组
+    :return: predicate(data, params) -> bool
+    """
+    op = check[0]
+    if op == 'true':
+        return lambda data, params: True
+    if op in ('and', 'or'):
+        parts = [compile_check(part) for part in check[1:]]
+        if op == 'and':
+            return lambda data, params: all(part(data, params) for part in parts)
+        return lambda data, params: any(part(data, params) for part in parts)
+    if op in ('if_param', 'if_param_given'):
+        name = check[1]
+        then, otherwise = compile_check(check[2]), compile_check(check[3])
+        if op == 'if_param':
+            return lambda data, params: (then if params[name] else otherwise)(data, params)
+        return lambda data, params: (
+            then if params[name] is not None else otherwise)(data, params)
+    if op in ('changed', 'increased', 'decreased', 'added', 'removed', 'removed_item'):
+        return _compile_change(op, check[1])
+
+    get = _compile_path(check[1])
+    if op == 'exists':
+        return lambda data, params: get(data, params) is not MISSING
+    if op == 'not_null':
+        return lambda data, params: get(data, params) not in (MISSING, None)
+    if op == 'truthy':
+        return lambda data, params: get(data, params) not in (MISSING, None) and \
+            bool(get(data, params))
+    if op in ('eq', 'in', 'gt', 'contains'):
+        expected = _compile_value(check[2])
+        if op == 'eq':
+            # 与验证函数中的obj.get(字段) == 值一致: 字段不存在时按None比较
+            get = _compile_path(check[1], default=None)
+
+        def compare(data, params):
+            value = get(data, params)
+            if value is MISSING:
+                return False
+            target = expected(params)
+            if op == 'eq':
+                return value == target
+            if op == 'in':
+                return value in target
+            if op == 'gt':
+                return isinstance(value, (int, float)) and value > target
+            return isinstance(value, str) and target in value
+        return compare
+    if op == 'any':
+        item_check = compile_check(check[2])
+        return lambda data, params: any(
+            item_check(item, params) for item in _items(get(data, params)))
+    if op == 'find':
+        match, item_check = compile_check(check[2]), compile_check(check[3])
+
+        def find(data, params):
+            for item in _items(get(data, params)):
+                if match(item, params):
+                    return item_check(item, params)
+            return False
+        return find
+    if op == 'lookup':
+        fields = tuple(check[2])
+        values = [_compile_value(value) for value in check[3]]
+        item_check = compile_check(check[4])
+
+        def indexed(data, params):
+            items = get(data, params)
+            if not isinstance(items, list):
+                return False
+            item = lookup(items, fields, [value(params) for value in values])
+            return item is not None and item_check(item, params)
+        return indexed
+    if op == 'latest':
+        sort_key, item_check = check[2], compile_check(check[3])
+
+        def latest(data, params):
+            items = [item for item in _items(get(data, params)) if isinstance(item, Mapping)]
+            if not items:
+                return False
+            return item_check(max(items, key=lambda item: item.get(sort_key) or 0), params)
+        return latest
+    raise ValueError(f"未知的判断条件: {op}")
+
+
+# 任务编号 -> 任务定义
+TASKS_BY_ID = {task["id"]: task for task in TASKS}
+
+# 任务编号 -> 编译后的判断条件(导入时编译一次)
+PREDICATES = {task["id"]: compile_check(task["check"]) for task in TASKS if task["check"]}
+
+# 任务编号 -> 编译后的change条件
+CHANGE_PREDICATES = {task["id"]: compile_check(task["change"]) for task in TASKS if task.get("change")}
+
+
+def get_task(task_id):
+    """
+    按编号取任务定义
+    :raises KeyError: 任务不存在
+    """
+    return TASKS_BY_ID[task_id]
+
+
+def is_supported(task_id):
+    """任务是否支持自动化验证"""
+    return task_id in PREDICATES
+
+
+def supported_tasks():
+    """返回支持自动化验证的任务定义列表"""
+    return [task for task in TASKS if task["check"]]
+
+
+def bind_params(task, args=(), kwargs=None):
+    """
+    把位置参数和关键字参数绑定为参数字典
+    :raises TypeError: 缺少必须的参数或参数过多
+    """
+    kwargs = dict(kwargs or {})
+    names = [name for name, _ in task["params"]]
+    if len(args) > len(names):
+        raise TypeError(f"任务{task['id']}最多接受{len(names)}个参数, 实际传入{len(args)}个")
+    params = dict(zip(names, args))
+    for name, default in task["params"][len(args):]:
+        if name in kwargs:
+            params[name] = kwargs.pop(name)
+        elif default is REQUIRED:
+            raise TypeError(f"任务{task['id']}缺少参数: {name}")
+        else:
+            params[name] = default
+    if kwargs:
+        raise TypeError(f"任务{task['id']}不接受参数: {', '.join(kwargs)}")
+    return params
+
+
+def evaluate(task_id, data, *args, **kwargs):
+    """
+    对已读取的状态文件数据执行任务的判断条件
+    :param data: 任务的状态文件解码后的数据, 为None(文件不存在)时不通过
+    :return: 是否通过
+    """
+    task = get_task(task_id)
+    params = bind_params(task, args, kwargs)
+    if not data:
+        return False
+    return PREDICATES[task_id](data, params)
+
+
+def has_change_check(task_id):
+    """任务是否定义了对前后状态差异的判断条件"""
+    return task_id in CHANGE_PREDICATES
+
+
+def evaluate_change(task_id, diff, *args, **kwargs):
+    """
+    对任务前后的状态差异执行任务的change条件
+    :param diff: state_diff.StateDiff
+    :return: 是否通过, 任务没有change条件时总是通过
+    """
+    if task_id not in CHANGE_PREDICATES:
+        return True
+    params = bind_params(get_task(task_id), args, kwargs)
+    return CHANGE_PREDICATES[task_id](diff, params)
+
+
+def files_for(task_ids):
+    """
+    返回一组任务需要读取的状态文件(去重, 保持任务顺序)
+    :param task_ids: 任务编号列表
+    """
+    files = []
+    for task_id in task_ids:
+        name = TASKS_BY_ID[task_id]["file"] if task_id in TASKS_BY_ID else None
+        if name and name not in files:
+            files.append(name)
+    return files
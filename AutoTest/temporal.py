@@ -0,0 +1,207 @@
+"""
+音乐App自动化测试 - 事件序列检查
+AutoTestHelper把导航、播放、搜索、任务完成等操作按时间顺序追加到各状态文件的历史数组中。
+任务14("搜索歌手并播放第一首歌")、任务28("搜索、进入歌手主页、收藏专辑")实际上是先后顺序的约束:
+这里把各事件日志按时间戳归并(heapq.merge)为一个事件流, 在一次线性扫描中用编译好的有限状态匹配器
+检查任务注册表中的sequence条件(格式见task_registry)
+
+事件日志用partial_json.iter_array逐个元素解码, 每个日志任何时候只持有一个元素, 百万级事件的
+episode也只扫描一遍; 每个日志内的记录按追加顺序即时间顺序排列
+
+用法:
+  python temporal.py 14 28                       # 检查任务14、28的操作顺序
+  python temporal.py 28 --transport=dir:<目录>    # 检查本地快照
+  python temporal.py 14 --events                 # 同时打印合并后的事件流
+"""
+
+import calendar
+import functools
+import heapq
+import sys
+import time
+
+from partial_json import iter_array
+from run_single_test import parse_task_numbers
+from task_registry import TASKS_BY_ID, bind_params, compile_check, get_task
+from transport import apply_transport_options, get_transport
+
+# 事件来源 -> (状态文件, 历史数组字段, 时间戳字段)
+EVENT_LOGS = {
+    "search": ("search_history.json", "searches", "timestamp"),
+    "navigation": ("app_state.json", "navigationHistory", "timestamp"),
+    "playback": ("playback_state.json", "playbackHistory", "timestamp"),
+    "task": ("task_logs.json", "tasks", "completedTime"),
+    "album": ("collected_items.json", "collectedAlbums", "collectedTime"),
+}
+
+# 时间戳只精确到秒, 同一秒内的事件按来源的顺序排列:
+# 点击搜索结果先记录搜索再跳转页面, 收藏等页面上的操作在跳转之后
+_SOURCE_ORDER = {source: order for order, source in enumerate(EVENT_LOGS)}
+
+
+@functools.lru_cache(maxsize=4096)
+def _minute_seconds(minute):
+    return calendar.timegm(time.strptime(minute, '%Y-%m-%d %H:%M'))
+
+
+def iter_log(source, content):
+    """
+    逐个解码一个事件日志
+    :param source: EVENT_LOGS中的来源
+    :param content: 状态文件内容, 为None时不生成事件
+    :return: 生成(秒数, 来源顺序, 序号, 来源, 记录), 缺少或无法解析时间戳的记录被跳过
+    """
+    if content is None:
+        return
+    _, field, time_field = EVENT_LOGS[source]
+    order = _SOURCE_ORDER[source]
+    # 相邻记录的时间戳大多在同一分钟内, 分钟部分与上一条相同时直接复用
+    minute = base = None
+    for index, item in enumerate(iter_array(content, field)):
+        timestamp = item.get(time_field) if isinstance(item, dict) else None
+        if not isinstance(timestamp, str) or len(timestamp) < 19:
+            continue
+        try:
+            if timestamp[:16] != minute:
+                base = _minute_seconds(timestamp[:16])
+                minute = timestamp[:16]
+            seconds = base + int(timestamp[17:19])
+        except ValueError:
+            continue
+        yield seconds, order, index, source, item
+
+
+def merge_events(contents, sources=None):
+    """
+    把多个事件日志按时间归并为一个事件流
+    :param contents: {文件名: 文件内容字节或None}
+    :param sources: 要合并的来源, 默认为全部
+    :return: 按(时间, 来源顺序, 序号)排列的事件迭代器
+    """
+    sources = sources or EVENT_LOGS
+    return heapq.merge(*[iter_log(source, contents.get(EVENT_LOGS[source][0]))
+                         for source in sources])
+
+
+class SequenceMatcher:
+    """
+    编译后的sequence条件: 第k个状态表示已依次匹配前k步
+    每个状态只记住到达它的部分匹配中最晚的开始时间(开始越晚越容易满足时间窗口, 较早的部分匹配
+    不可能在它失败时成功), 所以每个事件只需检查来源相同的几个步骤, 扫描一遍即可得出结果
+    """
+
+    def __init__(self, pattern):
+        """
+        :param pattern: ('seq', ...)或('within', 秒数, ('seq', ...))
+        :raises ValueError: 格式错误
+        """
+        self.within = None
+        if pattern[0] == 'within':
+            self.within, pattern = pattern[1], pattern[2]
+        if pattern[0] != 'seq' or len(pattern) < 2:
+            raise ValueError(f"未知的sequence条件: {pattern[0]}")
+        self.sources = []
+        self.steps = []
+        self.by_source = {}
+        for index, (source, check) in enumerate(pattern[1:]):
+            if source not in EVENT_LOGS:
+                raise ValueError(f"未知的事件来源: {source}")
+            if source not in self.sources:
+                self.sources.append(source)
+            self.steps.append(compile_check(check))
+            self.by_source.setdefault(source, []).insert(0, index)
+
+    def files(self):
+        """条件用到的状态文件"""
+        return [EVENT_LOGS[source][0] for source in self.sources]
+
+    def match(self, events, params):
+        """
+        :param events: merge_events返回的事件流
+        :param params: 任务参数
+        :return: (是否匹配, 扫描的事件数)
+        """
+        last = len(self.steps) - 1
+        # starts[k]: 已匹配前k步的部分匹配中最晚的开始时间
+        starts = [None] * len(self.steps)
+        scanned = 0
+        for seconds, _, _, source, record in events:
+            scanned += 1
+            # 从后往前检查, 一个事件不会在同一轮中同时推进相邻的两步
+            for step in self.by_source.get(source, ()):
+                start = seconds if step == 0 else starts[step]
+                if start is None:
+                    continue
+                if self.within is not None and seconds - start > self.within:
+                    continue
+                if not self.steps[step](record, params):
+                    continue
+                if step == last:
+                    return True, scanned
+                if starts[step + 1] is None or start > starts[step + 1]:
+                    starts[step + 1] = start
+        return False, scanned
+
+
+# 任务编号 -> 编译后的sequence条件(导入时编译一次)
+SEQUENCES = {task_id: SequenceMatcher(task["sequence"])
+             for task_id, task in TASKS_BY_ID.items() if task.get("sequence")}
+
+
+def check_sequence(task_id, *args, transport=None, **kwargs):
+    """
+    检查任务的操作顺序: 一次读取条件用到的事件日志, 归并后扫描一遍
+    :param transport: 数据源, 默认为当前生效的Transport
+    :return: (是否通过, 扫描的事件数)
+    :raises KeyError: 任务没有sequence条件
+    """
+    matcher = SEQUENCES[task_id]
+    params = bind_params(get_task(task_id), args, kwargs)
+    contents = (transport or get_transport()).read_files(matcher.files())
+    return matcher.match(merge_events(contents, matcher.sources), params)
+
+
+def print_events(contents, limit=50):
+    """打印合并后事件流的前limit个事件"""
+    for count, (_, _, _, source, record) in enumerate(merge_events(contents)):
+        if count >= limit:
+            print(f"  ... (只显示前{limit}个事件)")
+            return
+        time_field = EVENT_LOGS[source][2]
+        detail = ", ".join(f"{key}={value}" for key, value in record.items()
+                           if key != time_field and not isinstance(value, (dict, list)))
+        print(f"  {record[time_field]} [{source}] {detail}")
+
+
+if __name__ == "__main__":
+    # --transport=<spec>: 数据源; --events: 打印合并后的事件流
+    apply_transport_options(sys.argv[1:])
+    argv = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    try:
+        task_ids = parse_task_numbers(argv) if argv else sorted(SEQUENCES)
+    except ValueError:
+        task_ids = []
+    task_ids = [task_id for task_id in task_ids if task_id in SEQUENCES]
+    if not task_ids:
+        print(f"用法: python temporal.py [任务编号...] [--events] [--transport=<spec>]  "
+              f"(定义了sequence条件的任务: {', '.join(map(str, sorted(SEQUENCES)))})")
+        sys.exit(1)
+
+    transport = get_transport()
+    if '--events' in sys.argv:
+        print_events(transport.read_files([EVENT_LOGS[source][0] for source in EVENT_LOGS]))
+    failed = 0
+    for task_id in task_ids:
+        start = time.perf_counter()
+        try:
+            ok, scanned = check_sequence(task_id, *TASKS_BY_ID[task_id]["args"], transport=transport)
+        except Exception as e:
+            print(f"✗ 任务{task_id:02d}: 检查时出错: {e}")
+            failed += 1
+            continue
+        elapsed = (time.perf_counter() - start) * 1000
+        symbol = "✓" if ok else "✗"
+        print(f"{symbol} 任务{task_id:02d}: {TASKS_BY_ID[task_id]['name']} "
+              f"(扫描 {scanned} 个事件, {elapsed:.1f}ms)")
+        failed += not ok
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,11 @@
+"""
+pytest配置
+test_task_XX.py是在真机上逐个运行的人工测试脚本(python tests/test_task_01.py), 不由pytest收集
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+collect_ignore_glob = ["test_task_[0-9]*.py"]
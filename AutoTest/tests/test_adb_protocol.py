@@ -0,0 +1,99 @@
+"""
+adb_protocol单元测试: 主机协议的请求编码、exec:输出流与退出码、FAIL响应, 使用本地假adb server
+运行: python -m pytest tests/test_adb_protocol.py
+"""
+
+import socket
+
+import pytest
+
+from adb_protocol import (AdbProtocolError, AdbSocketClient, FakeAdbServer, _read_status,
+                          encode_request, server_port, split_returncode, wrap_exec_command)
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "files" / "autotest").mkdir(parents=True)
+    (tmp_path / "files" / "autotest" / "app_state.json").write_text(
+        '{"currentPage": "recommend"}', encoding='utf-8')
+    server = FakeAdbServer(str(tmp_path)).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    client = AdbSocketClient(port=server.port, pool_size=0)
+    yield client
+    client.close()
+
+
+def test_encode_request():
+    assert encode_request("host:version") == b"000chost:version"
+    # 长度按UTF-8字节计算
+    assert encode_request("shell:echo 歌") == b"000eshell:echo \xe6\xad\x8c"
+
+
+def test_split_returncode():
+    output = b"hello\n\n__AUTOTEST_RC__ 3\n"
+    assert split_returncode(output) == (3, b"hello\n")
+    with pytest.raises(AdbProtocolError):
+        split_returncode(b"truncated output")
+    assert wrap_exec_command("true").startswith("true; ")
+
+
+def test_read_status_fail_message():
+    ours, theirs = socket.socketpair()
+    with ours, theirs:
+        theirs.sendall(b"FAIL0005nope!")
+        with pytest.raises(AdbProtocolError, match="nope!"):
+            _read_status(ours)
+        theirs.sendall(b"WHAT")
+        with pytest.raises(AdbProtocolError, match="无法识别"):
+            _read_status(ours)
+
+
+def test_server_port_reads_environment(monkeypatch):
+    monkeypatch.setenv("ANDROID_ADB_SERVER_PORT", "5099")
+    assert server_port() == 5099
+    assert AdbSocketClient(pool_size=0).pool.address[1] == 5099
+    monkeypatch.delenv("ANDROID_ADB_SERVER_PORT")
+    assert server_port() == 5037
+
+
+def test_host_requests(server, client):
+    assert client.server_version() == 41
+    assert client.devices() == [(server.serial, "device")]
+
+
+def test_exec_out_stream_and_returncode(server, client):
+    returncode, output = client.exec_out("cat files/autotest/app_state.json", server.serial)
+    assert returncode == 0
+    assert output == b'{"currentPage": "recommend"}'
+
+    returncode, output = client.exec_out("printf 'a\\nb'; sh -c 'exit 7'")
+    assert (returncode, output) == (7, b"a\nb")
+
+    # 较大的输出分多个包到达, 按流读取到连接关闭
+    returncode, output = client.exec_out("head -c 300000 /dev/zero")
+    assert (returncode, len(output)) == (0, 300000)
+
+
+def test_exec_in(client):
+    command = "cat > files/autotest/uploaded.json && cat files/autotest/uploaded.json"
+    returncode, output = client.exec_in(command, b'{"x": 1}')
+    assert (returncode, output) == (0, b'{"x": 1}')
+
+
+def test_unknown_device_fails(client):
+    with pytest.raises(AdbProtocolError, match="not found"):
+        client.exec_out("true", serial="emulator-5554")
+
+
+def test_unsupported_service_fails(client):
+    sock = client._open("host:transport-any")
+    with sock:
+        sock.sendall(encode_request("sync:"))
+        with pytest.raises(AdbProtocolError, match="unsupported service"):
+            _read_status(sock)
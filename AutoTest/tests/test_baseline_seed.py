@@ -0,0 +1,85 @@
+"""
+baseline_seed单元测试: 写入每个基线后状态文件满足其说明中的前置状态,
+任务基线上执行任务操作后, 按注册表的默认参数验证通过
+运行: python -m pytest tests/test_baseline_seed.py
+"""
+
+import io
+import json
+import tarfile
+
+import pytest
+
+from baseline_seed import BASELINES, build_baseline, pack_baseline, seed_directory
+from task_registry import get_task
+from transport import AUTOTEST_FILES, DirectoryTransport, use_transport
+from verification_functions import check_task, use_pre_state
+
+
+def _seed(tmp_path, name):
+    seed_directory(str(tmp_path), build_baseline(name))
+    transport = DirectoryTransport(str(tmp_path))
+    state = {}
+    for file_name in AUTOTEST_FILES:
+        content = transport.read_file(file_name)
+        if content is not None:
+            state[file_name] = json.loads(content)
+    return transport, state
+
+
+def _pause(state):
+    state['playback_state.json']['isPlaying'] = False
+
+
+def _play(state):
+    state['playback_state.json']['isPlaying'] = True
+
+
+def _delete_first_song(state):
+    playlist = state['user_playlists.json']['playlists'][0]
+    del playlist['songIds'][0]
+    playlist['songCount'] = len(playlist['songIds'])
+
+
+# 基线 -> (前置状态检查, 以该基线为前置状态的任务, 任务操作对状态文件的修改)
+PRECONDITIONS = {
+    "template": (lambda state: sorted(state) == sorted(AUTOTEST_FILES), None, None),
+    "empty": (lambda state: state == {}, None, None),
+    "playing": (lambda state: state['playback_state.json']['isPlaying'] is True, 5, _pause),
+    "paused": (lambda state: state['playback_state.json']['isPlaying'] is False, 4, _play),
+    "playlist": (lambda state: [
+        (p['playlistId'], p['songCount'], len(p['songIds']))
+        for p in state['user_playlists.json']['playlists']][:1] == [("user_playlist_001", 2, 2)],
+        21, _delete_first_song),
+}
+
+
+def test_every_baseline_has_a_precondition():
+    assert sorted(PRECONDITIONS) == sorted(BASELINES)
+
+
+@pytest.mark.parametrize("name", sorted(BASELINES))
+def test_seeded_baseline_meets_precondition(tmp_path, name):
+    check, task_id, action = PRECONDITIONS[name]
+    transport, state = _seed(tmp_path, name)
+    assert check(state)
+    if task_id is None:
+        return
+
+    args = get_task(task_id)["args"]
+    pre_state = json.loads(json.dumps(state))
+    with use_transport(transport), use_pre_state(pre_state):
+        # 基线本身不满足任务的完成条件
+        assert not check_task(task_id, *args)
+        action(state)
+        for file_name, document in state.items():
+            with open(tmp_path / file_name, 'w', encoding='utf-8') as f:
+                json.dump(document, f, ensure_ascii=False)
+        assert check_task(task_id, *args)
+
+
+def test_pack_baseline_round_trip():
+    contents = build_baseline("playlist")
+    with tarfile.open(fileobj=io.BytesIO(pack_baseline(contents))) as tar:
+        unpacked = {member.name: tar.extractfile(member).read() for member in tar.getmembers()}
+    assert unpacked == contents
@@ -0,0 +1,53 @@
+"""
+check_task单元测试: 同步验证和asyncio引擎共用check_task_data, 设置任务开始前的状态时都检查change条件
+运行: python -m pytest tests/test_check_task.py
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from async_engine import AsyncEngine
+from transport import DirectoryTransport, use_transport
+from verification_functions import check_task, use_pre_state
+
+PLAYLISTS = "user_playlists.json"
+
+
+def _write(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+@pytest.fixture
+def transport(tmp_path):
+    _write(tmp_path / PLAYLISTS, {"playlists": [{"playlistId": "p1", "songCount": 2}]})
+    return DirectoryTransport(str(tmp_path))
+
+
+def _run_async(transport, pre_state, *args, **kwargs):
+    async def run():
+        with use_transport(transport), use_pre_state(pre_state):
+            return await AsyncEngine().check_task(21, *args, **kwargs)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("runner", ["sync", "async"])
+def test_change_check_applies_to_both_paths(transport, runner):
+    def run(pre_state, *args, **kwargs):
+        if runner == "async":
+            return _run_async(transport, pre_state, *args, **kwargs)
+        with use_transport(transport), use_pre_state(pre_state):
+            return check_task(21, *args, **kwargs)
+
+    unchanged = {PLAYLISTS: {"playlists": [{"playlistId": "p1", "songCount": 2}]}}
+    changed = {PLAYLISTS: {"playlists": [{"playlistId": "p1", "songCount": 3}]}}
+    # 没有任务开始前的状态时只检查最终状态
+    assert run(None, "p1", 2)
+    # 最终状态满足但没有发生变化, 不算完成
+    assert not run(unchanged, "p1", 2)
+    assert run(changed, "p1", 2)
+    # 关键字参数同样传给判断条件和change条件
+    assert run(changed, playlist_id="p1", expected_count=2)
+    assert not run(changed, playlist_id="p1", expected_count=3)
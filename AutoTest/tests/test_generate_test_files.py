@@ -0,0 +1,30 @@
+"""
+generate_test_files单元测试: 由注册表生成的每个测试文件都是合法的Python模块
+运行: python -m pytest tests/test_generate_test_files.py
+"""
+
+import ast
+
+import pytest
+
+from generate_test_files import TASKS, generate_test_file
+
+
+@pytest.mark.parametrize("task", TASKS, ids=[f"task_{task[0]:02d}" for task in TASKS])
+def test_generated_module_parses(task):
+    tree = ast.parse(generate_test_file(*task))
+    printed = [node.args[0].value for node in ast.walk(tree)
+               if isinstance(node, ast.Call) and getattr(node.func, 'id', None) == 'print'
+               and node.args and isinstance(node.args[0], ast.Constant)]
+    # 操作步骤原样打印(包括其中的引号)
+    for i, step in enumerate(task[3], 1):
+        assert f"  {i}. {step}" in printed
+
+
+def test_task_12_keeps_usage_and_hints():
+    task = next(task for task in TASKS if task[0] == 12)
+    content = generate_test_file(*task)
+    assert "使用方式：" in content
+    assert "python test_task_12.py 测试歌单" in content
+    assert "检查最新创建的歌单" in content
+    assert "请检查操作步骤是否正确执行" not in content
@@ -0,0 +1,103 @@
+"""
+partial_json单元测试: 截断和格式错误的文件、字符串中的转义字符与括号、按需解码的结果与完整解码一致
+运行: python -m pytest tests/test_partial_json.py
+"""
+
+import json
+
+import pytest
+
+from partial_json import (LazyDocument, extract, get_path, iter_array, iter_members,
+                          load_document, skip_value)
+
+DOCUMENT = {
+    "currentPage": "search",
+    "lastQuery": "say \"hi\" {not [a bracket]} \\ done",
+    "unicode": "稻香 é \\u0041",
+    "currentSong": {"songId": "song_001", "title": "a\\\"b}"},
+    "history": [{"page": "p}]{["}, {"page": "\"]"}, 1, None, True],
+    "volume": 70,
+}
+TEXT = json.dumps(DOCUMENT, ensure_ascii=False, indent=2)
+
+
+def test_lazy_document_matches_json():
+    document = LazyDocument(TEXT)
+    assert dict(document) == DOCUMENT
+    assert document.to_dict() == DOCUMENT
+    assert list(document) == list(DOCUMENT)
+    # bytes按UTF-8解码
+    assert LazyDocument(TEXT.encode('utf-8'))["unicode"] == DOCUMENT["unicode"]
+
+
+@pytest.mark.parametrize("key", sorted(DOCUMENT))
+def test_escaped_strings_are_skipped_as_a_whole(key):
+    # 字符串中的引号、反斜杠和括号不影响跳过后续的值
+    assert get_path(TEXT, key) == DOCUMENT[key]
+
+
+def test_extract_nested_and_missing():
+    assert extract(TEXT, ["currentSong.title", "volume", "currentSong.missing", "nope"]) == {
+        "currentSong.title": "a\\\"b}", "volume": 70}
+    assert get_path(TEXT, "lastQuery.inner", "default") == "default"
+
+
+def test_iter_array():
+    assert list(iter_array(TEXT, "history")) == DOCUMENT["history"]
+    assert list(iter_array("[]")) == []
+    assert list(iter_array(TEXT, "volume")) == []
+    assert list(iter_array(TEXT, "missing")) == []
+
+
+def test_skip_value_positions():
+    text = '"a\\"b" ,'
+    assert skip_value(text, 0) == 6
+    assert skip_value('[1, "]", {"x": "}"}] tail', 0) == 20
+    assert skip_value("-1.5e3,", 0) == 6
+
+
+@pytest.mark.parametrize("cut", [1, 10, len(TEXT) // 2, len(TEXT) - 1])
+def test_truncated_file_is_rejected(cut):
+    # App写入到一半的文件
+    with pytest.raises(json.JSONDecodeError):
+        LazyDocument(TEXT[:cut])
+
+
+@pytest.mark.parametrize("text", [
+    '',
+    '{"a": 1,}',
+    '{"a" 1}',
+    '{a: 1}',
+    '{"a": 1 "b": 2}',
+    '{"a": "unterminated}',
+    '{"a": [1, 2}',
+    '{"a": 1} {"b": 2}',
+    '{"a": 1}]',
+])
+def test_malformed_file_is_rejected(text):
+    with pytest.raises(json.JSONDecodeError):
+        load_document(text)
+
+
+def test_nested_corruption_is_found_on_access():
+    # 构造时只检查括号是否配对, 值内部的格式错误在访问该字段时才发现
+    document = LazyDocument('{"ok": 1, "bad": [1, 2 3]}')
+    assert document["ok"] == 1
+    with pytest.raises(json.JSONDecodeError):
+        document["bad"]
+
+
+def test_duplicate_keys_keep_last_value():
+    assert LazyDocument('{"a": 1, "a": 2}')["a"] == json.loads('{"a": 1, "a": 2}')["a"]
+
+
+def test_iter_members_returns_end_position():
+    members = iter_members('{"a": 1, "b": [2]}  ')
+    assert [name for name, _ in members] == ["a", "b"]
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_members('[1, 2]'))
+
+
+def test_load_document_non_object():
+    assert load_document(b' [1, 2]') == [1, 2]
+    assert isinstance(load_document(b'{"a": 1}'), LazyDocument)
@@ -0,0 +1,116 @@
+"""
+snapshot_archive单元测试: blob与episode索引的读写往返、去重, 以及写入中途退出(blobs.pack或索引被截断)后的恢复
+运行: python -m pytest tests/test_snapshot_archive.py
+"""
+
+import os
+
+import pytest
+
+from snapshot_archive import (BLOB_RECORD, ArchiveTransport, SnapshotArchive, content_hash,
+                              extract_episode)
+
+APP_STATE = b'{\n  "currentPage": "recommend",\n  "lastUpdated": "2025-11-03 10:00:00"\n}'
+PLAYBACK = b'{\n  "isPlaying": true,\n  "volume": 70\n}'
+
+
+def _contents(page):
+    return {"app_state.json": APP_STATE.replace(b"recommend", page.encode('utf-8')),
+            "playback_state.json": PLAYBACK}
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    path = str(tmp_path / "archive")
+    with SnapshotArchive.create(path) as archive:
+        assert archive.add_episode("ep_1", _contents("recommend")) == 2
+        # 内容相同的文件只存一次
+        assert archive.add_episode("ep_2", _contents("stroll")) == 1
+    return path
+
+
+def test_round_trip(archive_path, tmp_path):
+    with SnapshotArchive(archive_path) as archive:
+        assert archive.episodes() == ["ep_1", "ep_2"]
+        assert archive.blob_count() == 3
+        assert archive.read_file("ep_1", "app_state.json") == _contents("recommend")["app_state.json"]
+        assert archive.read_file("ep_2", "app_state.json") == _contents("stroll")["app_state.json"]
+        assert archive.read_file("ep_2", "playback_state.json") == PLAYBACK
+        # 没有归档的文件和不在文件列表中的文件
+        assert archive.read_file("ep_1", "comments.json") is None
+        assert archive.read_file("ep_1", "unknown.json") is None
+        with pytest.raises(KeyError):
+            archive.read_file("ep_3", "app_state.json")
+
+        stats = archive.stat_files("ep_1", ["playback_state.json", "comments.json"])
+        assert stats == {"playback_state.json": (len(PLAYBACK), content_hash(PLAYBACK).hex()),
+                         "comments.json": None}
+        summary = archive.stats()
+        assert (summary["episodes"], summary["blobs"], summary["files"]) == (2, 3, 4)
+
+        assert extract_episode(archive, "ep_2", str(tmp_path / "out")) == 2
+        with open(tmp_path / "out" / "playback_state.json", 'rb') as f:
+            assert f.read() == PLAYBACK
+
+    transport = ArchiveTransport(archive_path, "ep_2")
+    assert transport.list_files() == ["app_state.json", "playback_state.json"]
+    assert transport.read_file("playback_state.json") == PLAYBACK
+
+
+def test_same_name_keeps_last_episode(archive_path):
+    with SnapshotArchive(archive_path, writable=True) as archive:
+        archive.add_episode("ep_1", _contents("mine"))
+    with SnapshotArchive(archive_path) as archive:
+        assert archive.episodes() == ["ep_1", "ep_2"]
+        assert b"mine" in archive.read_file("ep_1", "app_state.json")
+
+
+def _truncate(path, name, size):
+    with open(os.path.join(path, name), 'r+b') as f:
+        f.truncate(size)
+
+
+def test_recovers_from_truncated_pack(archive_path):
+    # ep_2新增的blob是blobs.pack中的最后一个; 截掉它的一部分, 模拟写入数据时中途退出
+    pack = os.path.join(archive_path, 'blobs.pack')
+    _truncate(archive_path, 'blobs.pack', os.path.getsize(pack) - 1)
+
+    # 只读打开时忽略指向blobs.pack末尾之外的blob记录和引用了它的episode, 不修改文件
+    idx_size = os.path.getsize(os.path.join(archive_path, 'blobs.idx'))
+    with SnapshotArchive(archive_path) as archive:
+        assert archive.episodes() == ["ep_1"]
+        assert "ep_2" not in archive
+        assert archive.read_file("ep_1", "app_state.json") == _contents("recommend")["app_state.json"]
+    assert os.path.getsize(os.path.join(archive_path, 'blobs.idx')) == idx_size
+
+    # 可写打开时截掉这些记录, 之后追加的episode正常读写
+    with SnapshotArchive(archive_path, writable=True) as archive:
+        assert archive.episodes() == ["ep_1"]
+        assert archive.blob_count() == 2
+        archive.add_episode("ep_3", _contents("stroll"))
+    assert os.path.getsize(os.path.join(archive_path, 'blobs.idx')) == 3 * BLOB_RECORD.size
+    with SnapshotArchive(archive_path) as archive:
+        assert archive.episodes() == ["ep_1", "ep_3"]
+        assert archive.read_file("ep_3", "app_state.json") == _contents("stroll")["app_state.json"]
+        assert archive.read_file("ep_3", "playback_state.json") == PLAYBACK
+
+
+def test_ignores_partial_index_records(archive_path):
+    # 索引记录只写了一部分
+    for name in ('blobs.idx', 'episodes.idx'):
+        with open(os.path.join(archive_path, name), 'ab') as f:
+            f.write(b'\x01' * 7)
+    with SnapshotArchive(archive_path) as archive:
+        assert archive.episodes() == ["ep_1", "ep_2"]
+        assert archive.read_file("ep_2", "playback_state.json") == PLAYBACK
+    with SnapshotArchive(archive_path, writable=True) as archive:
+        archive.add_episode("ep_3", _contents("mine"))
+    with SnapshotArchive(archive_path) as archive:
+        assert archive.episodes() == ["ep_1", "ep_2", "ep_3"]
+        assert b"mine" in archive.read_file("ep_3", "app_state.json")
+
+
+def test_read_only_archive_rejects_writes(archive_path):
+    with SnapshotArchive(archive_path) as archive:
+        with pytest.raises(IOError):
+            archive.add_episode("ep_3", _contents("mine"))
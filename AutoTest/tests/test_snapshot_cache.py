@@ -0,0 +1,116 @@
+"""
+snapshot_cache单元测试: 按文件版本失效、不存在的文件的负缓存、按需解码数据的lastUpdated版本
+运行: python -m pytest tests/test_snapshot_cache.py
+"""
+
+import json
+import os
+
+from partial_json import load_document
+from planner import build_plan
+from run_all_tests import load_snapshot
+from snapshot_cache import MISSING_FILE, SnapshotCache
+from transport import DirectoryTransport, use_transport
+from verification_functions import read_json_from_device, use_cache
+
+
+class CountingTransport(DirectoryTransport):
+    """记录read_file/read_files/stat_files调用次数的本地目录数据源"""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.reads = 0
+        self.stats = 0
+
+    def read_file(self, name):
+        self.reads += 1
+        return super().read_file(name)
+
+    def read_files(self, names):
+        self.reads += 1
+        return {name: DirectoryTransport.read_file(self, name) for name in names}
+
+    def stat_files(self, names):
+        self.stats += 1
+        return super().stat_files(names)
+
+
+def _write(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def test_lazy_document_uses_last_updated_as_version():
+    cache = SnapshotCache()
+    document = load_document(b'{"lastUpdated": "2025-11-03 09:00:00", "isPlaying": true}')
+    cache.put("dev", "playback_state.json", document)
+    assert cache.get("dev", "playback_state.json", "2025-11-03 09:00:00") is document
+    assert cache.get("dev", "playback_state.json", "2025-11-03 09:00:05") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_changed_file_is_reread(tmp_path):
+    _write(tmp_path / "app_state.json", {"currentPage": "recommend"})
+    transport = CountingTransport(str(tmp_path))
+    cache = SnapshotCache(revalidate_after=0)
+    with use_transport(transport), use_cache(cache):
+        assert read_json_from_device('autotest/app_state.json')["currentPage"] == "recommend"
+        assert read_json_from_device('autotest/app_state.json')["currentPage"] == "recommend"
+        assert transport.reads == 1
+
+        _write(tmp_path / "app_state.json", {"currentPage": "stroll", "padding": "x"})
+        assert read_json_from_device('autotest/app_state.json')["currentPage"] == "stroll"
+        assert transport.reads == 2
+
+
+def test_versions_are_reused_within_revalidate_after(tmp_path):
+    _write(tmp_path / "app_state.json", {"currentPage": "recommend"})
+    transport = CountingTransport(str(tmp_path))
+    cache = SnapshotCache(revalidate_after=60)
+    with use_transport(transport), use_cache(cache):
+        for _ in range(5):
+            read_json_from_device('autotest/app_state.json')
+    assert transport.stats == 1
+    assert transport.reads == 1
+
+
+def test_missing_file_is_cached(tmp_path, capsys):
+    transport = CountingTransport(str(tmp_path))
+    cache = SnapshotCache(revalidate_after=60)
+    with use_transport(transport), use_cache(cache):
+        assert read_json_from_device('autotest/comments.json') is None
+        assert read_json_from_device('autotest/comments.json') is None
+    # 版本查询已表明文件不存在, 不再读取内容
+    assert transport.reads == 0
+    assert cache.get(transport.key, "comments.json") is MISSING_FILE
+    assert "不存在该文件" in capsys.readouterr().out
+
+    # 文件出现后版本变化, 负缓存条目失效
+    _write(tmp_path / "comments.json", {"userComments": []})
+    cache.revalidate_after = 0
+    with use_transport(transport), use_cache(cache):
+        assert read_json_from_device('autotest/comments.json') == {"userComments": []}
+
+
+def test_planned_snapshot_caches_absent_files(tmp_path):
+    _write(tmp_path / "app_state.json", {"currentPage": "recommend"})
+    transport = CountingTransport(str(tmp_path))
+    cache = SnapshotCache(revalidate_after=60)
+    with use_transport(transport), use_cache(cache):
+        load_snapshot(True, cache, build_plan([1, 24]))
+        reads = transport.reads
+        assert read_json_from_device('autotest/app_state.json') == {"currentPage": "recommend"}
+        assert read_json_from_device('autotest/comments.json') is None
+    assert transport.reads == reads
+
+
+def test_invalidate_drops_versions(tmp_path):
+    transport = CountingTransport(str(tmp_path))
+    cache = SnapshotCache(revalidate_after=60)
+    cache.versions(transport, ["app_state.json"])
+    cache.versions(transport, ["app_state.json"])
+    assert transport.stats == 1
+    cache.invalidate(transport.key)
+    cache.versions(transport, ["app_state.json"])
+    assert transport.stats == 2
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,85 @@
+"""
+state_diff单元测试: 按自然键对齐数组的add/remove/replace, 上层路径整体替换时的changed查询
+运行: python -m pytest tests/test_state_diff.py
+"""
+
+from state_diff import StateDiff, diff, diff_states
+from task_registry import evaluate_change
+
+
+def test_keyed_add_remove_replace():
+    before = {"favoriteSongs": [{"songId": "s1", "title": "a"}, {"songId": "s2", "title": "b"}]}
+    after = {"favoriteSongs": [{"songId": "s2", "title": "c"}, {"songId": "s3", "title": "d"}]}
+    changes = diff(before, after)
+    assert {"op": "remove", "path": "/favoriteSongs/s1",
+            "old": {"songId": "s1", "title": "a"}} in changes
+    assert {"op": "add", "path": "/favoriteSongs/s3",
+            "value": {"songId": "s3", "title": "d"}} in changes
+    assert {"op": "replace", "path": "/favoriteSongs/s2/title", "value": "c", "old": "b"} in changes
+    assert len(changes) == 3
+
+
+def test_keyed_alignment_ignores_order():
+    before = {"playlists": [{"playlistId": "p1"}, {"playlistId": "p2"}]}
+    assert diff(before, {"playlists": list(reversed(before["playlists"]))}) == []
+
+
+def test_value_keyed_and_positional_arrays():
+    changes = diff({"songIds": ["s1", "s2", "s3"]}, {"songIds": ["s2", "s3"]})
+    assert changes == [{"op": "remove", "path": "/songIds/s1", "old": "s1"}]
+    # 没有自然键的对象数组按下标比较, 多余的元素从后往前删除
+    changes = diff({"items": [{"a": 1}, {"a": 2}, {"a": 3}]}, {"items": [{"a": 1}]})
+    assert [change["path"] for change in changes] == ["/items/2", "/items/1"]
+
+
+def test_bool_to_number_is_a_change():
+    assert diff({"isPlaying": True}, {"isPlaying": 1}) == [
+        {"op": "replace", "path": "/isPlaying", "value": 1, "old": True}]
+
+
+def test_pointer_escaping():
+    changes = diff({}, {"a/b": {"c~d": 1}})
+    assert changes[0]["path"] == "/a~1b"
+
+
+def test_touches_descendant_and_ancestor():
+    state = StateDiff.between({"currentSong": {"songId": "s1", "title": "a"}},
+                              {"currentSong": {"songId": "s2", "title": "a"}})
+    assert state.touches("/currentSong/songId")
+    assert state.touches("/currentSong")
+    assert state.touches("")
+    assert not state.touches("/currentSong/title")
+    assert not state.touches("/volume")
+
+
+def test_parent_level_replace_touches_descendants():
+    # currentSong由null变为对象时差异是对/currentSong的一次replace, 其下的songId也视为有变化
+    state = StateDiff.between({"currentSong": None}, {"currentSong": {"songId": "s1"}})
+    assert [change["path"] for change in state] == ["/currentSong"]
+    assert state.touches("/currentSong/songId")
+    assert evaluate_change(6, state)
+
+    # 整体添加、删除同样如此
+    assert StateDiff.between({}, {"currentSong": {"songId": "s1"}}).touches("/currentSong/songId")
+    assert StateDiff.between({"currentSong": {"songId": "s1"}}, {}).touches("/currentSong/songId")
+    # 兄弟路径被替换不算
+    state = StateDiff.between({"currentSong": {"songId": "s1"}, "volume": 1},
+                              {"currentSong": {"songId": "s1"}, "volume": 2})
+    assert not state.touches("/currentSong/songId")
+
+
+def test_get_and_children():
+    state = StateDiff.between({"followedArtists": [{"artistId": "a1"}, {"artistId": "a2"}]},
+                              {"followedArtists": [{"artistId": "a1"}]})
+    assert state.get("/followedArtists/a2")["op"] == "remove"
+    assert [change["op"] for change in state.children("/followedArtists")] == ["remove"]
+    assert state.get("/followedArtists/a1") is None
+    assert len(state) == 1
+
+
+def test_diff_states_file_removed_and_created():
+    changes = diff_states({"a.json": {"x": 1}, "b.json": None}, {"a.json": None, "b.json": {"y": 2}})
+    assert changes["a.json"] == [{"op": "remove", "path": "", "old": {"x": 1}}]
+    assert changes["b.json"] == [{"op": "add", "path": "/y", "value": 2}]
+    # 文件被删除时其中的每个路径都有变化
+    assert StateDiff(changes["a.json"]).touches("/x")
@@ -0,0 +1,271 @@
+"""
+task_registry回归测试: 编译后的判断条件与注册表之前手写的task_XX验证函数结果一致
+数据为种子状态文件(app/src/main/assets/autotest)和generate_fixtures生成的数据集,
+分别按完整解码和按需解码(LazyDocument)执行
+运行: python -m pytest tests/test_task_registry.py
+"""
+
+import json
+import os
+
+import pytest
+
+from generate_fixtures import generate
+from partial_json import load_document
+from state_diff import StateDiff
+from task_registry import (TASKS_BY_ID, bind_params, evaluate, evaluate_change, get_task,
+                           supported_tasks)
+
+SEED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                        'app', 'src', 'main', 'assets', 'autotest')
+
+# 生成数据集的规模, 足够覆盖各数组但保持测试快速
+FIXTURE_COUNTS = {"navigation": 50, "playback_history": 50, "favorites": 20, "playlists": 8,
+                  "playlist_size": 5, "searches": 30, "comments": 30, "mv_history": 10,
+                  "task_logs": 10}
+
+
+# ==================== 注册表之前的手写验证逻辑 ====================
+# 与原task_XX函数相同, 只是把read_json_from_device读到的数据作为参数传入
+
+def _legacy_12(data, playlist_name=None):
+    if data and 'playlists' in data:
+        playlists = data['playlists']
+        if playlist_name is None:
+            if not playlists:
+                return False
+            latest = sorted(playlists, key=lambda x: x.get('createTime', 0), reverse=True)[0]
+            return latest.get('songCount', 0) > 0
+        for playlist in playlists:
+            if playlist.get('playlistName') == playlist_name:
+                return playlist.get('songCount', 0) > 0
+    return False
+
+
+def _legacy_13(data, search_query='稻香'):
+    if data and 'searches' in data:
+        for search in data['searches']:
+            if search.get('query') == search_query and search.get('action') == 'play':
+                return True
+    return False
+
+
+def _legacy_14(data):
+    if data and 'searches' in data:
+        for search in data['searches']:
+            if search.get('resultType') == 'artist' and search.get('action') == 'play':
+                return True
+    return False
+
+
+def _legacy_playlist_field(data, playlist_id, field, expected):
+    if data and 'playlists' in data:
+        for playlist in data['playlists']:
+            if playlist.get('playlistId') == playlist_id:
+                return playlist.get(field) == expected
+    return False
+
+
+def _legacy_24(data, song_id, comment_content):
+    if data and 'userComments' in data:
+        for comment in data['userComments']:
+            if comment.get('songId') == song_id:
+                if comment_content:
+                    return comment.get('content') == comment_content
+                return True
+    return False
+
+
+def _legacy_29(data, artist_id=None):
+    if not data:
+        return False
+    recently_unfollowed = data.get('recentlyUnfollowed')
+    if not recently_unfollowed:
+        return False
+    if artist_id:
+        return recently_unfollowed == artist_id
+    return True
+
+
+LEGACY = {
+    1: lambda data: bool(data) and data.get('currentPage') == 'recommend',
+    2: lambda data: bool(data) and data.get('currentPage') == 'stroll',
+    3: lambda data: bool(data) and data.get('currentPage') in ['profile', 'my', 'mine'],
+    4: lambda data: bool(data) and data.get('isPlaying') == True,  # noqa: E712
+    5: lambda data: bool(data) and data.get('isPlaying') == False,  # noqa: E712
+    6: lambda data, expected_song_id=None: bool(data) and 'currentSong' in data and (
+        data['currentSong'].get('songId') == expected_song_id if expected_song_id
+        else 'songId' in data['currentSong']),
+    7: lambda data: bool(data) and data.get('playbackMode') == 'shuffle',
+    8: lambda data, song_id: bool(data) and 'favoriteSongs' in data and
+        song_id in [song.get('songId') for song in data['favoriteSongs']],
+    9: lambda data, expected_volume=None: bool(data) and (
+        data.get('volume') == expected_volume if expected_volume is not None else 'volume' in data),
+    10: lambda data: bool(data) and data.get('currentViewingPlaylist') is not None,
+    11: lambda data: bool(data) and 'currentSong' in data and (
+        data['currentSong'].get('source') == 'daily_recommend' and
+        '第3首' in data['currentSong'].get('sourceDetail', '')),
+    12: _legacy_12,
+    13: _legacy_13,
+    14: _legacy_14,
+    15: lambda data, song_id: bool(data) and (
+        data.get('currentPage') == 'song_detail' and data.get('currentSongId') == song_id),
+    16: lambda data: bool(data) and (
+        data.get('showLyrics') == True or data.get('currentPage') == 'lyrics'),  # noqa: E712
+    17: lambda data, scene_name: bool(data) and 'strollMode' in data and
+        data['strollMode'].get('scene') == scene_name,
+    19: lambda data: bool(data) and 'currentSong' in data and (
+        'rank' in data['currentSong'].get('source', '') or
+        '榜单' in data['currentSong'].get('source', '')),
+    20: lambda data, playlist_id: bool(data) and 'collectedPlaylists' in data and
+        playlist_id in [p.get('playlistId') for p in data['collectedPlaylists']],
+    21: lambda data, playlist_id, expected_count: _legacy_playlist_field(
+        data, playlist_id, 'songCount', expected_count),
+    22: lambda data, stat_type: bool(data) and 'viewedStats' in data and
+        data['viewedStats'].get(stat_type) == True,  # noqa: E712
+    24: _legacy_24,
+    27: lambda data, playlist_id, expected_order: _legacy_playlist_field(
+        data, playlist_id, 'sortOrder', expected_order),
+    28: lambda data, album_id: bool(data) and 'collectedAlbums' in data and
+        album_id in [a.get('albumId') for a in data['collectedAlbums']],
+    29: _legacy_29,
+    30: lambda data, mv_id: bool(data) and 'currentMV' in data and (
+        data['currentMV'].get('mvId') == mv_id and data['currentMV'].get('isPlaying') == True),  # noqa: E712
+    31: lambda data, style_id: bool(data) and 'playerStyle' in data and
+        data['playerStyle'].get('styleId') == style_id,
+}
+
+
+# ==================== 参数组合 ====================
+
+def _ids(items, field):
+    values = [item.get(field) for item in items or [] if isinstance(item, dict)]
+    return values[:1] + values[-1:]
+
+
+def argument_sets(task_id, data):
+    """任务的批量运行参数, 以及从数据中取出的命中/不命中参数"""
+    task = get_task(task_id)
+    sets = [list(task["args"])]
+    data = data or {}
+    missing = "no_such_id"
+    if task_id == 6:
+        sets += [[(data.get('currentSong') or {}).get('songId')], [missing]]
+    elif task_id == 8:
+        sets += [[song_id] for song_id in _ids(data.get('favoriteSongs'), 'songId') + [missing]]
+    elif task_id == 9:
+        sets += [[data.get('volume')], [-1], [0]]
+    elif task_id == 12:
+        sets += [[None], [missing]] + [[name] for name in _ids(data.get('playlists'), 'playlistName')]
+    elif task_id == 13:
+        sets += [[], [missing]] + [[query] for query in _ids(data.get('searches'), 'query')]
+    elif task_id == 15:
+        sets += [[data.get('currentSongId')], [missing]]
+    elif task_id == 17:
+        sets += [[(data.get('strollMode') or {}).get('scene')], [missing]]
+    elif task_id == 20:
+        sets += [[pid] for pid in _ids(data.get('collectedPlaylists'), 'playlistId') + [missing]]
+    elif task_id in (21, 27):
+        field = 'songCount' if task_id == 21 else 'sortOrder'
+        for playlist in (data.get('playlists') or [])[:3]:
+            sets += [[playlist.get('playlistId'), playlist.get(field)],
+                     [playlist.get('playlistId'), missing]]
+        sets.append([missing, 1])
+    elif task_id == 22:
+        sets += [["monthly"], [missing]]
+    elif task_id == 24:
+        for comment in (data.get('userComments') or [])[:2] + (data.get('userComments') or [])[-1:]:
+            sets += [[comment.get('songId'), None], [comment.get('songId'), comment.get('content')],
+                     [comment.get('songId'), missing]]
+        sets.append([missing, None])
+    elif task_id == 28:
+        sets += [[aid] for aid in _ids(data.get('collectedAlbums'), 'albumId') + [missing]]
+    elif task_id == 29:
+        sets += [[None], [data.get('recentlyUnfollowed')], [missing]]
+    elif task_id == 30:
+        sets += [[(data.get('currentMV') or {}).get('mvId')], [missing]]
+    elif task_id == 31:
+        sets += [[(data.get('playerStyle') or {}).get('styleId')], [missing]]
+    return sets
+
+
+# ==================== 数据源 ====================
+
+def _read(directory, name):
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture(scope="module", params=["seed", "fixtures-0", "fixtures-1", "fixtures-2"])
+def state_dir(request, tmp_path_factory):
+    if request.param == "seed":
+        return SEED_DIR
+    directory = str(tmp_path_factory.mktemp(request.param))
+    generate(directory, FIXTURE_COUNTS, seed=int(request.param.rsplit('-', 1)[1]))
+    return directory
+
+
+@pytest.mark.parametrize("decoder", [json.loads, load_document], ids=["full", "lazy"])
+@pytest.mark.parametrize("task_id", sorted(LEGACY))
+def test_registry_matches_legacy(state_dir, decoder, task_id):
+    content = _read(state_dir, get_task(task_id)["file"])
+    expected_data = json.loads(content) if content is not None else None
+    for args in argument_sets(task_id, expected_data):
+        data = decoder(content) if content is not None else None
+        expected = LEGACY[task_id](expected_data, *args)
+        assert evaluate(task_id, data, *args) == expected, f"任务{task_id} 参数{args}"
+
+
+# 手写函数对字段缺失、值为null等情况的处理
+EDGE_DOCUMENTS = [None, {}, {"currentSong": {}}, {"currentSong": {"songId": None}},
+                  {"playlists": []}, {"searches": []}, {"userComments": []},
+                  {"currentMV": {"mvId": "mv_001"}}, {"recentlyUnfollowed": ""},
+                  {"viewedStats": {"weekly": 1}}, {"isPlaying": 0}, {"volume": None}]
+
+
+@pytest.mark.parametrize("task_id", sorted(LEGACY))
+def test_registry_matches_legacy_edge_cases(task_id):
+    for document in EDGE_DOCUMENTS:
+        for args in argument_sets(task_id, document):
+            assert evaluate(task_id, document, *args) == LEGACY[task_id](document, *args), \
+                f"任务{task_id} 数据{document} 参数{args}"
+
+
+def test_every_supported_task_is_covered():
+    assert sorted(LEGACY) == [task["id"] for task in supported_tasks()]
+
+
+def test_bind_params():
+    assert bind_params(get_task(21), ["user_playlist_001", 1]) == {
+        "playlist_id": "user_playlist_001", "expected_count": 1}
+    assert bind_params(get_task(13)) == {"search_query": "稻香"}
+    assert bind_params(get_task(13), (), {"search_query": "烟雨"}) == {"search_query": "烟雨"}
+    with pytest.raises(TypeError, match="缺少参数"):
+        bind_params(get_task(8))
+    with pytest.raises(TypeError, match="最多接受"):
+        bind_params(get_task(1), ["extra"])
+    with pytest.raises(TypeError, match="不接受参数"):
+        bind_params(get_task(8), ["song_001"], {"bogus": 1})
+
+
+def test_evaluate_change():
+    before = {"playlists": [{"playlistId": "p1", "songCount": 3}], "currentViewingPlaylist": None}
+    after = {"playlists": [{"playlistId": "p1", "songCount": 2}], "currentViewingPlaylist": None}
+    assert evaluate_change(21, StateDiff.between(before, after), "p1", 2)
+    assert not evaluate_change(21, StateDiff.between(after, after), "p1", 2)
+    assert not evaluate_change(21, StateDiff.between(after, before), "p1", 3)
+
+    before = {"followedArtists": [{"artistId": "a1"}, {"artistId": "a2"}]}
+    after = {"followedArtists": [{"artistId": "a1"}], "recentlyUnfollowed": "a2"}
+    diff = StateDiff.between(before, after)
+    assert evaluate_change(29, diff, "a2")
+    assert evaluate_change(29, diff)
+    assert not evaluate_change(29, diff, "a1")
+
+    # 没有change条件的任务总是通过
+    assert evaluate_change(1, StateDiff.between({}, {}))
+    assert TASKS_BY_ID[6].get("change") and not evaluate_change(
+        6, StateDiff.between({"currentSong": {"songId": "s1"}}, {"currentSong": {"songId": "s1"}}))
@@ -0,0 +1,107 @@
+"""
+temporal单元测试: 事件日志按时间归并, sequence条件匹配器对操作顺序和时间窗口的接受与拒绝
+运行: python -m pytest tests/test_temporal.py
+"""
+
+import json
+
+import pytest
+
+from temporal import SEQUENCES, SequenceMatcher, check_sequence, merge_events
+from transport import DirectoryTransport
+
+
+def _time(seconds):
+    return f"2025-11-03 10:{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def _contents(searches=(), pages=(), albums=()):
+    """由(秒数, 字段值)列表构造各事件日志的状态文件内容"""
+    return {
+        "search_history.json": json.dumps({"searches": [
+            {"resultType": result_type, "timestamp": _time(t)} for t, result_type in searches]}).encode(),
+        "app_state.json": json.dumps({"navigationHistory": [
+            {"page": page, "timestamp": _time(t)} for t, page in pages]}).encode(),
+        "collected_items.json": json.dumps({"collectedAlbums": [
+            {"albumId": album_id, "collectedTime": _time(t)} for t, album_id in albums]}).encode(),
+    }
+
+
+def _match(task_id, contents, params=None):
+    matcher = SEQUENCES[task_id]
+    return matcher.match(merge_events(contents, matcher.sources), params or {})[0]
+
+
+def test_merge_events_orders_by_time_then_source():
+    contents = _contents(searches=[(5, "artist")], pages=[(1, "recommend"), (5, "singer")])
+    events = [(source, record.get("page") or record.get("resultType"))
+              for _, _, _, source, record in merge_events(contents)]
+    # 同一秒内搜索记录排在页面跳转之前
+    assert events == [("navigation", "recommend"), ("search", "artist"), ("navigation", "singer")]
+
+
+def test_accepts_steps_in_order():
+    contents = _contents(searches=[(10, "artist")],
+                         pages=[(0, "recommend"), (20, "singer"), (25, "search"), (30, "play")])
+    assert _match(14, contents)
+
+
+def test_accepts_steps_in_the_same_second():
+    assert _match(14, _contents(searches=[(10, "artist")], pages=[(10, "singer"), (11, "play")]))
+
+
+@pytest.mark.parametrize("searches, pages", [
+    # 先进入歌手页面再搜索
+    ([(20, "artist")], [(10, "singer"), (30, "play")]),
+    # 搜索的不是歌手
+    ([(10, "song")], [(20, "singer"), (30, "play")]),
+    # 缺少最后一步
+    ([(10, "artist")], [(20, "singer"), (30, "search")]),
+    # 播放在进入歌手页面之前
+    ([(10, "artist")], [(20, "play"), (30, "singer")]),
+    # 超出600秒的时间窗口
+    ([(0, "artist")], [(300, "singer"), (601, "play")]),
+])
+def test_rejects_out_of_order_or_late_sequences(searches, pages):
+    assert not _match(14, _contents(searches=searches, pages=pages))
+
+
+def test_later_start_satisfies_window():
+    # 第一次搜索太早, 第二次搜索开始的部分匹配在时间窗口内完成
+    contents = _contents(searches=[(0, "artist"), (1000, "artist")],
+                         pages=[(100, "recommend"), (1010, "singer"), (1020, "play")])
+    assert _match(14, contents)
+
+
+def test_one_event_does_not_advance_two_steps():
+    matcher = SequenceMatcher(('seq', ('navigation', ('eq', 'page', 'singer')),
+                                      ('navigation', ('eq', 'page', 'singer'))))
+    once = _contents(pages=[(10, "singer")])
+    twice = _contents(pages=[(10, "singer"), (20, "singer")])
+    assert not matcher.match(merge_events(once, matcher.sources), {})[0]
+    assert matcher.match(merge_events(twice, matcher.sources), {}) == (True, 2)
+
+
+def test_records_without_timestamp_are_skipped():
+    contents = _contents(pages=[(20, "singer"), (30, "play")])
+    contents["search_history.json"] = json.dumps({"searches": [
+        {"resultType": "artist"}, {"resultType": "artist", "timestamp": "not a time"}]}).encode()
+    assert not _match(14, contents)
+    assert not _match(14, {"app_state.json": None})
+
+
+def test_check_sequence_binds_params(tmp_path):
+    contents = _contents(searches=[(10, "artist")], pages=[(20, "singer")],
+                         albums=[(30, "album_001")])
+    for name, content in contents.items():
+        (tmp_path / name).write_bytes(content)
+    transport = DirectoryTransport(str(tmp_path))
+    assert check_sequence(28, "album_001", transport=transport)[0]
+    assert not check_sequence(28, album_id="album_002", transport=transport)[0]
+
+
+def test_invalid_patterns():
+    with pytest.raises(ValueError):
+        SequenceMatcher(('any', ('search', ('eq', 'resultType', 'artist'))))
+    with pytest.raises(ValueError):
+        SequenceMatcher(('seq', ('clicks', ('eq', 'page', 'singer'))))
@@ -0,0 +1,77 @@
+"""
+transport单元测试: 通过本地假adb server(socket后端)一次往返批量读取状态文件, 压缩与不压缩两种输出;
+socket后端的设备命令超时
+运行: python -m pytest tests/test_transport.py
+"""
+
+import subprocess
+import time
+
+import pytest
+
+import adb_protocol
+import transport
+from adb_protocol import AdbSocketClient, FakeAdbServer
+from transport import (AdbTransport, batch_read_command, device_exec_in, device_shell,
+                       set_adb_backend, set_compression)
+
+APP_STATE = b'{"currentPage": "recommend", "padding": "' + b'x' * 4096 + b'"}'
+PLAYBACK = b'{"isPlaying": true}'
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    (tmp_path / "files" / "autotest").mkdir(parents=True)
+    (tmp_path / "files" / "autotest" / "app_state.json").write_bytes(APP_STATE)
+    (tmp_path / "files" / "autotest" / "playback_state.json").write_bytes(PLAYBACK)
+    server = FakeAdbServer(str(tmp_path)).start()
+    client = AdbSocketClient(port=server.port, pool_size=0)
+    monkeypatch.setattr(adb_protocol, "_client", client)
+    previous = (transport.get_adb_backend(), transport.COMPRESS_THRESHOLD)
+    set_adb_backend('socket')
+    yield server
+    set_adb_backend(previous[0])
+    set_compression(previous[1])
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("threshold", [None, 1024, 10 ** 9],
+                         ids=["uncompressed", "compressed", "below-threshold"])
+def test_batch_read(server, threshold):
+    set_compression(threshold)
+    contents = AdbTransport(server.serial).read_files(
+        ["app_state.json", "playback_state.json", "comments.json"])
+    assert contents == {"app_state.json": APP_STATE, "playback_state.json": PLAYBACK,
+                        "comments.json": None}
+
+
+def test_compressed_batch_reads_each_file_once():
+    # 是否压缩按stat取得的总大小判断, 每个文件只cat一次
+    previous = transport.COMPRESS_THRESHOLD
+    set_compression(1024)
+    try:
+        command = batch_read_command(["app_state.json", "playback_state.json"])
+    finally:
+        set_compression(previous)
+    assert command.count("cat ") == 1
+    assert "stat -c %s" in command
+
+
+@pytest.mark.parametrize("command", [
+    "sleep 3",
+    # 持续缓慢输出: 每次recv都能读到数据, 超时按整个命令计算
+    "for i in 1 2 3 4 5 6 7 8 9 10 11 12 13 14 15; do echo x; sleep 0.2; done",
+], ids=["silent", "dripping"])
+def test_socket_backend_honours_timeout(server, command):
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        device_shell(command, server.serial, timeout=0.5)
+    assert time.monotonic() - start < 2
+
+
+def test_socket_backend_exec_in_timeout(server):
+    with pytest.raises(subprocess.TimeoutExpired):
+        device_exec_in("cat > /dev/null; sleep 3", b"data", server.serial, timeout=0.5)
+    assert device_exec_in("cat", b"data", server.serial, timeout=5) == (0, b"data")
@@ -0,0 +1,708 @@
+"""
+状态文件访问层
+
+Transport定义了验证函数读取autotest状态文件的接口, 目前有三种实现:
+- AdbTransport: 通过adb访问真机/模拟器(默认)
+- DirectoryTransport: 读取本地目录中的快照, 目录结构与app/src/main/assets/autotest相同
+- RecordReplayTransport: 录制另一个Transport的访问结果, 之后可脱离设备回放
+
+可通过环境变量AUTOTEST_TRANSPORT或--transport=参数选择, 取值如:
+  adb / adb:<序列号> / dir:<目录> / record:<录制文件> / replay:<录制文件>
+
+AdbTransport执行设备命令的方式由ADB_BACKEND决定:
+- subprocess: 每条命令启动一个adb进程(默认)
+- session: 复用adb_session中每台设备一个的常驻shell会话
+- socket: 通过adb_protocol直接与本地adb server通信, 不创建adb进程
+
+可通过环境变量AUTOTEST_ADB_BACKEND或--backend=参数切换
+"""
+
+import atexit
+import base64
+import contextvars
+import json
+import os
+import socket
+import subprocess
+import threading
+import zlib
+from contextlib import contextmanager
+
+from snapshot_cache import resolve_serial
+
+BACKENDS = ('subprocess', 'session', 'socket')
+
+ADB_BACKEND = os.environ.get('AUTOTEST_ADB_BACKEND', 'subprocess')
+
+# 单条命令输出的上限(字节), 超过时中止读取, 防止异常输出占满内存
+MAX_OUTPUT_BYTES = int(os.environ.get('AUTOTEST_MAX_OUTPUT_BYTES', 64 * 1024 * 1024))
+
+# 从管道/socket读取输出时的块大小
+READ_CHUNK_SIZE = 64 * 1024
+
+# App包名
+APP_PACKAGE = "com.example.mymusic"
+
+# 状态文件在App私有目录下的位置
+AUTOTEST_DIR = "files/autotest"
+
+# AutoTestHelper在files/autotest/下维护的全部状态文件
+AUTOTEST_FILES = [
+    'app_state.json',
+    'playback_state.json',
+    'user_favorites.json',
+    'user_playlists.json',
+    'collected_items.json',
+    'followed_artists.json',
+    'search_history.json',
+    'comments.json',
+    'player_settings.json',
+    'listening_stats.json',
+    'mv_playback.json',
+    'task_logs.json'
+]
+
+# 一次拉取多个文件时分隔各文件内容的标记行
+SNAPSHOT_MARKER = "@@AUTOTEST_FILE@@"
+
+# 压缩传输的阈值(字节): 批量读取的文件总大小达到该值时在设备端gzip压缩后再传输, 为None时不压缩
+# 可通过环境变量AUTOTEST_COMPRESS_THRESHOLD或--compress[=<字节数>]参数开启
+COMPRESS_THRESHOLD = (int(os.environ['AUTOTEST_COMPRESS_THRESHOLD'])
+                      if os.environ.get('AUTOTEST_COMPRESS_THRESHOLD') else None)
+
+# 开启压缩但未指定阈值时使用的默认阈值: 小文件压缩省下的传输时间抵不上设备端启动gzip的开销
+DEFAULT_COMPRESS_THRESHOLD = 32 * 1024
+
+# gzip数据的开头两个字节
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class OutputTooLarge(Exception):
+    """设备命令的输出超过了MAX_OUTPUT_BYTES"""
+
+
+def read_bounded(read_chunk, limit=None):
+    """
+    按块读取输出直到结束, 全程在内存中完成
+    :param read_chunk: 每次调用返回下一块字节, 返回空字节表示结束
+    :param limit: 输出上限(字节), 默认MAX_OUTPUT_BYTES
+    :return: 完整输出字节
+    """
+    limit = limit or MAX_OUTPUT_BYTES
+    buffer = bytearray()
+    while True:
+        chunk = read_chunk()
+        if not chunk:
+            return bytes(buffer)
+        if len(buffer) + len(chunk) > limit:
+            raise OutputTooLarge(f"输出超过{limit}字节")
+        buffer += chunk
+
+
+class GunzipReader:
+    """
+    包装按块读取的函数: 输出以gzip魔数开头时边读边解压, 否则原样返回
+    每次最多解压出READ_CHUNK_SIZE字节, 配合read_bounded的上限可防止压缩炸弹占满内存
+    """
+
+    def __init__(self, read_chunk):
+        """
+        :param read_chunk: 每次调用返回下一块原始字节, 返回空字节表示结束
+        """
+        self.read_chunk = read_chunk
+        self.compressed = None  # 在读到开头两个字节之前未知
+        self.raw_bytes = 0
+        self._decompressor = None
+        self._pending = b''
+
+    def _sniff(self):
+        head = b''
+        while len(head) < len(GZIP_MAGIC):
+            chunk = self.read_chunk()
+            if not chunk:
+                break
+            head += chunk
+        self.raw_bytes += len(head)
+        self.compressed = head.startswith(GZIP_MAGIC)
+        if self.compressed:
+            self._decompressor = zlib.decompressobj(wbits=31)
+            self._pending = head
+            return None
+        return head
+
+    def __call__(self):
+        if self.compressed is None:
+            head = self._sniff()
+            if head is not None:
+                return head
+        if not self.compressed:
+            chunk = self.read_chunk()
+            self.raw_bytes += len(chunk)
+            return chunk
+        while True:
+            if self._pending:
+                data = self._decompressor.decompress(self._pending, READ_CHUNK_SIZE)
+                self._pending = self._decompressor.unconsumed_tail
+                if data:
+                    return data
+                continue
+            if self._decompressor.eof:
+                return b''
+            chunk = self.read_chunk()
+            if not chunk:
+                raise IOError("gzip数据不完整, 传输可能被中断")
+            self.raw_bytes += len(chunk)
+            self._pending = chunk
+
+
+def gunzip_output(output, max_bytes=None):
+    """
+    已完整读入内存的设备输出若为gzip数据则解压, 否则原样返回
+    :param max_bytes: 解压后的上限(字节), 默认MAX_OUTPUT_BYTES
+    """
+    if not output.startswith(GZIP_MAGIC):
+        return output
+    chunks = iter([output])
+    return read_bounded(GunzipReader(lambda: next(chunks, b'')), max_bytes)
+
+
+def set_compression(threshold=DEFAULT_COMPRESS_THRESHOLD):
+    """
+    开启或关闭批量读取的压缩传输
+    :param threshold: 压缩阈值(字节), 为None时关闭
+    """
+    global COMPRESS_THRESHOLD
+    COMPRESS_THRESHOLD = threshold
+
+
+def set_adb_backend(name):
+    """
+    切换设备命令的执行方式
+    :param name: BACKENDS中的一个
+    """
+    global ADB_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"未知的adb后端: {name}, 可选: {', '.join(BACKENDS)}")
+    ADB_BACKEND = name
+
+
+def get_adb_backend():
+    """返回当前使用的adb后端名称"""
+    return ADB_BACKEND
+
+
+def adb_command(serial=None):
+    """
+    构造adb命令前缀
+    :param serial: 设备序列号, 为None时由adb自行选择设备
+    """
+    return ['adb', '-s', serial] if serial else ['adb']
+
+
+def device_shell(command, serial=None, timeout=10, max_bytes=None, decompress=False):
+    """
+    在设备上执行一条shell命令并取回原始输出
+    输出直接从管道/socket读入内存, 不经过临时文件, 多个调用方并发执行时互不干扰
+    :param command: 设备端shell命令字符串
+    :param serial: 设备序列号
+    :param timeout: 超时时间(秒)
+    :param max_bytes: 输出上限(字节), 默认MAX_OUTPUT_BYTES
+    :param decompress: 为True时输出若为gzip数据则解压后返回
+    :return: (退出码, 标准输出字节)
+    """
+    if ADB_BACKEND in ('session', 'socket'):
+        if ADB_BACKEND == 'session':
+            from adb_session import get_session
+            returncode, output = get_session(serial).run(command, timeout, max_bytes)
+        else:
+            from adb_protocol import get_socket_client
+            try:
+                returncode, output = get_socket_client().exec_out(command, serial, max_bytes,
+                                                                  timeout)
+            except socket.timeout:
+                raise subprocess.TimeoutExpired(command, timeout)
+        return returncode, gunzip_output(output, max_bytes) if decompress else output
+
+    process = subprocess.Popen(adb_command(serial) + ['exec-out', command],
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL)
+    # 超时后结束adb进程, 读取循环随即因管道关闭而结束
+    timed_out = threading.Event()
+
+    def on_timeout():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, on_timeout)
+    timer.start()
+    try:
+        read_chunk = lambda: process.stdout.read1(READ_CHUNK_SIZE)
+        output = read_bounded(GunzipReader(read_chunk) if decompress else read_chunk, max_bytes)
+    except OutputTooLarge:
+        process.kill()
+        raise
+    finally:
+        timer.cancel()
+        process.stdout.close()
+        returncode = process.wait()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, timeout)
+    return returncode, output
+
+
+def device_exec_in(command, data, serial=None, timeout=30):
+    """
+    在设备上执行一条shell命令, 把data作为标准输入(与adb exec-in相同), 一次传输推送整块数据
+    session后端的常驻shell不适合传输二进制标准输入, 按subprocess方式执行
+    :param command: 设备端shell命令字符串
+    :param data: 标准输入字节
+    :return: (退出码, 标准输出字节)
+    """
+    if ADB_BACKEND == 'socket':
+        from adb_protocol import get_socket_client
+        try:
+            return get_socket_client().exec_in(command, data, serial, timeout=timeout)
+        except socket.timeout:
+            raise subprocess.TimeoutExpired(command, timeout)
+    result = subprocess.run(adb_command(serial) + ['exec-in', command],
+                            input=data,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL,
+                            timeout=timeout)
+    return result.returncode, result.stdout
+
+
+def decode_json(output):
+    """
+    按UTF-8解码设备输出并解析JSON
+    :param output: 文件内容字节
+    :return: JSON数据
+    """
+    return json.loads(output.decode('utf-8'))
+
+
+def list_devices():
+    """
+    列出已连接的设备
+    :return: [(序列号, 状态), ...], 状态为"device"表示可用
+    """
+    if ADB_BACKEND == 'socket':
+        from adb_protocol import get_socket_client
+        return get_socket_client().devices()
+
+    result = subprocess.run(['adb', 'devices'],
+                            capture_output=True,
+                            text=True,
+                            timeout=5)
+    devices = []
+    for line in result.stdout.strip().split('\n')[1:]:  # 跳过第一行标题
+        parts = line.split()
+        if len(parts) >= 2:
+            devices.append((parts[0], parts[1]))
+    return devices
+
+
+def run_as_command(command):
+    """构造以App身份执行的设备端命令"""
+    return f"run-as {APP_PACKAGE} {command}"
+
+
+def batch_read_command(names):
+    """
+    构造一次往返读取多个状态文件的设备端命令
+    设备端依次cat每个文件, 文件之间插入标记行, 输出由parse_marked_output解析。
+    开启压缩传输且文件总大小达到COMPRESS_THRESHOLD时, 整个输出经gzip压缩,
+    设备上没有gzip时依次尝试toybox/busybox中的gzip, 都没有则不压缩; 主机端按魔数判断是否需要解压
+    """
+    # 不存在的文件由cat失败跳过(解析为None); 循环的退出码是最后一次cat的退出码,
+    # 以true结尾, 最后一个文件不存在时整条命令仍然成功
+    emit = (f'for f in {" ".join(names)}; do '
+            f'printf "\\n{SNAPSHOT_MARKER} %s\\n" "$f"; '
+            f'cat "{AUTOTEST_DIR}/$f" 2>/dev/null; done; true')
+    if COMPRESS_THRESHOLD is None:
+        return run_as_command(f"sh -c '{emit}'")
+    paths = " ".join(f"{AUTOTEST_DIR}/{name}" for name in names)
+    # 总大小由stat取得, 不为判断是否压缩而把每个文件多读一遍; 没有stat时size为0, 不压缩
+    script = (f'emit() {{ {emit}; }}; '
+              f'size=0; for p in {paths}; do '
+              f's=$(stat -c %s "$p" 2>/dev/null) && size=$((size + s)); done; Z=; '
+              f'for z in gzip "toybox gzip" "busybox gzip"; do '
+              f'if echo | $z -c >/dev/null 2>&1; then Z=$z; break; fi; done; '
+              f'if [ -n "$Z" ] && [ "$size" -ge {COMPRESS_THRESHOLD} ]; '
+              f'then emit | $Z -c; else emit; fi')
+    return run_as_command(f"sh -c '{script}'")
+
+
+def parse_marked_output(output, files):
+    """
+    解析一次拉取多个文件时的带标记输出
+    :param output: 设备端依次输出"标记行 + 文件内容"的原始字节
+    :param files: 期望出现的文件名列表, 缺失或为空的文件记为None
+    :return: {文件名: 文件内容字节或None}
+    """
+    contents = {name: None for name in files}
+    marker = f"\n{SNAPSHOT_MARKER} ".encode('utf-8')
+    for chunk in output.split(marker)[1:]:
+        name, _, content = chunk.partition(b'\n')
+        content = content.strip()
+        if content:
+            contents[name.decode('utf-8').strip()] = content
+    return contents
+
+
+# ==================== Transport ====================
+
+class Transport:
+    """
+    状态文件访问接口
+    文件名均为files/autotest/下的文件名, 如"app_state.json"
+    """
+
+    # 快照缓存中区分数据来源的键
+    key = "base"
+
+    def read_file(self, name):
+        """
+        读取一个状态文件
+        :return: 文件内容字节, 文件不存在时返回None
+        """
+        raise NotImplementedError
+
+    def read_files(self, names):
+        """
+        读取多个状态文件, 子类可以合并为一次访问
+        :return: {文件名: 文件内容字节或None}
+        """
+        return {name: self.read_file(name) for name in names}
+
+    def stat_files(self, names):
+        """
+        获取状态文件的版本信息, 用于在不下载文件内容的情况下判断文件是否变化
+        默认实现读取文件内容并计算校验值, 子类应改用更轻量的方式
+        :return: {文件名: 版本(可比较的元组)或None(文件不存在)}
+        """
+        contents = self.read_files(names)
+        return {name: None if content is None else (len(content), zlib.crc32(content))
+                for name, content in contents.items()}
+
+    def list_files(self):
+        """
+        列出状态目录中的文件
+        :return: 文件名列表, 目录不可访问时返回None
+        """
+        raise NotImplementedError
+
+    def remove_files(self, names):
+        """
+        删除状态文件
+        :return: 是否成功
+        """
+        raise NotImplementedError
+
+    def describe(self):
+        """返回用于日志输出的描述"""
+        return self.key
+
+
+class AdbTransport(Transport):
+    """通过adb run-as访问设备上App私有目录中的状态文件"""
+
+    def __init__(self, serial=None):
+        """
+        :param serial: 设备序列号, 为None时由adb自行选择设备
+        """
+        self.serial = serial
+        self.key = resolve_serial(serial)
+
+    def run_as(self, command, timeout=10):
+        """以App身份在设备上执行命令, 返回(退出码, 输出字节)"""
+        return device_shell(run_as_command(command), self.serial, timeout)
+
+    def read_file(self, name):
+        if COMPRESS_THRESHOLD is not None:
+            return self.read_files([name])[name]
+        returncode, output = self.run_as(f"cat {AUTOTEST_DIR}/{name}")
+        if returncode != 0:
+            return None
+        return output
+
+    def read_files(self, names):
+        # 一次往返取回所有内容
+        returncode, output = device_shell(batch_read_command(names), self.serial,
+                                          timeout=30, decompress=True)
+        if returncode != 0:
+            raise IOError(f"批量读取失败, 退出码: {returncode}")
+        return parse_marked_output(output, names)
+
+    def stat_files(self, names):
+        # 一条stat命令取回全部文件的大小和修改时间(含纳秒), 不传输文件内容
+        paths = " ".join(f"{AUTOTEST_DIR}/{name}" for name in names)
+        _, output = self.run_as(f"stat -c '%n %s %y' {paths}")
+        stats = {name: None for name in names}
+        for line in output.decode('utf-8').splitlines():
+            parts = line.split(' ', 2)
+            if len(parts) == 3 and parts[1].isdigit():
+                # 文件不存在时stat返回非0, 但已存在的文件仍会正常输出
+                stats[os.path.basename(parts[0])] = (int(parts[1]), parts[2].strip())
+        return stats
+
+    def list_files(self):
+        returncode, output = self.run_as(f"ls {AUTOTEST_DIR}/")
+        if returncode != 0:
+            return None
+        return [line.strip() for line in output.decode('utf-8').split('\n') if line.strip()]
+
+    def remove_files(self, names):
+        paths = " ".join(f"{AUTOTEST_DIR}/{name}" for name in names)
+        returncode, _ = self.run_as(f"rm -f {paths}")
+        return returncode == 0
+
+    def describe(self):
+        return f"adb[{self.key}, {ADB_BACKEND}]"
+
+
+class DirectoryTransport(Transport):
+    """
+    读取本地目录中的autotest快照
+    目录可以直接存放12个状态文件, 也可以是包含files/autotest/的App数据目录
+    """
+
+    def __init__(self, root):
+        """
+        :param root: 快照目录
+        """
+        nested = os.path.join(root, AUTOTEST_DIR)
+        self.root = os.path.abspath(nested if os.path.isdir(nested) else root)
+        self.key = f"dir:{self.root}"
+
+    def read_file(self, name):
+        try:
+            with open(os.path.join(self.root, name), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def stat_files(self, names):
+        stats = {}
+        for name in names:
+            try:
+                st = os.stat(os.path.join(self.root, name))
+                stats[name] = (st.st_size, st.st_mtime_ns)
+            except FileNotFoundError:
+                stats[name] = None
+        return stats
+
+    def list_files(self):
+        if not os.path.isdir(self.root):
+            return None
+        return sorted(os.listdir(self.root))
+
+    def remove_files(self, names):
+        for name in names:
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+        return True
+
+
+class RecordReplayTransport(Transport):
+    """
+    录制/回放Transport
+
+    record模式把内层Transport每次访问的结果按调用顺序记录在内存中, close()(进程退出时自动调用)时
+    一次写入录制文件; replay模式按相同顺序返回录制的结果, 同一请求被调用的次数超过录制次数时重复最后一次结果。
+    """
+
+    def __init__(self, path, mode='replay', inner=None):
+        """
+        :param path: 录制文件路径(JSON)
+        :param mode: 'record'或'replay'
+        :param inner: record模式下被录制的Transport, 默认为AdbTransport()
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"未知的录制模式: {mode}")
+        self.path = path
+        self.mode = mode
+        self.inner = (inner or AdbTransport()) if mode == "record" else None
+        self.key = f"{mode}:{os.path.abspath(path)}"
+        self._lock = threading.Lock()
+        self._cursor = {}
+        self._unsaved = False
+        if mode == 'replay':
+            with open(path, 'r', encoding='utf-8') as f:
+                self._interactions = json.load(f)['interactions']
+        else:
+            self._interactions = {}
+            atexit.register(self.close)
+
+    @staticmethod
+    def _encode(content):
+        if content is None:
+            return None
+        try:
+            return content.decode('utf-8')
+        except UnicodeDecodeError:
+            return {"base64": base64.b64encode(content).decode('ascii')}
+
+    @staticmethod
+    def _decode(value):
+        if value is None:
+            return None
+        if isinstance(value, dict):
+            return base64.b64decode(value['base64'])
+        return value.encode('utf-8')
+
+    def _record(self, request, value):
+        with self._lock:
+            self._interactions.setdefault(request, []).append(value)
+            self._unsaved = True
+        return value
+
+    def _replay(self, request):
+        with self._lock:
+            responses = self._interactions.get(request)
+            if not responses:
+                raise KeyError(f"录制文件中没有该请求: {request}")
+            index = self._cursor.get(request, 0)
+            self._cursor[request] = index + 1
+            return responses[min(index, len(responses) - 1)]
+
+    def save(self):
+        """把录制结果写入录制文件"""
+        with self._lock:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({"version": 1, "interactions": self._interactions},
+                          f, ensure_ascii=False)
+            self._unsaved = False
+
+    def close(self):
+        """record模式下保存尚未写入的录制结果"""
+        if self.mode == 'record' and self._unsaved:
+            self.save()
+
+    def read_file(self, name):
+        request = f"read_file:{name}"
+        if self.mode == 'replay':
+            return self._decode(self._replay(request))
+        return self._decode(self._record(request, self._encode(self.inner.read_file(name))))
+
+    def read_files(self, names):
+        if self.mode == 'replay':
+            return {name: self.read_file(name) for name in names}
+        contents = self.inner.read_files(names)
+        for name in names:
+            self._record(f"read_file:{name}", self._encode(contents.get(name)))
+        return contents
+
+    def stat_files(self, names):
+        request = f"stat_files:{','.join(names)}"
+        if self.mode == 'replay':
+            stats = self._replay(request)
+        else:
+            stats = self._record(request, self.inner.stat_files(names))
+        # JSON中元组会变为列表, 统一转回元组便于比较
+        return {name: tuple(value) if value is not None else None
+                for name, value in stats.items()}
+
+    def list_files(self):
+        if self.mode == 'replay':
+            return self._replay("list_files")
+        return self._record("list_files", self.inner.list_files())
+
+    def remove_files(self, names):
+        request = f"remove_files:{','.join(names)}"
+        if self.mode == 'replay':
+            return self._replay(request)
+        return self._record(request, self.inner.remove_files(names))
+
+    def describe(self):
+        return f"{self.mode}[{self.path}]"
+
+
+def create_transport(spec, serial=None):
+    """
+    根据描述字符串创建Transport
+    :param spec: adb / adb:<序列号> / dir:<目录> / record:<录制文件> / replay:<录制文件> /
+                 archive:<归档目录>#<episode>
+    :param serial: spec为adb时使用的设备序列号
+    """
+    kind, _, value = spec.partition(':')
+    if kind == 'adb':
+        return AdbTransport(value or serial)
+    if kind == 'dir':
+        return DirectoryTransport(value)
+    if kind == 'record':
+        return RecordReplayTransport(value, 'record', AdbTransport(serial))
+    if kind == 'replay':
+        return RecordReplayTransport(value, 'replay')
+    if kind == 'archive':
+        from snapshot_archive import ArchiveTransport
+        path, _, episode = value.rpartition('#')
+        return ArchiveTransport(path, episode)
+    raise ValueError(f"无法识别的transport: {spec}")
+
+
+# 进程级默认Transport, 为None时按设备序列号使用AdbTransport
+_default_transport = (create_transport(os.environ['AUTOTEST_TRANSPORT'])
+                      if os.environ.get('AUTOTEST_TRANSPORT') else None)
+
+# 当前上下文(线程/协程)中生效的Transport, 优先于默认Transport
+_context_transport = contextvars.ContextVar('autotest_transport', default=None)
+
+# 按设备序列号复用的AdbTransport
+_adb_transports = {}
+
+
+def set_transport(transport):
+    """
+    设置进程级默认Transport
+    :param transport: Transport实例或create_transport可识别的描述字符串, 为None时恢复为adb
+    """
+    global _default_transport
+    if isinstance(transport, str):
+        transport = create_transport(transport)
+    _default_transport = transport
+
+
+def get_transport(serial=None):
+    """
+    返回当前生效的Transport
+    :param serial: 未设置Transport时, 按该序列号使用AdbTransport
+    """
+    transport = _context_transport.get() or _default_transport
+    if transport is not None:
+        return transport
+    key = resolve_serial(serial)
+    if key not in _adb_transports:
+        _adb_transports[key] = AdbTransport(serial)
+    return _adb_transports[key]
+
+
+@contextmanager
+def use_transport(transport):
+    """
+    在with块内(仅当前线程/协程)使用指定的Transport
+    :param transport: Transport实例
+    """
+    token = _context_transport.set(transport)
+    try:
+        yield transport
+    finally:
+        _context_transport.reset(token)
+
+
+def apply_transport_options(argv):
+    """
+    解析命令行中的--backend=<name>、--transport=<spec>和--compress[=<字节数>]参数
+    :param argv: 命令行参数列表
+    """
+    for arg in argv:
+        if arg.startswith('--backend='):
+            set_adb_backend(arg.split('=', 1)[1])
+        elif arg.startswith('--transport='):
+            set_transport(arg.split('=', 1)[1])
+        elif arg == '--compress':
+            set_compression()
+        elif arg.startswith('--compress='):
+            set_compression(int(arg.split('=', 1)[1]))
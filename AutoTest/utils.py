@@ -5,13 +5,14 @@
 
 import subprocess
 import json
-import os
-
-APP_PACKAGE = "com.example.mymusic"
+from transport import (APP_PACKAGE, AUTOTEST_FILES, AdbTransport, device_shell, decode_json,
+                       list_devices, get_adb_backend, get_transport, apply_transport_options)
 
 
 def check_adb_installed():
     """检查adb是否已安装"""
+    if get_adb_backend() == 'socket':
+        return check_adb_server()
     try:
         result = subprocess.run(['adb', 'version'],
                               capture_output=True,
@@ -33,15 +34,25 @@ def check_adb_installed():
         return False
 
 
+def check_adb_server():
+    """socket后端下检查adb server是否可访问"""
+    try:
+        from adb_protocol import get_socket_client
+        version = get_socket_client().server_version()
+        print("✓ adb server可访问")
+        print(f"  协议版本: {version}")
+        return True
+    except Exception as e:
+        print(f"✗ 无法连接adb server: {e}")
+        print("  请先运行一次adb devices启动adb server")
+        return False
+
+
 def check_device_connected():
     """检查设备是否连接"""
     try:
-        result = subprocess.run(['adb', 'devices'],
-                              capture_output=True,
-                              text=True,
-                              timeout=5)
-        lines = result.stdout.strip().split('\n')[1:]  # 跳过第一行标题
-        devices = [line for line in lines if line.strip() and 'device' in line]
+        devices = [f"{serial}\t{state}" for serial, state in list_devices()
+                   if state == 'device']
 
         if devices:
             print(f"✓ 发现 {len(devices)} 个设备:")
@@ -63,11 +74,8 @@ def check_device_connected():
 def check_app_installed():
     """检查App是否已安装"""
     try:
-        result = subprocess.run(['adb', 'shell', 'pm', 'list', 'packages', APP_PACKAGE],
-                              capture_output=True,
-                              text=True,
-                              timeout=10)
-        if APP_PACKAGE in result.stdout:
+        _, output = device_shell(f"pm list packages {APP_PACKAGE}", timeout=10)
+        if APP_PACKAGE in output.decode('utf-8', 'replace'):
             print(f"✓ App已安装: {APP_PACKAGE}")
             return True
         else:
@@ -82,11 +90,8 @@ def check_app_installed():
 def check_app_debuggable():
     """检查App是否可调试"""
     try:
-        result = subprocess.run(['adb', 'shell', 'run-as', APP_PACKAGE, 'echo', 'test'],
-                              capture_output=True,
-                              text=True,
-                              timeout=10)
-        if result.returncode == 0 and 'test' in result.stdout:
+        returncode, output = device_shell(f"run-as {APP_PACKAGE} echo test", timeout=10)
+        if returncode == 0 and 'test' in output.decode('utf-8', 'replace'):
             print(f"✓ App可调试")
             return True
         else:
@@ -102,12 +107,8 @@ def check_app_debuggable():
 def list_autotest_files():
     """列出所有自动化测试相关的JSON文件"""
     try:
-        result = subprocess.run(['adb', 'shell', 'run-as', APP_PACKAGE, 'ls', 'files/autotest/'],
-                              capture_output=True,
-                              text=True,
-                              timeout=10)
-        if result.returncode == 0:
-            files = result.stdout.strip().split('\n')
+        files = get_transport().list_files()
+        if files is not None:
             print("✓ 自动化测试文件列表:")
             for file in files:
                 if file.strip():
@@ -125,38 +126,23 @@ def list_autotest_files():
 def view_json_file(filename):
     """查看指定JSON文件的内容"""
     try:
-        local_file = f"temp_{filename}"
-        result = subprocess.run(['adb', 'exec-out', 'run-as', APP_PACKAGE,
-                               'cat', f'files/autotest/{filename}'],
-                              stdout=open(local_file, 'w'),
-                              stderr=subprocess.PIPE,
-                              timeout=10)
+        output = get_transport().read_file(filename)
 
-        if os.path.exists(local_file) and os.path.getsize(local_file) > 0:
-            with open(local_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+        if output and output.strip():
+            data = decode_json(output)
 
             print(f"✓ 文件内容: {filename}")
             print(json.dumps(data, ensure_ascii=False, indent=2))
-
-            os.remove(local_file)
             return data
         else:
             print(f"✗ 无法读取文件: {filename}")
-            if os.path.exists(local_file):
-                os.remove(local_file)
             return None
-    except json.JSONDecodeError:
+    except (json.JSONDecodeError, UnicodeDecodeError):
         print(f"✗ JSON格式错误: {filename}")
-        if os.path.exists(local_file):
-            with open(local_file, 'r', encoding='utf-8') as f:
-                print(f"文件内容: {f.read()}")
-            os.remove(local_file)
+        print(f"文件内容: {output.decode('utf-8', 'replace')}")
         return None
     except Exception as e:
         print(f"✗ 查看文件时出错: {e}")
-        if os.path.exists(local_file):
-            os.remove(local_file)
         return None
 
 
@@ -167,12 +153,19 @@ def run_system_check():
     print("=" * 70)
     print()
 
-    checks = [
-        ("adb安装", check_adb_installed),
-        ("设备连接", check_device_connected),
-        ("App安装", check_app_installed),
-        ("App可调试", check_app_debuggable),
-    ]
+    transport = get_transport()
+    if isinstance(transport, AdbTransport):
+        checks = [
+            ("adb安装", check_adb_installed),
+            ("设备连接", check_device_connected),
+            ("App安装", check_app_installed),
+            ("App可调试", check_app_debuggable),
+        ]
+    else:
+        # 离线数据源不需要adb和设备
+        print(f"数据源: {transport.describe()}")
+        print()
+        checks = []
 
     results = []
     for name, check_func in checks:
@@ -200,36 +193,23 @@ def run_system_check():
         return False
 
 
-def clear_autotest_files():
-    """清空所有自动化测试文件"""
+def clear_autotest_files(confirm=True):
+    """
+    清空所有自动化测试文件
+    :param confirm: 为False时不询问确认(批量运行episode之间重置状态时使用, 也可以用baseline_seed.py写入基线)
+    """
     try:
-        print("警告: 此操作将删除所有自动化测试JSON文件")
-        confirm = input("是否继续? (y/N): ")
-
-        if confirm.lower() != 'y':
-            print("操作已取消")
-            return False
+        if confirm:
+            print("警告: 此操作将删除所有自动化测试JSON文件")
+            answer = input("是否继续? (y/N): ")
 
-        files = [
-            'app_state.json',
-            'playback_state.json',
-            'user_favorites.json',
-            'user_playlists.json',
-            'collected_items.json',
-            'followed_artists.json',
-            'search_history.json',
-            'comments.json',
-            'player_settings.json',
-            'listening_stats.json',
-            'mv_playback.json',
-            'task_logs.json'
-        ]
+            if answer.lower() != 'y':
+                print("操作已取消")
+                return False
 
-        for file in files:
-            subprocess.run(['adb', 'shell', 'run-as', APP_PACKAGE,
-                          'rm', f'files/autotest/{file}'],
-                         capture_output=True,
-                         timeout=5)
+        if not get_transport().remove_files(AUTOTEST_FILES):
+            print("✗ 清空文件失败")
+            return False
 
         print("✓ 已清空所有自动化测试文件")
         return True
@@ -241,6 +221,13 @@ def clear_autotest_files():
 if __name__ == "__main__":
     import sys
 
+    # --backend=session: 通过常驻adb shell会话执行设备命令
+    # --transport=dir:<目录>: 读取本地快照目录而不是设备
+    apply_transport_options(sys.argv[1:])
+    # --yes: clear时不询问确认
+    assume_yes = '--yes' in sys.argv
+    sys.argv = [arg for arg in sys.argv if not arg.startswith('--')]
+
     if len(sys.argv) > 1:
         command = sys.argv[1]
 
@@ -254,14 +241,17 @@ if __name__ == "__main__":
             else:
                 print("用法: python utils.py view <filename>")
         elif command == "clear":
-            clear_autotest_files()
+            clear_autotest_files(confirm=not assume_yes)
         else:
             print("未知命令")
             print("用法:")
             print("  python utils.py check       - 运行环境检查")
             print("  python utils.py list        - 列出所有测试文件")
             print("  python utils.py view <file> - 查看指定文件内容")
-            print("  python utils.py clear       - 清空所有测试文件")
+            print("  python utils.py clear       - 清空所有测试文件(加--yes不询问确认)")
+            print("  可选参数 --backend=session  - 复用常驻adb shell会话")
+            print("  可选参数 --backend=socket   - 直接连接adb server, 不创建adb进程")
+            print("  可选参数 --transport=dir:<目录> | replay:<录制文件> | record:<录制文件>")
     else:
         # 默认运行系统检查
         run_system_check()
@@ -3,39 +3,241 @@
 用于验证各项任务是否成功完成
 """
 
-import subprocess
+import contextvars
+import functools
 import json
 import os
+from contextlib import contextmanager
+from metrics import record, timed
+from partial_json import load_document
+from snapshot_cache import MISSING_FILE
+from state_diff import StateDiff
+from task_registry import evaluate, evaluate_change, get_task, has_change_check
+from transport import APP_PACKAGE, AUTOTEST_FILES, decode_json, get_transport
 
-# App包名
-APP_PACKAGE = "com.example.mymusic"
+# 为True时状态文件按需解码(partial_json.LazyDocument), 验证函数只解析用到的字段,
+# 不解析不断增长的history数组; 设置环境变量AUTOTEST_PARTIAL_DECODE=0时完整解码
+PARTIAL_DECODE = os.environ.get('AUTOTEST_PARTIAL_DECODE', '1') != '0'
 
-def read_json_from_device(file_path):
+# 当前生效的快照(文件名 -> JSON数据), 为None时直接从设备读取
+# 使用ContextVar保存, 多线程/协程并发验证不同设备时互不影响
+_active_snapshot = contextvars.ContextVar('autotest_snapshot', default=None)
+
+# 当前生效的快照缓存(SnapshotCache), 为None时每次读取都访问设备
+_active_cache = contextvars.ContextVar('autotest_cache', default=None)
+
+# 任务开始前的状态(文件名 -> JSON数据), 设置时定义了change条件的任务还要检查前后状态的差异
+_active_pre_state = contextvars.ContextVar('autotest_pre_state', default=None)
+
+
+def pull_autotest_snapshot(files=None, serial=None):
+    """
+    一次性拉取files/autotest/下的全部状态文件(adb下只需一次设备往返)
+    :param files: 需要拉取的文件名列表, 默认为AUTOTEST_FILES
+    :param serial: 设备序列号
+    :return: {文件名: JSON数据或None}, 读取失败时返回None
+    """
+    files = files or AUTOTEST_FILES
+    try:
+        with timed('transport_ms'):
+            contents = get_transport(serial).read_files(files)
+    except Exception as e:
+        print(f"拉取快照失败, 错误: {e}")
+        return None
+    record('bytes', sum(len(content) for content in contents.values() if content))
+    with timed('decode_ms'):
+        return decode_snapshot(contents, files)
+
+
+def decode_state_file(content):
+    """
+    解码一个状态文件的内容
+    :param content: 文件内容字节
+    :return: PARTIAL_DECODE时为按需解码的只读dict, 否则为完整解码的JSON数据
+    """
+    return load_document(content) if PARTIAL_DECODE else decode_json(content)
+
+
+def decode_snapshot(contents, files):
+    """
+    把Transport.read_files取回的文件内容解析为快照
+    :param contents: {文件名: 文件内容字节或None}
+    :param files: 快照包含的文件名列表
+    :return: {文件名: JSON数据或None}
+    """
+    snapshot = {}
+    for name in files:
+        snapshot[name] = None
+        if contents.get(name) is None:
+            continue
+        try:
+            snapshot[name] = decode_state_file(contents[name])
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            print(f"快照中的文件格式错误: {name}, 错误: {e}")
+    return snapshot
+
+
+@contextmanager
+def use_snapshot(snapshot):
+    """
+    在with块内让所有task_XX验证函数从快照读取数据, 而不是逐个访问设备
+    :param snapshot: pull_autotest_snapshot返回的快照
+    """
+    token = _active_snapshot.set(snapshot)
+    try:
+        yield snapshot
+    finally:
+        _active_snapshot.reset(token)
+
+
+@contextmanager
+def use_cache(cache):
+    """
+    在with块内让read_json_from_device先查询快照缓存, 未命中时再访问设备并写回缓存
+    :param cache: SnapshotCache实例, 为None时关闭缓存
+    """
+    token = _active_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _active_cache.reset(token)
+
+
+@contextmanager
+def use_pre_state(state):
+    """
+    在with块内以state作为任务开始前的状态: 任务6、9等只看任务后状态无法判断"是否变化"的任务,
+    在判断条件之外还要求state_diff计算的前后差异满足任务的change条件
+    :param state: state_diff.load_state返回的状态, 为None时只检查任务后的状态
+    """
+    token = _active_pre_state.set(state)
+    try:
+        yield state
+    finally:
+        _active_pre_state.reset(token)
+
+
+def get_active_snapshot():
+    """返回当前上下文中生效的快照, 未设置时返回None"""
+    return _active_snapshot.get()
+
+
+def get_active_cache():
+    """返回当前上下文中生效的快照缓存, 未设置时返回None"""
+    return _active_cache.get()
+
+
+def lookup_cache(cache, transport, name):
+    """
+    按数据源上文件的当前版本查询快照缓存: 全部状态文件的版本由一次stat_files取回并在短时间内复用,
+    设备上的文件变化后对应条目随即失效; 版本表明文件不存在时直接缓存为不存在, 不再读取
+    :param cache: SnapshotCache实例
+    :return: (缓存的数据、MISSING_FILE或None(需要读取), 读取后写入缓存时使用的版本)
     """
-    从设备读取JSON文件
+    files = AUTOTEST_FILES if name in AUTOTEST_FILES else AUTOTEST_FILES + [name]
+    with timed('transport_ms'):
+        version = cache.versions(transport, files).get(name)
+    data = cache.get(transport.key, name, version)
+    if data is None and version is MISSING_FILE:
+        cache.put(transport.key, name, MISSING_FILE, MISSING_FILE)
+        data = MISSING_FILE
+    return data, version
+
+
+def read_json_from_device(file_path, serial=None):
+    """
+    从设备(或当前Transport指定的数据源)读取JSON文件
     :param file_path: 设备上的文件路径(相对于app私有目录)
+    :param serial: 设备序列号, 未设置Transport时用于选择设备
     :return: JSON数据或None
     """
+    name = os.path.basename(file_path)
+    snapshot = _active_snapshot.get()
+    if snapshot is not None and file_path.startswith('autotest/'):
+        if name in snapshot:
+            data = snapshot[name]
+            if data is None:
+                print(f"读取文件失败: {file_path}, 错误: 快照中不存在该文件")
+            return data
+
+    transport = get_transport(serial)
+    cache = _active_cache.get()
+    version = None
+    if cache is not None:
+        data, version = lookup_cache(cache, transport, name)
+        if data is MISSING_FILE:
+            print(f"读取文件失败: {file_path}, 错误: {transport.describe()}中不存在该文件")
+            return None
+        if data is not None:
+            return data
+
     try:
-        # 将设备上的文件复制到本地
-        local_file = f"temp_{os.path.basename(file_path)}"
-        subprocess.run([
-            'adb', 'exec-out', 'run-as', APP_PACKAGE,
-            'cat', f'files/{file_path}'
-        ], stdout=open(local_file, 'w'), stderr=subprocess.DEVNULL)
-
-        # 读取JSON
-        with open(local_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        # 删除临时文件
-        os.remove(local_file)
+        # 文件内容直接读入内存并按UTF-8解码, 不落地临时文件
+        with timed('transport_ms'):
+            content = transport.read_file(name)
+        if content is None:
+            if cache is not None:
+                cache.put(transport.key, name, MISSING_FILE, MISSING_FILE)
+            raise FileNotFoundError(f"{transport.describe()}中不存在该文件")
+        record('bytes', len(content))
+        with timed('decode_ms'):
+            data = decode_state_file(content)
+        if cache is not None:
+            cache.put(transport.key, name, data, version)
         return data
     except Exception as e:
         print(f"读取文件失败: {file_path}, 错误: {e}")
         return None
 
 
+def check_task_data(task_id, data, *args, **kwargs):
+    """
+    对已读取的状态文件数据验证任务: 执行编译好的判断条件; 设置了任务开始前的状态(use_pre_state)时,
+    还要求前后状态的差异满足任务的change条件。同步和异步(async_engine)的验证都经过这里
+    :param task_id: 任务编号
+    :param data: 任务的状态文件解码后的数据, 文件不存在或读取失败时为None
+    :param args: 任务参数, 与对应task_XX函数的参数相同
+    :return: 是否通过, 文件不存在或格式错误时返回False
+    """
+    task = get_task(task_id)
+    pre_state = _active_pre_state.get()
+    # 按需解码时, 判断条件访问到的字段在这一步才解析, 计入predicate_ms
+    with timed('predicate_ms'):
+        try:
+            if not evaluate(task_id, data, *args, **kwargs):
+                return False
+        except json.JSONDecodeError as e:
+            # 按需解码只检查了顶层结构, 判断条件用到的字段内部格式错误时与完整解码一样视为读取失败
+            print(f"读取文件失败: autotest/{task['file']}, 错误: {e}")
+            return False
+        if pre_state is None or not has_change_check(task_id):
+            return True
+        diff = StateDiff.between(pre_state.get(task['file']), data)
+        return evaluate_change(task_id, diff, *args, **kwargs)
+
+
+def check_task(task_id, *args, **kwargs):
+    """
+    按任务注册表(task_registry.TASKS)验证任务: 读取任务的状态文件后由check_task_data判断
+    :param task_id: 任务编号
+    :param args: 任务参数, 与对应task_XX函数的参数相同
+    :return: 是否通过, 文件不存在或格式错误时返回False
+    """
+    data = read_json_from_device('autotest/' + get_task(task_id)['file'])
+    return check_task_data(task_id, data, *args, **kwargs)
+
+
+def task_function(task_id):
+    """
+    返回任务的验证函数
+    :param task_id: 任务编号
+    :return: 注册表中function指定的task_XX函数; 只在注册表中定义的任务返回按注册表验证的通用函数
+    """
+    task = get_task(task_id)
+    func = globals().get(task.get('function') or '')
+    return func if func else functools.partial(check_task, task_id)
+
+
 # ==================== 任务1-10 (低难度) ====================
 
 def task_01_check_open_recommend_page():
@@ -43,10 +245,7 @@ def task_01_check_open_recommend_page():
     任务1: 打开app并进入"推荐"首页
     验证: 检查app_state.json中currentPage是否为"recommend"
     """
-    data = read_json_from_device('autotest/app_state.json')
-    if data:
-        return data.get('currentPage') == 'recommend'
-    return False
+    return check_task(1)
 
 
 def task_02_check_navigate_to_stroll():
@@ -54,10 +253,7 @@ def task_02_check_navigate_to_stroll():
     任务2: 从"推荐"页面进入"漫游"页面
     验证: 检查app_state.json中currentPage是否为"stroll"
     """
-    data = read_json_from_device('autotest/app_state.json')
-    if data:
-        return data.get('currentPage') == 'stroll'
-    return False
+    return check_task(2)
 
 
 def task_03_check_navigate_to_profile():
@@ -65,11 +261,7 @@ def task_03_check_navigate_to_profile():
     任务3: 从"推荐"页面进入"我的"页面
     验证: 检查app_state.json中currentPage是否为"profile"或"my"
     """
-    data = read_json_from_device('autotest/app_state.json')
-    if data:
-        current_page = data.get('currentPage')
-        return current_page in ['profile', 'my', 'mine']
-    return False
+    return check_task(3)
 
 
 def task_04_check_play_song():
@@ -77,10 +269,7 @@ def task_04_check_play_song():
     任务4: 播放当前暂停的歌曲
     验证: 检查playback_state.json中isPlaying是否为true
     """
-    data = read_json_from_device('autotest/playback_state.json')
-    if data:
-        return data.get('isPlaying') == True
-    return False
+    return check_task(4)
 
 
 def task_05_check_pause_song():
@@ -88,10 +277,7 @@ def task_05_check_pause_song():
     任务5: 暂停播放当前的歌曲
     验证: 检查playback_state.json中isPlaying是否为false
     """
-    data = read_json_from_device('autotest/playback_state.json')
-    if data:
-        return data.get('isPlaying') == False
-    return False
+    return check_task(5)
 
 
 def task_06_check_switch_previous_song(expected_song_id=None):
@@ -100,13 +286,7 @@ def task_06_check_switch_previous_song(expected_song_id=None):
     验证: 检查playback_state.json中currentSong.songId是否变化
     :param expected_song_id: 期望的歌曲ID(如果已知)
     """
-    data = read_json_from_device('autotest/playback_state.json')
-    if data and 'currentSong' in data:
-        if expected_song_id:
-            return data['currentSong'].get('songId') == expected_song_id
-        # 如果没有指定期望ID,只要有currentSong就认为切换成功
-        return 'songId' in data['currentSong']
-    return False
+    return check_task(6, expected_song_id)
 
 
 def task_07_check_shuffle_mode():
@@ -114,10 +294,7 @@ def task_07_check_shuffle_mode():
     任务7: 将播放模式改为随机播放
     验证: 检查playback_state.json中playbackMode是否为"shuffle"
     """
-    data = read_json_from_device('autotest/playback_state.json')
-    if data:
-        return data.get('playbackMode') == 'shuffle'
-    return False
+    return check_task(7)
 
 
 def task_08_check_favorite_song(song_id):
@@ -126,11 +303,7 @@ def task_08_check_favorite_song(song_id):
     验证: 检查user_favorites.json中是否包含指定歌曲
     :param song_id: 被收藏的歌曲ID
     """
-    data = read_json_from_device('autotest/user_favorites.json')
-    if data and 'favoriteSongs' in data:
-        song_ids = [song.get('songId') for song in data['favoriteSongs']]
-        return song_id in song_ids
-    return False
+    return check_task(8, song_id)
 
 
 def task_09_check_volume_adjusted(expected_volume=None):
@@ -139,13 +312,7 @@ def task_09_check_volume_adjusted(expected_volume=None):
     验证: 检查playback_state.json中volume是否改变
     :param expected_volume: 期望的音量值(0-100)
     """
-    data = read_json_from_device('autotest/playback_state.json')
-    if data:
-        if expected_volume is not None:
-            return data.get('volume') == expected_volume
-        # 如果没有指定期望音量,只要volume字段存在就认为成功
-        return 'volume' in data
-    return False
+    return check_task(9, expected_volume)
 
 
 def task_10_check_enter_playlist():
@@ -153,10 +320,7 @@ def task_10_check_enter_playlist():
     任务10: 随机进入"我的"中的一个歌单
     验证: 检查user_playlists.json中currentViewingPlaylist不为null
     """
-    data = read_json_from_device('autotest/user_playlists.json')
-    if data:
-        return data.get('currentViewingPlaylist') is not None
-    return False
+    return check_task(10)
 
 
 # ==================== 任务11-21 (中难度) ====================
@@ -166,12 +330,7 @@ def task_11_check_daily_recommend_third_song():
     任务11: 进入"每日推荐"播放第三首歌曲
     验证: 检查playback_state.json中currentSong.source是否为"daily_recommend"且sourceDetail包含"第3首"
     """
-    data = read_json_from_device('autotest/playback_state.json')
-    if data and 'currentSong' in data:
-        song = data['currentSong']
-        return (song.get('source') == 'daily_recommend' and
-                '第3首' in song.get('sourceDetail', ''))
-    return False
+    return check_task(11)
 
 
 def task_12_check_create_playlist_and_add_song(playlist_name=None):
@@ -180,29 +339,7 @@ def task_12_check_create_playlist_and_add_song(playlist_name=None):
     验证: 检查user_playlists.json中是否有指定名称的歌单,且songCount > 0
     :param playlist_name: 新建歌单的名称。如果为None，则检查最新创建的歌单；否则检查指定名称的歌单
     """
-    data = read_json_from_device('autotest/user_playlists.json')
-    if data and 'playlists' in data:
-        playlists = data['playlists']
-
-        if playlist_name is None:
-            # 不传参数时，检查最新创建的歌单
-            if not playlists:
-                return False
-            # 按创建时间排序，取最新的
-            sorted_playlists = sorted(playlists, key=lambda x: x.get('createTime', 0), reverse=True)
-            latest = sorted_playlists[0]
-            print(f"  → 检查最新创建的歌单: 《{latest.get('playlistName')}》")
-            print(f"  → 歌曲数量: {latest.get('songCount', 0)}")
-            return latest.get('songCount', 0) > 0
-        else:
-            # 传参数时，检查指定名称的歌单
-            print(f"  → 检查指定歌单: 《{playlist_name}》")
-            for playlist in playlists:
-                if playlist.get('playlistName') == playlist_name:
-                    print(f"  → 歌曲数量: {playlist.get('songCount', 0)}")
-                    return playlist.get('songCount', 0) > 0
-            print(f"  → 未找到名称为《{playlist_name}》的歌单")
-    return False
+    return check_task(12, playlist_name)
 
 
 def task_13_check_search_and_play(search_query='稻香'):
@@ -211,15 +348,7 @@ def task_13_check_search_and_play(search_query='稻香'):
     验证: 检查search_history.json中有该搜索记录,且action为"play"
     :param search_query: 搜索关键词，默认'稻香'
     """
-    data = read_json_from_device('autotest/search_history.json')
-    if data and 'searches' in data:
-        print(f"  → 检查搜索记录: 《{search_query}》")
-        for search in data['searches']:
-            if search.get('query') == search_query and search.get('action') == 'play':
-                print(f"  → 找到匹配的搜索并播放记录")
-                return True
-        print(f"  → 未找到搜索《{search_query}》并播放的记录")
-    return False
+    return check_task(13, search_query)
 
 
 def task_14_check_search_artist_and_play():
@@ -227,12 +356,7 @@ def task_14_check_search_artist_and_play():
     任务14: 搜索某个歌手并播放其中的第一首歌
     验证: 检查search_history.json中有歌手搜索记录,且resultType为"artist",action为"play"
     """
-    data = read_json_from_device('autotest/search_history.json')
-    if data and 'searches' in data:
-        for search in data['searches']:
-            if search.get('resultType') == 'artist' and search.get('action') == 'play':
-                return True
-    return False
+    return check_task(14)
 
 
 def task_15_check_view_song_detail(song_id):
@@ -241,11 +365,7 @@ def task_15_check_view_song_detail(song_id):
     验证: 检查app_state.json中currentPage为"song_detail"且包含指定songId
     :param song_id: 查看详情的歌曲ID
     """
-    data = read_json_from_device('autotest/app_state.json')
-    if data:
-        return (data.get('currentPage') == 'song_detail' and
-                data.get('currentSongId') == song_id)
-    return False
+    return check_task(15, song_id)
 
 
 def task_16_check_view_lyrics():
@@ -253,11 +373,7 @@ def task_16_check_view_lyrics():
     任务16: 查看一首歌曲的歌词
     验证: 检查app_state.json中showLyrics为true或currentPage为"lyrics"
     """
-    data = read_json_from_device('autotest/app_state.json')
-    if data:
-        return (data.get('showLyrics') == True or
-                data.get('currentPage') == 'lyrics')
-    return False
+    return check_task(16)
 
 
 def task_17_check_stroll_scene_setting(scene_name):
@@ -266,10 +382,7 @@ def task_17_check_stroll_scene_setting(scene_name):
     验证: 检查player_settings.json中strollMode.scene是否为指定场景
     :param scene_name: 场景名称,如"伪感"
     """
-    data = read_json_from_device('autotest/player_settings.json')
-    if data and 'strollMode' in data:
-        return data['strollMode'].get('scene') == scene_name
-    return False
+    return check_task(17, scene_name)
 
 
 def task_18_check_copy_comment():
@@ -286,11 +399,7 @@ def task_19_check_rank_list_play():
     任务19: 在排行榜中随机选择打开一个榜单并播放第一首歌曲
     验证: 检查playback_state.json中currentSong.source包含"rank"或"榜单"
     """
-    data = read_json_from_device('autotest/playback_state.json')
-    if data and 'currentSong' in data:
-        source = data['currentSong'].get('source', '')
-        return 'rank' in source or '榜单' in source
-    return False
+    return check_task(19)
 
 
 def task_20_check_collect_playlist(playlist_id):
@@ -299,11 +408,7 @@ def task_20_check_collect_playlist(playlist_id):
     验证: 检查collected_items.json中collectedPlaylists是否包含指定歌单
     :param playlist_id: 收藏的歌单ID
     """
-    data = read_json_from_device('autotest/collected_items.json')
-    if data and 'collectedPlaylists' in data:
-        playlist_ids = [p.get('playlistId') for p in data['collectedPlaylists']]
-        return playlist_id in playlist_ids
-    return False
+    return check_task(20, playlist_id)
 
 
 def task_21_check_delete_song_from_playlist(playlist_id, expected_count):
@@ -313,12 +418,7 @@ def task_21_check_delete_song_from_playlist(playlist_id, expected_count):
     :param playlist_id: 歌单ID
     :param expected_count: 删除后期望的歌曲数量
     """
-    data = read_json_from_device('autotest/user_playlists.json')
-    if data and 'playlists' in data:
-        for playlist in data['playlists']:
-            if playlist.get('playlistId') == playlist_id:
-                return playlist.get('songCount') == expected_count
-    return False
+    return check_task(21, playlist_id, expected_count)
 
 
 # ==================== 任务22-31 (高难度) ====================
@@ -329,10 +429,7 @@ def task_22_check_view_listening_stats(stat_type):
     验证: 检查listening_stats.json中viewedStats的对应字段为true
     :param stat_type: "weekly"或"monthly"
     """
-    data = read_json_from_device('autotest/listening_stats.json')
-    if data and 'viewedStats' in data:
-        return data['viewedStats'].get(stat_type) == True
-    return False
+    return check_task(22, stat_type)
 
 
 def task_23_check_share_to_wechat():
@@ -351,14 +448,7 @@ def task_24_check_post_comment(song_id, comment_content):
     :param song_id: 评论的歌曲ID
     :param comment_content: 评论内容(可选,用于精确匹配)
     """
-    data = read_json_from_device('autotest/comments.json')
-    if data and 'userComments' in data:
-        for comment in data['userComments']:
-            if comment.get('songId') == song_id:
-                if comment_content:
-                    return comment.get('content') == comment_content
-                return True
-    return False
+    return check_task(24, song_id, comment_content)
 
 
 def task_25_check_invite_friend():
@@ -386,12 +476,7 @@ def task_27_check_playlist_sort_order(playlist_id, expected_order):
     :param playlist_id: 歌单ID
     :param expected_order: 期望的排序方式,如"time_desc","name_asc"等
     """
-    data = read_json_from_device('autotest/user_playlists.json')
-    if data and 'playlists' in data:
-        for playlist in data['playlists']:
-            if playlist.get('playlistId') == playlist_id:
-                return playlist.get('sortOrder') == expected_order
-    return False
+    return check_task(27, playlist_id, expected_order)
 
 
 def task_28_check_collect_album(album_id):
@@ -400,11 +485,7 @@ def task_28_check_collect_album(album_id):
     验证: 检查collected_items.json中collectedAlbums是否包含指定专辑
     :param album_id: 收藏的专辑ID
     """
-    data = read_json_from_device('autotest/collected_items.json')
-    if data and 'collectedAlbums' in data:
-        album_ids = [a.get('albumId') for a in data['collectedAlbums']]
-        return album_id in album_ids
-    return False
+    return check_task(28, album_id)
 
 
 def task_29_check_unfollow_artist(artist_id=None):
@@ -413,22 +494,7 @@ def task_29_check_unfollow_artist(artist_id=None):
     验证: 检查followed_artists.json中是否有recentlyUnfollowed字段记录了取消关注的项目
     :param artist_id: 取消关注的项目ID (可选)
     """
-    data = read_json_from_device('autotest/followed_artists.json')
-
-    if not data:
-        return False
-
-    # 检查是否有recentlyUnfollowed字段且不为空
-    recently_unfollowed = data.get('recentlyUnfollowed')
-    if not recently_unfollowed:
-        return False
-
-    # 如果指定了artist_id，检查是否匹配
-    if artist_id:
-        return recently_unfollowed == artist_id
-
-    # 如果没有指定artist_id，只要有recentlyUnfollowed记录就算通过
-    return True
+    return check_task(29, artist_id)
 
 
 def task_30_check_play_mv(mv_id):
@@ -437,12 +503,7 @@ def task_30_check_play_mv(mv_id):
     验证: 检查mv_playback.json中currentMV.mvId是否为指定MV且isPlaying为true
     :param mv_id: 播放的MV ID
     """
-    data = read_json_from_device('autotest/mv_playback.json')
-    if data and 'currentMV' in data:
-        current_mv = data['currentMV']
-        return (current_mv.get('mvId') == mv_id and
-                current_mv.get('isPlaying') == True)
-    return False
+    return check_task(30, mv_id)
 
 
 def task_31_check_change_player_style(style_id):
@@ -451,10 +512,7 @@ def task_31_check_change_player_style(style_id):
     验证: 检查player_settings.json中playerStyle.styleId是否为指定样式
     :param style_id: 播放器样式ID
     """
-    data = read_json_from_device('autotest/player_settings.json')
-    if data and 'playerStyle' in data:
-        return data['playerStyle'].get('styleId') == style_id
-    return False
+    return check_task(31, style_id)
 
 
 # ==================== 测试运行器 ====================